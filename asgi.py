@@ -0,0 +1,163 @@
+"""Ponto de entrada ASGI da aplicação.
+   As rotas de consulta aos agentes são atendidas diretamente no event loop, de modo que um processo
+   mantém muitas consultas em andamento enquanto aguarda o AzureSearch e o Azure OpenAI.
+   As demais rotas (inclusive o streaming SSE) são repassadas à aplicação Flask (WSGI), cada requisição
+   em uma thread de um pool de ASGI_WSGI_THREADS threads.
+   uso: uvicorn asgi:app --workers 4
+"""
+
+import os
+import sys
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+from flask.signals import request_started
+from werkzeug.middleware.proxy_fix import ProxyFix
+from main_app import app as flask_app
+from src.backend.routes.vitoria import aquery_vitoria
+
+ASGI_WSGI_THREADS = int(os.getenv("ASGI_WSGI_THREADS", "32"))
+
+wsgi_executor = ThreadPoolExecutor(max_workers=ASGI_WSGI_THREADS, thread_name_prefix="wsgi")
+
+
+class _PooledWsgiToAsgiInstance(WsgiToAsgiInstance):
+    # asgiref runs every WSGI request on one shared thread (thread_sensitive=True); the pool serves them in parallel
+    run_wsgi_app = sync_to_async(WsgiToAsgiInstance.__dict__["run_wsgi_app"].func, thread_sensitive=False,
+                                 executor=wsgi_executor)
+
+
+class PooledWsgiToAsgi(WsgiToAsgi):
+    """
+    Adaptador WSGI -> ASGI do asgiref que atende as requisições em um pool de threads, em vez de uma a uma.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await _PooledWsgiToAsgiInstance(self.wsgi_application, self.duplicate_header_limit)(scope, receive, send)
+
+
+wsgi_app = PooledWsgiToAsgi(flask_app)
+
+
+def _proxy_fix():
+    # The ProxyFix configured in create_app, applied to the environ of the async views
+    middleware = flask_app.wsgi_app
+    if not isinstance(middleware, ProxyFix):
+        return None
+    return ProxyFix(lambda environ, start_response: [], x_for=middleware.x_for, x_proto=middleware.x_proto,
+                    x_host=middleware.x_host, x_port=middleware.x_port, x_prefix=middleware.x_prefix)
+
+
+proxy_fix = _proxy_fix()
+
+ASYNC_ROUTES = {
+    ("POST", "/chatAgente1/query"): aquery_vitoria,
+}
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+
+    if scope["type"] == "http":
+        handler = ASYNC_ROUTES.get((scope["method"], scope["path"]))
+        if handler is not None:
+            await _run_async_view(handler, scope, receive, send)
+            return
+
+    await wsgi_app(scope, receive, send)
+
+
+async def _run_async_view(handler, scope, receive, send):
+    """
+    Executa uma view assíncrona dentro de um contexto de requisição Flask, com as mesmas etapas de
+    `Flask.full_dispatch_request`: cabeçalhos de proxy, hooks before/after_request, sessão e tratamento de erros.
+    """
+
+    body = await _read_body(receive)
+
+    environ = _build_environ(scope, body)
+    if proxy_fix is not None:
+        proxy_fix(environ, None)
+
+    with flask_app.request_context(environ):
+        try:
+            try:
+                request_started.send(flask_app)
+                rv = flask_app.preprocess_request()
+                if rv is None:
+                    rv = await handler()
+            except Exception as e:
+                rv = flask_app.handle_user_exception(e)
+            response = flask_app.finalize_request(rv)
+        except Exception as e:
+            response = flask_app.handle_exception(e)
+
+    await send({
+        "type": "http.response.start",
+        "status": response.status_code,
+        "headers": [(name.lower().encode("latin1"), value.encode("latin1")) for name, value in response.headers.items()],
+    })
+    await send({"type": "http.response.body", "body": response.get_data()})
+
+
+async def _read_body(receive) -> bytes:
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return body
+
+
+def _build_environ(scope, body: bytes) -> dict:
+    headers = {}
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin1")
+        if name == "content-length":
+            key = "CONTENT_LENGTH"
+        elif name == "content-type":
+            key = "CONTENT_TYPE"
+        else:
+            key = "HTTP_" + name.upper().replace("-", "_")
+        value = value.decode("latin1")
+        headers[key] = f"{headers[key]},{value}" if key in headers else value
+
+    server_name, server_port = scope.get("server") or ("localhost", 80)
+
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", ""),
+        "PATH_INFO": scope["path"],
+        "QUERY_STRING": scope["query_string"].decode("ascii"),
+        "SERVER_NAME": server_name,
+        "SERVER_PORT": str(server_port),
+        "SERVER_PROTOCOL": f"HTTP/{scope['http_version']}",
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.version": (1, 0),
+        "wsgi.input": BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    environ.update(headers)
+    # The body was read in full, including chunked requests without a Content-Length
+    environ["CONTENT_LENGTH"] = str(len(body))
+
+    if scope.get("client"):
+        environ["REMOTE_ADDR"] = scope["client"][0]
+
+    return environ
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
@@ -4,7 +4,9 @@ from werkzeug.middleware.proxy_fix import ProxyFix
 from flask import Flask, session
 from flask_session import Session
 from src.backend.utils.utils import folders
+from src.backend.utils.sqlite_session import SqliteSessionInterface
 from src.backend.routes import auth, home, health, vitoria, datalia
+from src.backend.rag.chains import check_search_config, warm_up_clients
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -17,8 +19,11 @@ def create_app():
     Este método configura o aplicativo Flask com as seguintes características:
     - Define a chave secreta para sessões.
     - Habilita o uso de HTTPS.
-    - Configura a sessão para ser armazenada no sistema de arquivos e define o tempo de expiração da sessão.
+    - Configura a sessão para ser armazenada no sistema de arquivos ou, com SESSION_BACKEND=sqlite, em um banco
+      SQLite compartilhado pelos workers, e define o tempo de expiração da sessão.
     - Registra blueprints para as diferentes partes do aplicativo, incluindo autenticação, verificação de integridade, e direcionamento para os agentes.
+    - Verifica se o tipo de busca configurado pode ser atendido neste host (ver `check_search_config`).
+    - Pré-aquece os clientes compartilhados de LLM, embeddings e AzureSearch.
 
     Returns:
         Flask: A instância do aplicativo Flask configurada.
@@ -38,7 +43,10 @@ def create_app():
     app.config["SESSION_PERMANENT"] = False
     app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(minutes=10)
 
-    Session(app)
+    if os.getenv("SESSION_BACKEND", "filesystem") == "sqlite":
+        app.session_interface = SqliteSessionInterface.from_app(app)
+    else:
+        Session(app)
     
     # register blueprints
     app.register_blueprint(auth.bp)
@@ -46,6 +54,9 @@ def create_app():
     app.register_blueprint(health.bp)
     app.register_blueprint(vitoria.bp)
     app.register_blueprint(datalia.bp)
+
+    check_search_config(os.getenv("INDEX"))
+    warm_up_clients(os.getenv("INDEX"))
     
     return app
 
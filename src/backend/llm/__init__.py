@@ -1,2 +1,3 @@
 from .azure_llm import create_azure_chat_llm, create_azure_embeddings_llm
-from .aws_llm import create_aws_chat_llm, create_aws_embeddings_llm
\ No newline at end of file
+from .aws_llm import create_aws_chat_llm, create_aws_embeddings_llm
+from .fake_llm import create_fake_chat_llm, create_fake_embeddings_llm
\ No newline at end of file
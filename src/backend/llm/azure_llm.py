@@ -2,6 +2,10 @@ from langchain_openai import AzureChatOpenAI, AzureOpenAIEmbeddings
 import os
 from dotenv import load_dotenv
 from httpx import Client
+from src.backend.utils.rate_limit import embedding_rate_limiter
+from .embedding_cache import CachedEmbeddings, EMBEDDING_CACHE_ENABLED
+from .embedding_batcher import BatchingEmbeddings, EMBEDDING_BATCHING_ENABLED
+from .output_format import OUTPUT_FORMAT
 
 load_dotenv()
 
@@ -10,24 +14,37 @@ api_key = os.getenv('AZURE_OPENAI_API_KEY')
 azure_endpoint = os.getenv('AZURE_OPENAI_ENDPOINT')
 api_version = os.getenv('AZURE_OPENAI_API_VERSION')
 api_type = os.getenv('AZURE_OPENAI_API_TYPE')
+# JSON mode (response_format) needs a deployment and API version that support it
+json_mode = os.getenv('AZURE_OPENAI_JSON_MODE', 'true').lower() == 'true'
 
+CHAT_DEPLOYMENT_NAME = "gpt-35-turbo"
+EMBEDDINGS_DEPLOYMENT_NAME = "text-embedding-ada-002"
 
-def create_azure_chat_llm(temperature=0.5, deployment_name = "gpt-35-turbo"):
+
+def create_azure_chat_llm(temperature=0.5, deployment_name = CHAT_DEPLOYMENT_NAME):
   """
     Cria um modelo de linguagem de chat utilizando as bibliotecas da Azure OpenAI.
 
+    Quando OUTPUT_FORMAT é "json" e AZURE_OPENAI_JSON_MODE está ativo, o modelo é configurado para gerar
+    apenas objetos JSON válidos.
+
     Args:
         temperature (float, opcional): Controla a aleatoriedade da resposta gerada. O padrão é 0.5.
 
     Returns:
         AzureChatOpenAI: Um modelo de linguagem de chat da Azure OpenAI.
     """
+  model_kwargs = {}
+  if OUTPUT_FORMAT == 'json' and json_mode:
+    model_kwargs['response_format'] = {'type': 'json_object'}
+
   llm = AzureChatOpenAI(
     deployment_name=deployment_name,
     azure_endpoint=azure_endpoint,
     openai_api_key=api_key,
     openai_api_version=api_version,
-    temperature=temperature
+    temperature=temperature,
+    model_kwargs=model_kwargs
   )
 
   return llm
@@ -36,15 +53,32 @@ def create_azure_embeddings_llm():
   """
     Cria um modelo de embeddings utilizando as bibliotecas da Azure OpenAI.
 
+    Quando EMBEDDING_CACHE_ENABLED está ativo, o modelo é envolvido por um cache persistente
+    chaveado pelo nome do modelo e pelo SHA-256 do texto.
+
+    Quando EMBEDDING_BATCHING_ENABLED está ativo, as consultas simultâneas que não estão no cache são
+    agrupadas em uma única chamada ao modelo.
+
     Returns:
-        AzureOpenAIEmbeddings: Um modelo de embeddings da Azure OpenAI.
+        Embeddings: Um modelo de embeddings da Azure OpenAI, com ou sem cache e agrupamento.
     """
   embeddings = AzureOpenAIEmbeddings(
-    deployment="text-embedding-ada-002",
+    deployment=EMBEDDINGS_DEPLOYMENT_NAME,
     azure_endpoint=azure_endpoint,
     openai_api_key=api_key,
     openai_api_type=api_type,
     openai_api_version=api_version,
   )
+
+  if EMBEDDING_BATCHING_ENABLED:
+    # Rate limits and retries are applied per batch by the batcher
+    embeddings = BatchingEmbeddings(embeddings)
+
+  if EMBEDDING_CACHE_ENABLED:
+    embeddings = CachedEmbeddings(
+      embeddings,
+      model_name=EMBEDDINGS_DEPLOYMENT_NAME,
+      limiter=None if EMBEDDING_BATCHING_ENABLED else embedding_rate_limiter,
+    )
   
   return embeddings
\ No newline at end of file
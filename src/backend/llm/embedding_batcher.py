@@ -0,0 +1,135 @@
+import os
+import time
+import queue
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional, Tuple
+from langchain_core.embeddings import Embeddings
+from dotenv import load_dotenv
+from loguru import logger
+from src.backend.utils.rate_limit import RateLimiter, call_with_retry, embedding_rate_limiter, estimate_tokens
+
+load_dotenv()
+
+
+EMBEDDING_BATCHING_ENABLED = os.getenv("EMBEDDING_BATCHING_ENABLED", "true").lower() == "true"
+EMBEDDING_QUERY_BATCH_WINDOW_MS = float(os.getenv("EMBEDDING_QUERY_BATCH_WINDOW_MS", "5"))
+EMBEDDING_QUERY_BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_QUERY_BATCH_MAX_SIZE", "16"))
+EMBEDDING_QUERY_BATCH_WORKERS = int(os.getenv("EMBEDDING_QUERY_BATCH_WORKERS", "4"))
+
+
+class BatchingEmbeddings(Embeddings):
+    """
+    Modelo de embeddings que agrupa as consultas feitas ao mesmo tempo em uma única chamada ao modelo.
+
+    Cada `embed_query` entra em uma fila; a primeira consulta de um lote espera até
+    EMBEDDING_QUERY_BATCH_WINDOW_MS milissegundos (ou até EMBEDDING_QUERY_BATCH_MAX_SIZE consultas) por outras,
+    e o lote é enviado ao modelo em um só `embed_documents`, cujos vetores são devolvidos a cada requisição.
+    Consultas repetidas no mesmo lote são enviadas uma única vez. Até EMBEDDING_QUERY_BATCH_WORKERS lotes
+    ficam em andamento ao mesmo tempo.
+
+    As chamadas ao modelo passam pelo limitador de vazão compartilhado de embeddings e são repetidas em caso
+    de erro transitório, de modo que a cota é consumida por lote e não por consulta.
+
+    Args:
+        embeddings (Embeddings): O modelo de embeddings subjacente.
+        window_ms (float, opcional): O tempo máximo de espera por outras consultas, em milissegundos.
+        max_batch_size (int, opcional): O número máximo de consultas por lote.
+        workers (int, opcional): O número máximo de lotes em andamento.
+        limiter (RateLimiter, opcional): O limitador de vazão das chamadas ao modelo.
+    """
+
+    def __init__(self, embeddings: Embeddings, window_ms: float = EMBEDDING_QUERY_BATCH_WINDOW_MS,
+                 max_batch_size: int = EMBEDDING_QUERY_BATCH_MAX_SIZE, workers: int = EMBEDDING_QUERY_BATCH_WORKERS,
+                 limiter: Optional[RateLimiter] = embedding_rate_limiter) -> None:
+        self.embeddings = embeddings
+        self.window = window_ms / 1000
+        self.max_batch_size = max(1, max_batch_size)
+        self.limiter = limiter
+        self._queue: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="embedding-batch")
+        self._collector: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Gera os embeddings dos textos em uma única chamada ao modelo (já são um lote).
+
+        Args:
+            texts (List[str]): Os textos a serem convertidos em vetores.
+
+        Returns:
+            List[List[float]]: Os vetores, na mesma ordem dos textos.
+        """
+
+        return call_with_retry(self.embeddings.embed_documents, texts,
+                               limiter=self.limiter, tokens=estimate_tokens(texts))
+
+    def embed_query(self, text: str) -> List[float]:
+        """
+        Gera o embedding de uma consulta, agrupando-a com as consultas simultâneas.
+
+        Args:
+            text (str): A consulta a ser convertida em vetor.
+
+        Returns:
+            List[float]: O vetor da consulta.
+        """
+
+        return self._submit(text).result()
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """
+        Versão assíncrona de `embed_query`: a consulta é aguardada sem bloquear o event loop.
+
+        Args:
+            text (str): A consulta a ser convertida em vetor.
+
+        Returns:
+            List[float]: O vetor da consulta.
+        """
+
+        return await asyncio.wrap_future(self._submit(text))
+
+    def _submit(self, text: str) -> Future:
+        future: Future = Future()
+        self._queue.put((text, future))
+
+        if self._collector is None:
+            with self._lock:
+                if self._collector is None:
+                    self._collector = threading.Thread(target=self._collect, name="embedding-collector", daemon=True)
+                    self._collector.start()
+
+        return future
+
+    def _collect(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            self._executor.submit(self._flush, batch)
+
+    def _flush(self, batch: List[Tuple[str, Future]]) -> None:
+        texts = list(dict.fromkeys(text for text, _ in batch))
+
+        try:
+            vectors = dict(zip(texts, self.embed_documents(texts)))
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        logger.debug(f"Embedded {len(batch)} queries in one request ({len(texts)} distinct)")
+        for text, future in batch:
+            future.set_result(vectors[text])
@@ -0,0 +1,205 @@
+import os
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from langchain_core.embeddings import Embeddings
+from dotenv import load_dotenv
+from loguru import logger
+from src.backend.utils.utils import folders
+from src.backend.utils.rate_limit import RateLimiter, call_with_retry, acall_with_retry, embedding_rate_limiter, estimate_tokens
+
+load_dotenv()
+
+
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", os.path.join(folders.CACHE, "embeddings.sqlite3"))
+EMBEDDING_CACHE_MEMORY_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MEMORY_ENTRIES", "10000"))
+
+
+def text_hash(text: str) -> str:
+    """
+    Calcula o SHA-256 do texto, usado como chave do cache de embeddings.
+
+    Args:
+        text (str): O texto a ser identificado.
+
+    Returns:
+        str: O hash hexadecimal do texto.
+    """
+
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Modelo de embeddings com cache persistente, chaveado pelo nome do modelo e pelo SHA-256 do texto.
+
+    Os vetores são gravados como float32 compactos em um banco SQLite (modo WAL, seguro entre processos)
+    e os mais usados ficam também em um LRU em memória. Apenas os textos ausentes do cache são enviados
+    ao modelo subjacente, de modo que reingerir um corpus inalterado ou repetir perguntas não gera
+    novas chamadas de embedding. Essas chamadas passam pelo limitador de vazão compartilhado de embeddings
+    (EMBEDDING_RPM/EMBEDDING_TPM) e são repetidas em caso de erro transitório.
+
+    Args:
+        embeddings (Embeddings): O modelo de embeddings subjacente.
+        model_name (str): O nome do modelo, que compõe a chave do cache.
+        path (str, opcional): O caminho do arquivo SQLite. O padrão é EMBEDDING_CACHE_PATH.
+        max_memory_entries (int, opcional): O número máximo de vetores mantidos em memória.
+        limiter (RateLimiter, opcional): O limitador de vazão das chamadas ao modelo. None quando o modelo
+            subjacente já aplica os limites (ex.: `BatchingEmbeddings`).
+    """
+
+    def __init__(self, embeddings: Embeddings, model_name: str, path: str = EMBEDDING_CACHE_PATH,
+                 max_memory_entries: int = EMBEDDING_CACHE_MEMORY_ENTRIES,
+                 limiter: Optional[RateLimiter] = embedding_rate_limiter) -> None:
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.limiter = limiter
+        self.path = path
+        self.max_memory_entries = max_memory_entries
+        self._memory: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Gera os embeddings dos textos, consultando o cache antes do modelo.
+
+        Args:
+            texts (List[str]): Os textos a serem convertidos em vetores.
+
+        Returns:
+            List[List[float]]: Os vetores, na mesma ordem dos textos.
+        """
+
+        keys = [text_hash(text) for text in texts]
+        found = self._get_many(keys)
+
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                missing[key] = text
+
+        if missing:
+            pending = list(missing.values())
+            vectors = self._call(self.embeddings.embed_documents, pending, pending)
+            computed = dict(zip(missing.keys(), vectors))
+            self._put_many(computed)
+            found.update({key: np.asarray(vector, dtype=np.float32) for key, vector in computed.items()})
+            logger.debug(f"Embedding cache: {len(texts) - len(missing)} hits, {len(missing)} misses")
+
+        return [found[key].tolist() for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        """
+        Gera o embedding de uma consulta, consultando o cache antes do modelo.
+
+        Args:
+            text (str): A consulta a ser convertida em vetor.
+
+        Returns:
+            List[float]: O vetor da consulta.
+        """
+
+        key = text_hash(text)
+        found = self._get_many([key])
+
+        if key not in found:
+            vector = self._call(self.embeddings.embed_query, text, [text])
+            self._put_many({key: vector})
+            return list(vector)
+
+        return found[key].tolist()
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """
+        Versão assíncrona de `embed_query`: a chamada ao modelo é aguardada e o cache é lido e gravado em uma thread.
+
+        Args:
+            text (str): A consulta a ser convertida em vetor.
+
+        Returns:
+            List[float]: O vetor da consulta.
+        """
+
+        key = text_hash(text)
+        # SQLite reads and writes run outside the event loop
+        found = await asyncio.to_thread(self._get_many, [key])
+
+        if key not in found:
+            if self.limiter is None:
+                vector = await self.embeddings.aembed_query(text)
+            else:
+                vector = await acall_with_retry(self.embeddings.aembed_query, text,
+                                                limiter=self.limiter, tokens=estimate_tokens([text]))
+            await asyncio.to_thread(self._put_many, {key: vector})
+            return list(vector)
+
+        return found[key].tolist()
+
+    def _call(self, fn, argument, texts: List[str]):
+        if self.limiter is None:
+            return fn(argument)
+        return call_with_retry(fn, argument, limiter=self.limiter, tokens=estimate_tokens(texts))
+
+    def _get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+
+            pending = list({key for key in keys if key not in found})
+            connection = self._connect()
+            # Keep well below SQLite's default limit of bound parameters
+            for i in range(0, len(pending), 500):
+                batch = pending[i:i + 500]
+                rows = connection.execute(
+                    f"SELECT hash, vector FROM embeddings WHERE model = ? AND hash IN ({','.join('?' * len(batch))})",
+                    [self.model_name, *batch],
+                ).fetchall()
+                for key, blob in rows:
+                    vector = np.frombuffer(blob, dtype=np.float32)
+                    found[key] = vector
+                    self._remember(key, vector)
+
+        return found
+
+    def _put_many(self, vectors: Dict[str, List[float]]) -> None:
+        with self._lock:
+            rows = []
+            for key, vector in vectors.items():
+                array = np.asarray(vector, dtype=np.float32)
+                rows.append((self.model_name, key, array.tobytes()))
+                self._remember(key, array)
+
+            connection = self._connect()
+            with connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO embeddings (model, hash, vector) VALUES (?, ?, ?)", rows
+                )
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "model TEXT NOT NULL, hash TEXT NOT NULL, vector BLOB NOT NULL, "
+                "PRIMARY KEY (model, hash)) WITHOUT ROWID"
+            )
+            self._connection = connection
+        return self._connection
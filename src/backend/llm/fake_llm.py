@@ -0,0 +1,41 @@
+from typing import List, Optional
+from langchain_community.chat_models.fake import FakeListChatModel
+from langchain_community.embeddings import DeterministicFakeEmbedding
+from .output_format import format_output
+
+
+# In the output format the agents ask for (OUTPUT_FORMAT)
+DEFAULT_FAKE_RESPONSE = format_output(
+    resposta="Esta é uma resposta de teste.",
+    pensamento="Resposta gerada pelo provedor FAKE para testes locais.",
+)
+
+
+def create_fake_chat_llm(responses: Optional[List[str]] = None):
+  """
+    Cria um modelo de chat local e determinístico, sem chamadas de rede, para testes e desenvolvimento.
+
+    Args:
+        responses (List[str], opcional): As respostas devolvidas em sequência pelo modelo. O padrão é uma resposta
+            no formato esperado pelos agentes.
+
+    Returns:
+        FakeListChatModel: Um modelo de chat que devolve as respostas configuradas.
+    """
+  llm = FakeListChatModel(responses=responses or [DEFAULT_FAKE_RESPONSE])
+
+  return llm
+
+def create_fake_embeddings_llm(size: int = 1536):
+  """
+    Cria um modelo de embeddings local e determinístico: o mesmo texto gera sempre o mesmo vetor.
+
+    Args:
+        size (int, opcional): A dimensão dos vetores. O padrão é 1536, igual ao text-embedding-ada-002.
+
+    Returns:
+        DeterministicFakeEmbedding: Um modelo de embeddings sem chamadas de rede.
+    """
+  embeddings = DeterministicFakeEmbedding(size=size)
+
+  return embeddings
@@ -1,6 +1,37 @@
 import os
+from typing import Callable, Dict
 from .azure_llm import create_azure_chat_llm, create_azure_embeddings_llm
 from .aws_llm import create_aws_chat_llm, create_aws_embeddings_llm
+from .fake_llm import create_fake_chat_llm, create_fake_embeddings_llm
+from src.backend.utils.client_pool import client_pool
+
+
+_PROVIDERS: Dict[str, Dict[str, Callable]] = {}
+
+
+def register_provider(name: str, chat_factory: Callable, embeddings_factory: Callable) -> None:
+    """
+    Registra um provedor de LLM com as factories de chat e de embeddings.
+
+    As factories só são chamadas quando o provedor é usado pela primeira vez, e o resultado
+    é memorizado no pool de clientes do processo.
+
+    Args:
+        name (str): O nome do provedor (ex.: 'AZURE', 'AWS', 'FAKE').
+        chat_factory (Callable): Função sem argumentos obrigatórios que cria o modelo de chat.
+        embeddings_factory (Callable): Função sem argumentos obrigatórios que cria o modelo de embeddings.
+    """
+
+    _PROVIDERS[name] = {'chat': chat_factory, 'embeddings': embeddings_factory}
+
+    # A re-registered provider must not keep serving the previous instances
+    client_pool.invalidate((name, 'chat'))
+    client_pool.invalidate((name, 'embeddings'))
+
+
+register_provider('AZURE', create_azure_chat_llm, create_azure_embeddings_llm)
+register_provider('AWS', create_aws_chat_llm, create_aws_embeddings_llm)
+register_provider('FAKE', create_fake_chat_llm, create_fake_embeddings_llm)
 
 
 class LLM:
@@ -8,49 +39,55 @@ class LLM:
     Classe para criar modelos de linguagem de chat e embeddings.
 
     Args:
-        provider (str, opcional): O provedor de serviço para o LLM ('AZURE' ou 'AWS'). O padrão é 'AZURE'.
+        provider (str, opcional): O provedor de serviço para o LLM ('AZURE', 'AWS', 'FAKE' ou outro registrado
+            com `register_provider`). O padrão é o valor da variável de ambiente LLM_PROVIDER ou 'AZURE'.
 
     Métodos:
         create_chat_llm(): Cria um modelo de linguagem de chat baseado no provedor especificado.
         create_embeddings_llm(): Cria um modelo de embeddings baseado no provedor especificado.
     """
 
-    def __init__(self, provider='AZURE') -> None:
+    def __init__(self, provider=None) -> None:
         """
         Inicializa a classe LLM com o provedor especificado.
 
         Args:
-            provider (str, opcional): O provedor de serviço para o LLM ('AZURE' ou 'AWS'). O padrão é 'AZURE'.
+            provider (str, opcional): O provedor de serviço para o LLM. O padrão é o valor da variável
+                de ambiente LLM_PROVIDER ou 'AZURE'.
+
+        Raises:
+            ValueError: Se o provedor não estiver registrado.
         """
 
-        self.provider = provider
+        self.provider = provider or os.getenv('LLM_PROVIDER', 'AZURE')
+
+        if self.provider not in _PROVIDERS:
+            raise ValueError(f"Unknown LLM provider: {self.provider}")
 
     def create_chat_llm(self):
         """
         Cria um modelo de linguagem de chat baseado no provedor especificado.
 
+        A instância é criada uma única vez por processo e reaproveitada pelas requisições seguintes.
+
         Returns:
             callable: Um modelo de linguagem de chat.
         """
 
-        llms = {
-            'AZURE': create_azure_chat_llm(),
-            'AWS': create_aws_chat_llm()
-            }
-
-        return llms[self.provider]
+        return self._get_or_create('chat')
 
     def create_embeddings_llm(self):
         """
         Cria um modelo de embeddings baseado no provedor especificado.
 
+        A instância é criada uma única vez por processo e reaproveitada pelas requisições seguintes.
+
         Returns:
             callable: Um modelo de embeddings.
         """
 
-        embeddings = {
-            'AZURE': create_azure_embeddings_llm(),
-            'AWS': create_aws_embeddings_llm()
-            }
+        return self._get_or_create('embeddings')
 
-        return embeddings[self.provider]
+    def _get_or_create(self, kind: str):
+        factory = _PROVIDERS[self.provider][kind]
+        return client_pool.get_or_create((self.provider, kind), factory)
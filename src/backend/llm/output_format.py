@@ -0,0 +1,29 @@
+import os
+import json
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+# "json" asks the model for {"pensamento": ..., "resposta": ...}; "sections" for the ### delimiters
+OUTPUT_FORMAT = os.getenv("OUTPUT_FORMAT", "json").lower()
+
+PENSAMENTO_MARKER = "###PENSAMENTO###"
+RESPOSTA_MARKER = "###RESPOSTA###"
+
+
+def format_output(resposta: str, pensamento: str) -> str:
+    """
+    Escreve uma resposta no formato pedido ao modelo (OUTPUT_FORMAT), para registro no histórico da conversa.
+
+    Args:
+        resposta (str): A resposta.
+        pensamento (str): O pensamento.
+
+    Returns:
+        str: O texto no formato que o modelo teria gerado.
+    """
+
+    if OUTPUT_FORMAT == "json":
+        return json.dumps({"pensamento": pensamento, "resposta": resposta}, ensure_ascii=False)
+    return f"{PENSAMENTO_MARKER}{pensamento}{RESPOSTA_MARKER}{resposta}"
@@ -1,81 +1,332 @@
 from src.backend.vector_store import VectorDatabase
+from src.backend.vector_store.filters import SearchFilters
 from src.backend.llm.llm import LLM
+from src.backend.rag.semantic_cache import semantic_cache, SEMANTIC_CACHE_ENABLED
+from src.backend.rag.context_builder import build_context
+from src.backend.rag.reranker import RERANK_ENABLED, RetrievalConfig, get_retrieval_config, rerank
+from src.backend.rag.prompts import get_prompt
 from langchain.memory import ConversationBufferWindowMemory
-from langchain.chains import ConversationChain
-import re
+from langchain.docstore.document import Document
+from langchain_core.messages import BaseMessage
+from src.backend.rag.output_parser import create_stream_parser, format_output, parse_output, PENSAMENTO_ERROR
+from typing import Iterator, List, Optional, Tuple
 from loguru import logger
+import numpy as np
+import asyncio
+import os
 
 
-def run_query_on_docs(query: str, history: ConversationBufferWindowMemory, index_name: str) -> tuple:
+# "hybrid" (Azure Search), "local_hybrid" (local BM25 + vectors) or "similarity"
+SEARCH_TYPE = os.getenv("SEARCH_TYPE", "hybrid")
+
+
+def check_search_config(index_name: str) -> None:
+    """
+    Verifica, na inicialização da aplicação, se o tipo de busca configurado pode ser atendido neste host.
+
+    Com SEARCH_TYPE="local_hybrid" as consultas usam a cópia local do índice, gravada pela ingestão
+    (LOCAL_SEARCH_MIRROR) no host em que ela roda. Sem essa cópia, todas as consultas falhariam.
+
+    Args:
+        index_name (str): O nome do índice que será consultado pelos agentes.
+
+    Raises:
+        RuntimeError: Se SEARCH_TYPE for "local_hybrid" e não houver cópia local do índice.
+    """
+
+    if SEARCH_TYPE == "local_hybrid" and index_name and not VectorDatabase().has_local_mirror(index_name):
+        raise RuntimeError(f"SEARCH_TYPE=local_hybrid requires the local copy of {index_name} on this host: "
+                           f"copy LOCAL_VECTOR_STORE_DIR from the ingestion host or run main_rag here")
+
+
+def warm_up_clients(index_name: str) -> None:
+    """
+    Cria antecipadamente os clientes compartilhados usados pelas consultas (modelo de chat, embeddings e AzureSearch).
+
+    Chamado na inicialização da aplicação para que a primeira consulta de cada worker não pague
+    o custo de construção dos clientes nem dos handshakes TLS.
+
+    Args:
+        index_name (str): O nome do índice que será consultado pelos agentes.
+    """
+
+    try:
+        LLM().create_chat_llm()
+        if index_name:
+            VectorDatabase().get_vector_store(index_name)
+        logger.info("Shared clients warmed up")
+    except Exception as e:
+        logger.error(f"warm_up_clients: An error occurred: {e}")
+
+
+def _history_messages(history: ConversationBufferWindowMemory) -> List[BaseMessage]:
+    return history.load_memory_variables({})[history.memory_key]
+
+
+def _save_exchange(history: ConversationBufferWindowMemory, query: str, completion: str) -> None:
+    # Only the question is kept in the history, not the retrieved context sent with it
+    history.save_context({"input": query}, {"response": completion})
+
+
+def _cache_scope(agent: str, filters: Optional[SearchFilters]) -> str:
+    # Answers of different agents, or retrieved under different filters, are cached separately
+    return f"{agent}|{filters.cache_key() if filters is not None else ''}"
+
+
+def _use_cache(history: ConversationBufferWindowMemory) -> bool:
+    # A follow-up question depends on the conversation, so only opening questions are looked up and stored
+    return SEMANTIC_CACHE_ENABLED and not history.chat_memory.messages
+
+
+def _cached_answer(vector_db: VectorDatabase, query: str, history: ConversationBufferWindowMemory, index_name: str,
+                   agent: str, filters: Optional[SearchFilters], query_vector: Optional[List[float]] = None
+                   ) -> Optional[Tuple[str, str]]:
+    # Looks the question up in the agent's scope and records a hit in the history
+    cached = semantic_cache.lookup(index_name, query, query_vector, scope=_cache_scope(agent, filters),
+                                   version=vector_db.resolve_index_name(index_name))
+    if cached is not None:
+        logger.info("Semantic cache hit")
+        history.save_context({"input": query}, {"response": format_output(*cached)})
+    return cached
+
+
+def _lookup_cached_answer(vector_db: VectorDatabase, query: str, history: ConversationBufferWindowMemory,
+                          index_name: str, agent: str, filters: Optional[SearchFilters] = None
+                          ) -> Tuple[Optional[Tuple[str, str]], Optional[List[float]]]:
+    """
+    Procura a pergunta no cache semântico e, em caso de acerto, registra a troca no histórico.
+
+    O cache é separado por agente e por filtros, e só é consultado na primeira pergunta da conversa.
+
+    Returns:
+        Tuple: A resposta em cache (ou None) e o embedding da pergunta, quando calculado.
+    """
+
+    if not _use_cache(history):
+        return None, None
+
+    cached = _cached_answer(vector_db, query, history, index_name, agent, filters)
+    if cached is not None:
+        return cached, None
+
+    query_vector = vector_db.embed_query(query, index_name)
+    return _cached_answer(vector_db, query, history, index_name, agent, filters, query_vector), query_vector
+
+
+async def _alookup_cached_answer(vector_db: VectorDatabase, query: str, history: ConversationBufferWindowMemory,
+                                 index_name: str, agent: str, filters: Optional[SearchFilters] = None
+                                 ) -> Tuple[Optional[Tuple[str, str]], Optional[List[float]]]:
+    """
+    Versão assíncrona de `_lookup_cached_answer`. As leituras e gravações do histórico rodam em uma thread.
+    """
+
+    if not await asyncio.to_thread(_use_cache, history):
+        return None, None
+
+    cached = await asyncio.to_thread(_cached_answer, vector_db, query, history, index_name, agent, filters)
+    if cached is not None:
+        return cached, None
+
+    query_vector = await vector_db.aembed_query(query, index_name)
+    cached = await asyncio.to_thread(_cached_answer, vector_db, query, history, index_name, agent, filters,
+                                     query_vector)
+    return cached, query_vector
+
+
+def _candidate_count(config: RetrievalConfig) -> int:
+    return config.candidates if RERANK_ENABLED else config.top_n
+
+
+def _rerank_vectors(vector_db: VectorDatabase, index_name: str, docs: List[Document], config: RetrievalConfig
+                    ) -> Optional[np.ndarray]:
+    # Vectors already stored in the index, if any: the candidates are not embedded on the request path
+    if not RERANK_ENABLED or len(docs) <= config.top_n or not config.vector_weight:
+        return None
+    return vector_db.get_document_vectors(index_name, docs)
+
+
+def _build_context(query: str, docs: List[Document], config: RetrievalConfig, query_vector: Optional[List[float]],
+                   doc_vectors: Optional[np.ndarray]) -> str:
+    if RERANK_ENABLED and len(docs) > config.top_n:
+        docs = rerank(query, docs, config, query_vector, doc_vectors)
+    return build_context(docs).text
+
+
+def _retrieve_context(vector_db: VectorDatabase, query: str, index_name: str,
+                      query_vector: Optional[List[float]] = None, filters: Optional[SearchFilters] = None) -> str:
+    config = get_retrieval_config(index_name)
+    docs = vector_db.get_relevant_documents(query, index_name, search_type=SEARCH_TYPE, k=_candidate_count(config),
+                                            filters=filters)
+    logger.info(f"{len(docs)} Documents Retrieved")
+
+    doc_vectors = _rerank_vectors(vector_db, index_name, docs, config)
+    if doc_vectors is not None and query_vector is None:
+        try:
+            query_vector = vector_db.embed_query(query, index_name)
+        except Exception as e:
+            # The other signals still rank the candidates
+            logger.warning(f"Re-ranking without embeddings: {e}")
+            doc_vectors = None
+
+    return _build_context(query, docs, config, query_vector, doc_vectors)
+
+
+async def _aretrieve_context(vector_db: VectorDatabase, query: str, index_name: str,
+                             query_vector: Optional[List[float]] = None, filters: Optional[SearchFilters] = None) -> str:
+    config = get_retrieval_config(index_name)
+    docs = await vector_db.aget_relevant_documents(query, index_name, search_type=SEARCH_TYPE,
+                                                   k=_candidate_count(config), filters=filters)
+    logger.info(f"{len(docs)} Documents Retrieved")
+
+    doc_vectors = await asyncio.to_thread(_rerank_vectors, vector_db, index_name, docs, config)
+    if doc_vectors is not None and query_vector is None:
+        try:
+            query_vector = await vector_db.aembed_query(query, index_name)
+        except Exception as e:
+            # The other signals still rank the candidates
+            logger.warning(f"Re-ranking without embeddings: {e}")
+            doc_vectors = None
+
+    return _build_context(query, docs, config, query_vector, doc_vectors)
+
+
+def _build_messages(query: str, context: str, history: ConversationBufferWindowMemory, agent: str) -> List[BaseMessage]:
+    return get_prompt(agent).format_messages(query, context, _history_messages(history))
+
+
+def _finish_answer(vector_db: VectorDatabase, query: str, history: ConversationBufferWindowMemory, index_name: str,
+                   agent: str, filters: Optional[SearchFilters], query_vector: Optional[List[float]], completion: str,
+                   answer: Tuple[str, str]) -> Tuple[str, str]:
+    # Records the exchange and caches a well-formed answer to an opening question
+    _save_exchange(history, query, completion)
+    resposta, pensamento = answer
+    if query_vector is not None and pensamento != PENSAMENTO_ERROR:
+        semantic_cache.store(index_name, query, query_vector, resposta, pensamento, scope=_cache_scope(agent, filters),
+                             version=vector_db.resolve_index_name(index_name))
+    return (resposta, pensamento)
+
+
+def run_query_on_docs(query: str, history: ConversationBufferWindowMemory, index_name: str, agent: str = "vitoria",
+                      filters: Optional[SearchFilters] = None) -> tuple:
     """
     Executa uma consulta nos vetores obtidos a partir do AIDA, gera uma resposta estruturada e explica o pensamento por trás da resposta.
 
+    Perguntas equivalentes a uma já respondida no mesmo índice, pelo mesmo agente e com os mesmos filtros, são
+    atendidas pelo cache semântico, sem busca no AzureSearch nem chamada ao modelo de chat. Perguntas de
+    seguimento, que dependem do histórico da conversa, não passam pelo cache.
+
     Args:
         query (str): A pergunta feita pelo usuário.
         history (ConversationBufferWindowMemory): O histórico da conversa para manter o contexto.
         index_name (str): O nome do índice onde os documentos serão buscados.
+        agent (str, opcional): O agente cujo template de prompt é usado. O padrão é "vitoria".
+        filters (SearchFilters, opcional): Restringe a busca (ex.: à área escolhida pelo usuário).
 
     Returns:
         tuple: Um tupla contendo a resposta e o pensamento por trás da resposta.
     """
 
-    vector_db = VectorDatabase(provider="AZURE")
-    docs = vector_db.get_relevant_documents(query, index_name, search_type="hybrid")
+    vector_db = VectorDatabase()
 
-    logger.info(f"{len(docs)} Documents Retrieved")
+    cached, query_vector = _lookup_cached_answer(vector_db, query, history, index_name, agent, filters)
+    if cached is not None:
+        return cached
 
-    context = ' '.join([doc.page_content for doc in docs])
+    context = _retrieve_context(vector_db, query, index_name, query_vector, filters)
+    messages = _build_messages(query, context, history, agent)
 
-    prompt_string = (
-        f"""
-        Você é um agente de inteligência artificial com o nome de Judite, e capacitado para atuar nos setores de Talent e Recursos Humanos. 
-        Seus conhecimentos específicos sobre o assunto estão no contexto abaixo entre ***.
-        Você trabalha na EY, também chamada de Ernst & Young.
-        O usuário também trabalha na EY e irá te fazer uma pergunta. 
-        Seu objetivo é ler essa pergunta, explicar seu pensamento e retornar uma resposta clara e abrangente para o usuário.  
-        Caso sejam necessárias informações adicionais, pergunte ao usuário. 
-        Caso você não saiba a resposta, não invente, apenas diga que não sabe. 
-        Responda apenas com informações obtidas através do contexto.
-        Para explicar o pensamento de forma clara, detalhe o processo de raciocínio lógico seguido para conectar a pergunta com as informações no contexto.
-        A sua resposta precisa ter sempre duas seções, PENSAMENTO e RESPOSTA, e deve ser sempre apresentada exclusivamente no seguinte formato:
+    models = LLM()
+    llm = models.create_chat_llm()
 
-        "
-        ###PENSAMENTO###
+    completion = llm.invoke(messages).content
 
+    return _finish_answer(vector_db, query, history, index_name, agent, filters, query_vector, completion,
+                          parse_output(completion))
 
-        ###RESPOSTA###
-        "
 
-        Traga as respostas sempre no formato demonstrado acima, com PENSAMENTO e RESPOSTA sinalizados por ###.        
-        Instruções específicas para as perguntas do usuário:
-        - Se a pergunta contiver "quem", forneça informações sobre a(s) pessoa(s) envolvida(s).
-        - Se a pergunta contiver "quais", liste os itens relevantes mencionados no contexto.
-        - Se a pergunta contiver "quanto", enumere os resultados e forneça números ou quantidades específicas. Nesse caso, deixe para explicar mais no pensamento e seja econômico na resposta.
-        - Lembre-se sempre de filtrar as informações de acordo com o que o usuário informou.
-        - Utilize linguagem característica do setor de talent/recursos humanos.
+async def arun_query_on_docs(query: str, history: ConversationBufferWindowMemory, index_name: str, agent: str = "vitoria",
+                             filters: Optional[SearchFilters] = None) -> tuple:
+    """
+    Versão assíncrona de `run_query_on_docs`.
 
-        A pergunta feita pelo usuário é: {query}
+    A busca e a geração da resposta são aguardadas sem bloquear o event loop, permitindo que um único
+    processo mantenha muitas consultas em andamento enquanto espera o AzureSearch e o Azure OpenAI.
+    As etapas que leem ou gravam arquivos locais (histórico da conversa, cache de embeddings, cópia local do
+    índice) rodam em threads.
 
-        ***CONTEXTO: {context}***
-        """
-    )
+    Args:
+        query (str): A pergunta feita pelo usuário.
+        history (ConversationBufferWindowMemory): O histórico da conversa para manter o contexto.
+        index_name (str): O nome do índice onde os documentos serão buscados.
+        agent (str, opcional): O agente cujo template de prompt é usado. O padrão é "vitoria".
+        filters (SearchFilters, opcional): Restringe a busca (ex.: à área escolhida pelo usuário).
+
+    Returns:
+        tuple: Um tupla contendo a resposta e o pensamento por trás da resposta.
+    """
+
+    vector_db = VectorDatabase()
+
+    cached, query_vector = await _alookup_cached_answer(vector_db, query, history, index_name, agent, filters)
+    if cached is not None:
+        return cached
+
+    context = await _aretrieve_context(vector_db, query, index_name, query_vector, filters)
+    messages = await asyncio.to_thread(_build_messages, query, context, history, agent)
 
     models = LLM()
     llm = models.create_chat_llm()
-    
-    conversation = ConversationChain(llm=llm, verbose=True, memory=history)
 
-    response = conversation.invoke(prompt_string)
+    completion = (await llm.ainvoke(messages)).content
 
-    response_text = response['response'].replace('"', '').replace('\n', '')
+    return await asyncio.to_thread(_finish_answer, vector_db, query, history, index_name, agent, filters, query_vector,
+                                   completion, parse_output(completion))
 
-    match = re.search(r'###PENSAMENTO###(.*?)###RESPOSTA###(.*)', response_text, re.DOTALL)
-    
-    if match:
-        pensamento = match.group(1).strip()
-        resposta = match.group(2).strip()
-    else:
-        pensamento = "Erro: Não foi possível extrair o pensamento da resposta."
-        resposta = "Erro: A resposta não contém os delimitadores esperados."
 
-    return (resposta, pensamento)
+def stream_query_on_docs(query: str, history: ConversationBufferWindowMemory, index_name: str, agent: str = "vitoria",
+                         filters: Optional[SearchFilters] = None) -> Iterator[Tuple[str, str]]:
+    """
+    Executa a mesma consulta de `run_query_on_docs`, repassando os tokens à medida que o modelo os gera.
+
+    O texto é separado incrementalmente nas seções PENSAMENTO e RESPOSTA. Ao final da geração a troca
+    é registrada no histórico e um evento "done" é emitido com a resposta e o pensamento completos.
+
+    Args:
+        query (str): A pergunta feita pelo usuário.
+        history (ConversationBufferWindowMemory): O histórico da conversa para manter o contexto.
+        index_name (str): O nome do índice onde os documentos serão buscados.
+        agent (str, opcional): O agente cujo template de prompt é usado. O padrão é "vitoria".
+        filters (SearchFilters, opcional): Restringe a busca (ex.: à área escolhida pelo usuário).
+
+    Yields:
+        Tuple[str, str]: Pares (evento, texto), em que o evento é "pensamento", "resposta" ou "done".
+        No evento "done" o texto é a tupla (resposta, pensamento).
+    """
+
+    vector_db = VectorDatabase()
+
+    cached, query_vector = _lookup_cached_answer(vector_db, query, history, index_name, agent, filters)
+    if cached is not None:
+        resposta, pensamento = cached
+        yield ("pensamento", pensamento)
+        yield ("resposta", resposta)
+        yield ("done", cached)
+        return
+
+    context = _retrieve_context(vector_db, query, index_name, query_vector, filters)
+    messages = _build_messages(query, context, history, agent)
+
+    models = LLM()
+    llm = models.create_chat_llm()
+
+    parser = create_stream_parser()
+    completion = ""
+
+    for chunk in llm.stream(messages):
+        completion += chunk.content
+        yield from parser.feed(chunk.content)
+
+    yield from parser.close()
+
+    yield ("done", _finish_answer(vector_db, query, history, index_name, agent, filters, query_vector, completion,
+                                  parser.result()))
@@ -1,6 +1,8 @@
-from langchain.text_splitter import TokenTextSplitter, RecursiveCharacterTextSplitter
+from langchain.text_splitter import RecursiveCharacterTextSplitter
 from typing import List, Union
 from langchain.docstore.document import Document
+from src.backend.rag.token_chunker import split_documents_on_tokens
+from src.backend.rag.semantic_chunker import iter_semantic_chunks
 
 
 def create_chunks(documents: List[Document], chunk_method, chunk_size=500, chunk_overlap=100) -> Union[str, List[Document]]:
@@ -9,7 +11,7 @@ def create_chunks(documents: List[Document], chunk_method, chunk_size=500, chunk
 
     Args:
         documents (List[Document]): A lista de documentos a serem fragmentados.
-        chunk_method (str): O método de fragmentação a ser usado ('token' ou 'recursive').
+        chunk_method (str): O método de fragmentação a ser usado ('token', 'recursive' ou 'semantic').
         chunk_size (int, opcional): O tamanho de cada fragmento em caracteres ou tokens. O padrão é 500.
         chunk_overlap (int, opcional): O número de caracteres ou tokens que cada fragmento deve sobrepor com o próximo. O padrão é 100.
 
@@ -18,10 +20,11 @@ def create_chunks(documents: List[Document], chunk_method, chunk_size=500, chunk
     """
 
     if chunk_method == 'token':
-      text_splitter = TokenTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap,
-      )  
+      # Encodes each document once, in parallel threads, and adds token_count to the chunks
+      return split_documents_on_tokens(documents, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    elif chunk_method == 'semantic':
+      # Splits on headings and paragraphs; adds page span, section, char offsets and chunk_id to the chunks
+      return list(iter_semantic_chunks(documents, chunk_size=chunk_size, chunk_overlap=chunk_overlap))
     elif chunk_method == 'recursive':
       text_splitter = RecursiveCharacterTextSplitter(
         chunk_size=chunk_size,
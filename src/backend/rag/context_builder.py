@@ -0,0 +1,195 @@
+import os
+import re
+from functools import lru_cache
+from typing import List, NamedTuple, Optional
+from dotenv import load_dotenv
+from loguru import logger
+from langchain.docstore.document import Document
+from src.backend.rag.token_chunker import CHUNK_TOKEN_ENCODING
+
+load_dotenv()
+
+
+# Maximum number of tokens of retrieved content sent to the model per query
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
+CONTEXT_TOKEN_ENCODING = os.getenv("CONTEXT_TOKEN_ENCODING", "cl100k_base")
+# A document cut by the budget is only kept if at least this many of its tokens fit
+CONTEXT_MIN_PARTIAL_TOKENS = int(os.getenv("CONTEXT_MIN_PARTIAL_TOKENS", "64"))
+# Shorter common spans between chunks are considered coincidence, not overlap
+CONTEXT_MIN_OVERLAP_CHARS = 20
+CONTEXT_SEPARATOR = "\n\n"
+# Chunks carry their token_count when they were cut with the same tokenizer
+REUSE_CHUNK_TOKEN_COUNT = CHUNK_TOKEN_ENCODING == CONTEXT_TOKEN_ENCODING
+
+SPACES = re.compile(r"[ \t\f\v\u00a0]+")
+BLANK_LINES = re.compile(r"\s*\n\s*\n\s*")
+
+
+class BuiltContext(NamedTuple):
+    """
+    Contexto montado para o prompt.
+    """
+
+    text: str
+    tokens: int
+    documents: int
+    truncated: bool
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(name: str = CONTEXT_TOKEN_ENCODING):
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(name)
+    except Exception as e:
+        # Without the tokenizer (ex.: offline), counts fall back to ~4 characters per token
+        logger.warning(f"Could not load the tokenizer {name}, token counts will be estimated: {e}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """
+    Conta os tokens de um texto com o tokenizador do modelo (tiktoken).
+
+    Args:
+        text (str): O texto.
+
+    Returns:
+        int: O número de tokens.
+    """
+
+    encoding = _get_encoding()
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode_ordinary(text))
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """
+    Corta um texto para que tenha no máximo `max_tokens` tokens.
+
+    Args:
+        text (str): O texto.
+        max_tokens (int): O número máximo de tokens.
+
+    Returns:
+        str: O texto cortado.
+    """
+
+    encoding = _get_encoding()
+    if encoding is None:
+        return text[:max_tokens * 4]
+    tokens = encoding.encode_ordinary(text)
+    if len(tokens) <= max_tokens:
+        return text
+    # The cut may fall in the middle of a multi-byte character
+    return encoding.decode(tokens[:max_tokens]).rstrip("\ufffd")
+
+
+def compress_whitespace(text: str) -> str:
+    """
+    Reduz os espaços repetidos e as linhas em branco deixados pela extração dos PDFs.
+
+    Args:
+        text (str): O texto.
+
+    Returns:
+        str: O texto compactado.
+    """
+
+    return BLANK_LINES.sub("\n\n", SPACES.sub(" ", text)).strip()
+
+
+def _overlap(left: str, right: str) -> int:
+    # Length of the longest suffix of `left` that is also a prefix of `right`.
+    # The earliest match of the probe gives the longest overlap, so the first full match wins.
+    if len(left) < CONTEXT_MIN_OVERLAP_CHARS or len(right) < CONTEXT_MIN_OVERLAP_CHARS:
+        return 0
+
+    probe = right[:CONTEXT_MIN_OVERLAP_CHARS]
+    start = left.find(probe)
+    while start != -1:
+        if right.startswith(left[start:]):
+            return len(left) - start
+        start = left.find(probe, start + 1)
+    return 0
+
+
+def _remove_overlaps(text: str, kept: List[str]) -> Optional[str]:
+    # Removes from a chunk the spans already sent by chunks of the same source.
+    # Returns None when the chunk adds nothing new.
+    for other in kept:
+        if text in other:
+            return None
+        # `other` precedes `text` in the document
+        text = text[_overlap(other, text):]
+        # `other` follows `text` in the document
+        cut = _overlap(text, other)
+        if cut:
+            text = text[:-cut]
+        if len(text.strip()) < CONTEXT_MIN_OVERLAP_CHARS:
+            return None
+    return text
+
+
+def build_context(docs: List[Document], budget: int = CONTEXT_TOKEN_BUDGET) -> BuiltContext:
+    """
+    Monta o contexto do prompt a partir dos documentos recuperados, dentro de um orçamento de tokens.
+
+    Os documentos são usados na ordem de relevância em que foram recuperados. Os trechos que se repetem entre
+    chunks vizinhos do mesmo arquivo (a sobreposição de `create_chunks`) são enviados uma única vez, e os
+    espaços em excesso são removidos. Os documentos são acrescentados até o orçamento; o último que não
+    couber é cortado, se restarem pelo menos CONTEXT_MIN_PARTIAL_TOKENS tokens.
+
+    Args:
+        docs (List[Document]): Os documentos, do mais para o menos relevante.
+        budget (int, opcional): O número máximo de tokens do contexto. O padrão é CONTEXT_TOKEN_BUDGET.
+
+    Returns:
+        BuiltContext: O texto do contexto, os tokens usados, os documentos incluídos e se houve corte.
+    """
+
+    kept_by_source = {}
+    parts = []
+    tokens = 0
+    truncated = False
+    separator_tokens = count_tokens(CONTEXT_SEPARATOR)
+
+    for doc in docs:
+        source = doc.metadata.get("source")
+        kept = kept_by_source.setdefault(source, []) if source is not None else []
+
+        text = _remove_overlaps(doc.page_content, kept)
+        if text is None:
+            continue
+        kept.append(doc.page_content)
+
+        # The chunker's count is reused for untrimmed chunks; collapsing whitespace only lowers it
+        text_tokens = None
+        if REUSE_CHUNK_TOKEN_COUNT and text == doc.page_content:
+            text_tokens = doc.metadata.get("token_count")
+
+        text = compress_whitespace(text)
+        if not text:
+            continue
+
+        remaining = budget - tokens - (separator_tokens if parts else 0)
+        if text_tokens is None:
+            text_tokens = count_tokens(text)
+        if text_tokens > remaining:
+            truncated = True
+            if remaining >= CONTEXT_MIN_PARTIAL_TOKENS:
+                text = truncate_tokens(text, remaining)
+                parts.append(text)
+                tokens = budget - remaining + count_tokens(text)
+            break
+
+        tokens += text_tokens + (separator_tokens if parts else 0)
+        parts.append(text)
+
+    context = BuiltContext(CONTEXT_SEPARATOR.join(parts), tokens, len(parts), truncated)
+    logger.info(
+        f"Context: {context.tokens} tokens from {context.documents}/{len(docs)} documents"
+        f"{' (truncated to the budget)' if truncated else ''}"
+    )
+    return context
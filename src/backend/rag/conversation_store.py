@@ -0,0 +1,276 @@
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict, deque
+from typing import Deque, List, NamedTuple, Sequence, Tuple
+from dotenv import load_dotenv
+from loguru import logger
+from langchain.memory import ConversationBufferWindowMemory
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from src.backend.utils.utils import folders
+
+load_dotenv()
+
+
+CONVERSATION_STORE_DIR = os.getenv("CONVERSATION_STORE_DIR", os.path.join(folders.ROOT_DIR, "conversations"))
+# Messages kept per user in memory and read back from disk
+CONVERSATION_WINDOW = int(os.getenv("CONVERSATION_WINDOW", "20"))
+# Users kept in the in-memory tier; 0 reads every conversation from disk
+CONVERSATION_CACHE_USERS = int(os.getenv("CONVERSATION_CACHE_USERS", "1000"))
+# Conversations untouched for longer than this are deleted from disk
+CONVERSATION_TTL = float(os.getenv("CONVERSATION_TTL", str(24 * 3600)))
+
+MESSAGE_TYPES = {"human": HumanMessage, "ai": AIMessage, "system": SystemMessage}
+SAFE_USER_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class Message(NamedTuple):
+    """
+    Registro compacto de uma mensagem da conversa.
+    """
+
+    role: str
+    text: str
+    timestamp: float
+
+
+class ConversationStore:
+    """
+    Armazena as conversas dos usuários no servidor, fora da sessão Flask.
+
+    Cada mensagem é um registro compacto (papel, texto, horário). Há dois níveis:
+    - **Persistente**: um arquivo JSONL por usuário, apenas com acréscimos; cada mensagem é uma linha.
+    - **Memória** (opcional): as últimas CONVERSATION_WINDOW mensagens dos CONVERSATION_CACHE_USERS usuários
+      mais recentes, em um LRU. O tamanho do arquivo é conferido a cada leitura, de modo que mensagens
+      gravadas por outro processo são percebidas.
+
+    A leitura de uma conversa fora da memória lê apenas o final do arquivo, e cada mensagem nova grava uma
+    linha: o custo por requisição não cresce com o tamanho da conversa.
+
+    Args:
+        path (str, opcional): O diretório dos arquivos. O padrão é CONVERSATION_STORE_DIR.
+        window (int, opcional): O número de mensagens mantidas por usuário. O padrão é CONVERSATION_WINDOW.
+        max_users (int, opcional): O número de usuários na memória. O padrão é CONVERSATION_CACHE_USERS.
+        ttl (float, opcional): O tempo, em segundos, após o qual conversas inativas são removidas.
+    """
+
+    def __init__(self, path: str = CONVERSATION_STORE_DIR, window: int = CONVERSATION_WINDOW,
+                 max_users: int = CONVERSATION_CACHE_USERS, ttl: float = CONVERSATION_TTL) -> None:
+        self.path = path
+        self.window = window
+        self.max_users = max_users
+        self.ttl = ttl
+        self._cache: "OrderedDict[str, Tuple[Deque[Message], int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._swept_at = 0.0
+
+    def messages(self, user_id: str) -> List[Message]:
+        """
+        Retorna as mensagens mais recentes de um usuário.
+
+        Args:
+            user_id (str): O identificador do usuário.
+
+        Returns:
+            List[Message]: As últimas mensagens, da mais antiga para a mais recente.
+        """
+
+        path = self._file(user_id)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+
+        with self._lock:
+            cached = self._cache.get(user_id)
+            if cached is not None and cached[1] == size:
+                self._cache.move_to_end(user_id)
+                return list(cached[0])
+
+        messages = deque(_read_tail(path, self.window) if size else [], maxlen=self.window)
+        self._remember(user_id, messages, size)
+        return list(messages)
+
+    def append(self, user_id: str, messages: Sequence[Message]) -> None:
+        """
+        Acrescenta mensagens à conversa de um usuário.
+
+        Args:
+            user_id (str): O identificador do usuário.
+            messages (Sequence[Message]): As mensagens.
+        """
+
+        if not messages:
+            return
+
+        current = deque(self.messages(user_id), maxlen=self.window)
+
+        os.makedirs(self.path, exist_ok=True)
+        path = self._file(user_id)
+        with open(path, 'a', encoding='utf8') as f:
+            for message in messages:
+                f.write(json.dumps([message.role, message.text, message.timestamp], ensure_ascii=False) + "\n")
+
+        current.extend(messages)
+        self._remember(user_id, current, os.path.getsize(path))
+        self._maybe_sweep()
+
+    def clear(self, user_id: str) -> None:
+        """
+        Remove a conversa de um usuário.
+
+        Args:
+            user_id (str): O identificador do usuário.
+        """
+
+        with self._lock:
+            self._cache.pop(user_id, None)
+
+        path = self._file(user_id)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def history(self, user_id: str) -> "StoredChatMessageHistory":
+        """
+        Retorna a conversa de um usuário como histórico de mensagens do LangChain.
+
+        Args:
+            user_id (str): O identificador do usuário.
+
+        Returns:
+            StoredChatMessageHistory: O histórico, gravado neste armazenamento.
+        """
+
+        return StoredChatMessageHistory(self, user_id)
+
+    def memory(self, user_id: str, k: int = 1) -> ConversationBufferWindowMemory:
+        """
+        Cria a memória de conversa usada pelas chains, apoiada neste armazenamento.
+
+        As mensagens salvas pela chain são gravadas diretamente no armazenamento; nada precisa ser
+        guardado na sessão.
+
+        Args:
+            user_id (str): O identificador do usuário.
+            k (int, opcional): O número de trocas (pergunta e resposta) enviadas ao modelo. O padrão é 1.
+
+        Returns:
+            ConversationBufferWindowMemory: A memória da conversa.
+        """
+
+        return ConversationBufferWindowMemory(chat_memory=self.history(user_id), return_messages=True, k=k)
+
+    def sweep(self) -> None:
+        """
+        Remove do disco as conversas sem atividade há mais de `ttl` segundos.
+        """
+
+        if not os.path.isdir(self.path):
+            return
+
+        cutoff = time.time() - self.ttl
+        for file_name in os.listdir(self.path):
+            path = os.path.join(self.path, file_name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError as e:
+                logger.error(f"ConversationStore.sweep: {path}: {e}")
+
+    def _remember(self, user_id: str, messages: Deque[Message], size: int) -> None:
+        if self.max_users <= 0:
+            return
+
+        with self._lock:
+            self._cache[user_id] = (messages, size)
+            self._cache.move_to_end(user_id)
+            while len(self._cache) > self.max_users:
+                self._cache.popitem(last=False)
+
+    def _maybe_sweep(self) -> None:
+        now = time.monotonic()
+        if now - self._swept_at < 3600:
+            return
+        self._swept_at = now
+        self.sweep()
+
+    def _file(self, user_id: str) -> str:
+        # The ID comes from the session; anything that is not a plain token is hashed before touching the disk
+        name = user_id if SAFE_USER_ID.match(user_id) else hashlib.sha256(user_id.encode('utf-8')).hexdigest()
+        return os.path.join(self.path, f"{name}.jsonl")
+
+
+def conversation_key(user_id: str, agent: str) -> str:
+    """
+    Retorna a chave da conversa de um usuário com um agente: cada agente tem o seu próprio histórico.
+
+    Args:
+        user_id (str): O identificador do usuário.
+        agent (str): O nome do agente.
+
+    Returns:
+        str: A chave usada no armazenamento de conversas.
+    """
+
+    return f"{user_id}-{agent}"
+
+
+class StoredChatMessageHistory(BaseChatMessageHistory):
+    """
+    Histórico de mensagens do LangChain gravado em um `ConversationStore`.
+
+    Args:
+        store (ConversationStore): O armazenamento das conversas.
+        user_id (str): O identificador do usuário.
+    """
+
+    def __init__(self, store: ConversationStore, user_id: str) -> None:
+        self.store = store
+        self.user_id = user_id
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        return [MESSAGE_TYPES.get(message.role, HumanMessage)(content=message.text)
+                for message in self.store.messages(self.user_id)]
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        now = time.time()
+        self.store.append(self.user_id, [Message(message.type, message.content, now) for message in messages])
+
+    def add_message(self, message: BaseMessage) -> None:
+        self.add_messages([message])
+
+    def clear(self) -> None:
+        self.store.clear(self.user_id)
+
+
+def _read_tail(path: str, n: int, block_size: int = 8192) -> List[Message]:
+    # Reads blocks backwards from the end until it has n complete lines
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        data = b""
+        while position > 0 and data.count(b"\n") <= n:
+            step = min(block_size, position)
+            position -= step
+            f.seek(position)
+            data = f.read(step) + data
+
+    lines = data.splitlines()
+    if position > 0:
+        # The first line may have been cut in the middle
+        lines = lines[1:]
+
+    messages = []
+    for line in lines[-n:]:
+        try:
+            role, text, timestamp = json.loads(line)
+            messages.append(Message(role, text, timestamp))
+        except ValueError:
+            # A line being written by another process
+            continue
+    return messages
+
+
+conversation_store = ConversationStore()
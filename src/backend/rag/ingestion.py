@@ -0,0 +1,216 @@
+import os
+import json
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Tuple
+from langchain.docstore.document import Document
+from dotenv import load_dotenv
+from loguru import logger
+from src.backend.rag.chunks import create_chunks
+from src.backend.rag.read_data import load_pdf, read_txt_file, read_csv_file, read_excel_file
+from src.backend.rag.tabular import TABULAR_EXTENSIONS
+from src.backend.rag.manifest import chunk_key
+from src.backend.llm.embedding_cache import CachedEmbeddings
+from src.backend.vector_store import VectorDatabase
+
+load_dotenv()
+
+
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", str(os.cpu_count() or 1)))
+EMBEDDING_CONCURRENCY = int(os.getenv("EMBEDDING_CONCURRENCY", "4"))
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "16"))
+UPLOAD_BATCH_SIZE = int(os.getenv("UPLOAD_BATCH_SIZE", "500"))
+# "token" (fixed token windows) or "semantic" (headings and paragraphs, see semantic_chunker)
+CHUNK_METHOD = os.getenv("CHUNK_METHOD", "token")
+# Pages encoded together by the token chunker
+CHUNK_BATCH_PAGES = int(os.getenv("CHUNK_BATCH_PAGES", "32"))
+# Filter fields per file name, overriding the derived ones, ex.:
+# {"Guia de Parentalidade.pdf": {"area": "parentalidade", "date": "2024-03-01"}}
+DOCUMENT_METADATA = os.getenv("DOCUMENT_METADATA", "")
+
+LOADERS = {
+    '.pdf': load_pdf,
+    '.txt': read_txt_file,
+    '.csv': read_csv_file,
+    '.xlsx': read_excel_file,
+    '.xls': read_excel_file,
+}
+
+
+def _load_document_metadata() -> Dict[str, Dict[str, Any]]:
+    if not DOCUMENT_METADATA:
+        return {}
+    try:
+        overrides = json.loads(DOCUMENT_METADATA)
+    except ValueError as e:
+        logger.error(f"Invalid DOCUMENT_METADATA, ignoring it: {e}")
+        return {}
+    return overrides if isinstance(overrides, dict) else {}
+
+
+_DOCUMENT_METADATA = _load_document_metadata()
+
+
+def document_metadata(path: str) -> Dict[str, Any]:
+    """
+    Retorna os campos de filtro de um arquivo: a área (`area`), o tipo (`doc_type`, a extensão) e a data (`date`,
+    a data de modificação em UTC), com as substituições de DOCUMENT_METADATA para o nome do arquivo.
+
+    Args:
+        path (str): O caminho do arquivo.
+
+    Returns:
+        Dict[str, Any]: Os campos, com a data no formato ISO 8601 ("AAAA-MM-DDTHH:MM:SSZ").
+    """
+
+    modified = datetime.fromtimestamp(os.path.getmtime(path), tz=timezone.utc)
+    metadata = {
+        "area": "",
+        "doc_type": os.path.splitext(path)[1].lower().lstrip("."),
+        "date": modified.strftime("%Y-%m-%dT%H:%M:%SZ"),
+    }
+    overrides = dict(_DOCUMENT_METADATA.get(os.path.basename(path), {}))
+    if len(str(overrides.get("date", ""))) == 10:
+        overrides["date"] = f"{overrides['date']}T00:00:00Z"
+    metadata.update({key: value for key, value in overrides.items() if key in metadata})
+    return metadata
+
+
+def load_and_chunk(path: str) -> List[Document]:
+    """
+    Lê um arquivo e o divide em chunks. Executada nos processos do pool de ingestão.
+
+    Cada chunk recebe em `metadata` o arquivo de origem (`source`), os campos de filtro do arquivo (ver
+    `document_metadata`) e um identificador determinístico (`chunk_id`), usado como chave do documento no índice.
+    O chunking semântico (CHUNK_METHOD="semantic") já define o seu próprio `chunk_id`, que não depende da posição
+    do chunk no arquivo.
+
+    Args:
+        path (str): O caminho do arquivo.
+
+    Returns:
+        List[Document]: Os chunks do arquivo.
+    """
+
+    extension = os.path.splitext(path)[1].lower()
+    chunks = []
+    if extension in TABULAR_EXTENSIONS:
+        # Tabular loaders already group whole rows under the header
+        chunks.extend(LOADERS[extension](path))
+    elif CHUNK_METHOD == "semantic":
+        # Sections and chunks may span pages, so the pages are streamed through a single chunker
+        chunks.extend(create_chunks(LOADERS[extension](path), chunk_method="semantic", chunk_size=500, chunk_overlap=100))
+    else:
+        # Loaders may yield pages as they are read; pages are chunked in batches as they arrive
+        batch = []
+        for document in LOADERS[extension](path):
+            batch.append(document)
+            if len(batch) >= CHUNK_BATCH_PAGES:
+                chunks.extend(create_chunks(batch, chunk_method=CHUNK_METHOD, chunk_size=500, chunk_overlap=100))
+                batch = []
+        if batch:
+            chunks.extend(create_chunks(batch, chunk_method=CHUNK_METHOD, chunk_size=500, chunk_overlap=100))
+    filter_fields = document_metadata(path)
+    for position, chunk in enumerate(chunks):
+        chunk.metadata["source"] = path
+        chunk.metadata.update(filter_fields)
+        if "chunk_id" not in chunk.metadata:
+            chunk.metadata["chunk_id"] = chunk_key(path, position, chunk.page_content)
+    logger.info(f"Chunking {extension}: {os.path.basename(path)} ({len(chunks)} chunks)")
+    return chunks
+
+
+def iter_chunked_files(paths: List[str], workers: int = INGEST_WORKERS) -> Iterator[Tuple[str, List[Document]]]:
+    """
+    Lê e divide os arquivos em paralelo, em um pool de processos, devolvendo cada arquivo assim que fica pronto.
+
+    Args:
+        paths (List[str]): Os caminhos dos arquivos. Extensões não suportadas são ignoradas.
+        workers (int, opcional): O número de processos. O padrão é INGEST_WORKERS.
+
+    Yields:
+        Tuple[str, List[Document]]: O caminho do arquivo e os seus chunks.
+    """
+
+    supported = [path for path in paths if os.path.splitext(path)[1].lower() in LOADERS]
+
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {executor.submit(load_and_chunk, path): path for path in supported}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                yield path, future.result()
+            except Exception as e:
+                logger.error(f"load_and_chunk: {path}: {e}")
+
+
+def ingest_files(vector_db: VectorDatabase, index_name: str, paths: List[str]) -> Dict[str, List[str]]:
+    """
+    Ingere arquivos na vector store em um pipeline de três estágios.
+
+    1. **Leitura e chunking**: em paralelo, em um pool de processos.
+    2. **Embeddings**: lotes de chunks são enviados ao modelo de embeddings em threads, com um limite de
+       chamadas simultâneas (EMBEDDING_CONCURRENCY). Os vetores ficam no cache de embeddings.
+    3. **Upload**: os chunks com embedding pronto são enviados em lotes grandes (UPLOAD_BATCH_SIZE); os
+       vetores calculados no estágio anterior são lidos do cache, sem novas chamadas ao modelo.
+
+    Sem o cache de embeddings, o estágio 2 é ignorado e os embeddings são calculados durante o upload.
+
+    Args:
+        vector_db (VectorDatabase): A vector store de destino.
+        index_name (str): O nome do índice de destino.
+        paths (List[str]): Os caminhos dos arquivos a serem ingeridos.
+
+    Returns:
+        Dict[str, List[str]]: Os identificadores dos documentos adicionados, por arquivo de origem. Arquivos que
+        não puderam ser lidos não aparecem no resultado.
+    """
+
+    embeddings = vector_db.get_vector_store(index_name).embedding_function
+    prefetch = isinstance(embeddings, CachedEmbeddings)
+
+    added_ids: Dict[str, List[str]] = {}
+    total = 0
+    ready: List[Document] = []
+    in_flight = deque()
+
+    def drain(limit: int) -> None:
+        while len(in_flight) > limit:
+            future, batch = in_flight.popleft()
+            try:
+                future.result()
+            except Exception as e:
+                # The upload embeds the batch again if the prefetch failed
+                logger.error(f"embed_documents: {e}")
+            ready.extend(batch)
+
+    def upload(force: bool = False) -> None:
+        nonlocal total
+        while len(ready) >= UPLOAD_BATCH_SIZE or (force and ready):
+            batch = ready[:UPLOAD_BATCH_SIZE]
+            del ready[:UPLOAD_BATCH_SIZE]
+            ids = vector_db.add_documents_to_vector_store_with_retry(index_name, batch, batch_size=UPLOAD_BATCH_SIZE) or []
+            for doc, doc_id in zip(batch, ids):
+                added_ids.setdefault(doc.metadata["source"], []).append(doc_id)
+            total += len(ids)
+            logger.info(f"{total} documents added to the vector store")
+
+    with ThreadPoolExecutor(max_workers=max(1, EMBEDDING_CONCURRENCY)) as embedders:
+        for path, chunks in iter_chunked_files(paths):
+            added_ids.setdefault(path, [])
+            if not prefetch:
+                ready.extend(chunks)
+                upload()
+                continue
+
+            for i in range(0, len(chunks), EMBEDDING_BATCH_SIZE):
+                batch = chunks[i:i + EMBEDDING_BATCH_SIZE]
+                drain(EMBEDDING_CONCURRENCY - 1)
+                in_flight.append((embedders.submit(embeddings.embed_documents, [doc.page_content for doc in batch]), batch))
+                upload()
+
+        drain(0)
+        upload(force=True)
+
+    return added_ids
@@ -0,0 +1,159 @@
+import os
+import json
+import hashlib
+from typing import Dict, List, Tuple
+from dotenv import load_dotenv
+from src.backend.utils.utils import folders
+
+load_dotenv()
+
+
+MANIFEST_DIR = os.getenv("INGESTION_MANIFEST_DIR", os.path.join(folders.ROOT_DIR, "manifests"))
+
+
+def file_hash(path: str) -> str:
+    """
+    Calcula o SHA-256 do conteúdo de um arquivo.
+
+    Args:
+        path (str): O caminho do arquivo.
+
+    Returns:
+        str: O hash hexadecimal do arquivo.
+    """
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_key(source: str, position: int, content: str) -> str:
+    """
+    Gera o identificador determinístico de um chunk a partir da origem, da posição e do conteúdo.
+
+    Reingerir o mesmo arquivo produz os mesmos identificadores, de modo que o upload sobrescreve os
+    documentos existentes em vez de duplicá-los.
+
+    Args:
+        source (str): O arquivo de origem do chunk.
+        position (int): A posição do chunk no arquivo.
+        content (str): O conteúdo do chunk.
+
+    Returns:
+        str: O identificador do chunk.
+    """
+
+    content_hash = hashlib.sha256(content.encode('utf-8')).hexdigest()
+    return hashlib.sha256(f"{source}|{position}|{content_hash}".encode('utf-8')).hexdigest()
+
+
+class IngestionManifest:
+    """
+    Registro local dos arquivos já ingeridos em um índice: caminho, mtime, hash do conteúdo e os IDs dos
+    chunks que cada arquivo gerou.
+
+    É usado para ingerir apenas os arquivos novos ou alterados e para remover do índice os chunks de
+    arquivos removidos ou alterados.
+
+    Args:
+        index_name (str): O nome do índice descrito pelo manifesto.
+    """
+
+    def __init__(self, index_name: str) -> None:
+        self.index_name = index_name
+        self.path = os.path.join(MANIFEST_DIR, f"{index_name}.json")
+        self.files: Dict[str, Dict] = {}
+
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf8') as f:
+                self.files = json.load(f).get("files", {})
+
+    def diff(self, paths: List[str]) -> Tuple[List[str], List[str]]:
+        """
+        Compara os arquivos atuais com o manifesto.
+
+        O hash só é calculado quando o mtime mudou; um arquivo tocado mas com o mesmo conteúdo não é
+        considerado alterado.
+
+        Args:
+            paths (List[str]): Os caminhos dos arquivos atuais.
+
+        Returns:
+            Tuple[List[str], List[str]]: Os arquivos novos ou alterados e os arquivos removidos.
+        """
+
+        changed = []
+        for path in paths:
+            entry = self.files.get(path)
+            mtime = os.path.getmtime(path)
+            if entry is not None and entry["mtime"] == mtime:
+                continue
+            if entry is not None and entry["sha256"] == file_hash(path):
+                entry["mtime"] = mtime
+                continue
+            changed.append(path)
+
+        current = set(paths)
+        removed = [path for path in self.files if path not in current]
+
+        return changed, removed
+
+    def chunk_ids(self, path: str) -> List[str]:
+        """
+        Retorna os IDs dos chunks gerados pelo arquivo na última ingestão.
+
+        Args:
+            path (str): O caminho do arquivo.
+
+        Returns:
+            List[str]: Os IDs dos chunks no índice.
+        """
+
+        return self.files.get(path, {}).get("chunk_ids", [])
+
+    def update(self, path: str, chunk_ids: List[str]) -> None:
+        """
+        Registra a ingestão de um arquivo.
+
+        Args:
+            path (str): O caminho do arquivo.
+            chunk_ids (List[str]): Os IDs dos chunks adicionados ao índice.
+        """
+
+        self.files[path] = {
+            "mtime": os.path.getmtime(path),
+            "sha256": file_hash(path),
+            "chunk_ids": chunk_ids,
+        }
+
+    def remove(self, path: str) -> None:
+        """
+        Remove um arquivo do manifesto.
+
+        Args:
+            path (str): O caminho do arquivo.
+        """
+
+        self.files.pop(path, None)
+
+    def delete(self) -> None:
+        """
+        Remove o manifesto do disco, como após excluir o índice que ele descreve.
+        """
+
+        self.files = {}
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def save(self) -> None:
+        """
+        Grava o manifesto em disco de forma atômica.
+        """
+
+        os.makedirs(MANIFEST_DIR, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf8') as f:
+            json.dump({"index_name": self.index_name, "files": self.files}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
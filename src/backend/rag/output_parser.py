@@ -0,0 +1,413 @@
+import re
+import json
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from loguru import logger
+from src.backend.llm.output_format import OUTPUT_FORMAT, PENSAMENTO_MARKER, RESPOSTA_MARKER, format_output
+
+
+PENSAMENTO_ERROR = "Erro: Não foi possível extrair o pensamento da resposta."
+RESPOSTA_ERROR = "Erro: A resposta não contém os delimitadores esperados."
+
+_MARKERS = {PENSAMENTO_MARKER: "pensamento", RESPOSTA_MARKER: "resposta"}
+_FIELDS = ("pensamento", "resposta")
+
+# Fields of a JSON object, including a last string value cut off by the end of the completion
+_JSON_FIELD = re.compile(r'"(pensamento|resposta)"\s*:\s*"((?:[^"\\]|\\.)*)', re.DOTALL)
+_TRAILING_COMMA = re.compile(r',\s*([}\]])')
+_JSON_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+
+class OutputStats:
+    """
+    Contadores, por processo, de como as saídas do modelo foram interpretadas.
+
+    - parsed: a saída estava no formato pedido.
+    - repaired: a saída precisou de reparo local (JSON cortado ou com texto ao redor, delimitadores em vez de JSON).
+    - salvaged: nenhum formato foi reconhecido e o texto foi usado como resposta.
+    - failed: a saída estava vazia.
+    """
+
+    def __init__(self) -> None:
+        self._counts = {"parsed": 0, "repaired": 0, "salvaged": 0, "failed": 0}
+        self._lock = threading.Lock()
+
+    def record(self, outcome: str) -> None:
+        with self._lock:
+            self._counts[outcome] += 1
+
+    def snapshot(self) -> Dict[str, int]:
+        """
+        Returns:
+            Dict[str, int]: O número de saídas em cada situação.
+        """
+
+        with self._lock:
+            return dict(self._counts)
+
+
+output_stats = OutputStats()
+
+
+def clean_completion(text: str) -> str:
+    """
+    Remove aspas e quebras de linha da saída do modelo, como esperado pelo front-end.
+
+    Args:
+        text (str): O texto gerado pelo modelo.
+
+    Returns:
+        str: O texto limpo.
+    """
+
+    return text.replace('"', '').replace('\n', '')
+
+
+def parse_sections(text: str) -> Tuple[str, str]:
+    """
+    Separa as seções PENSAMENTO e RESPOSTA de uma resposta completa do modelo.
+
+    Args:
+        text (str): O texto gerado pelo modelo.
+
+    Returns:
+        Tuple[str, str]: Uma tupla contendo a resposta e o pensamento. Se os delimitadores não forem
+        encontrados, ambos contêm mensagens de erro.
+    """
+
+    response_text = clean_completion(text)
+
+    match = re.search(r'###PENSAMENTO###(.*?)###RESPOSTA###(.*)', response_text, re.DOTALL)
+
+    if match:
+        pensamento = match.group(1).strip()
+        resposta = match.group(2).strip()
+    else:
+        pensamento = PENSAMENTO_ERROR
+        resposta = RESPOSTA_ERROR
+
+    return (resposta, pensamento)
+
+
+def _as_text(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, list):
+        return " ".join(_as_text(item) for item in value)
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _strip_fences(text: str) -> str:
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        text = text.rsplit("```", 1)[0]
+    return text.strip()
+
+
+def _fields(data: Any) -> Optional[Dict[str, str]]:
+    if not isinstance(data, dict):
+        return None
+    return {field: _as_text(data[field]) for field in _FIELDS if field in data}
+
+
+def _loads_json(text: str) -> Optional[Dict[str, str]]:
+    try:
+        return _fields(json.loads(text, strict=False))
+    except ValueError:
+        return None
+
+
+def _repair_json(text: str) -> Optional[Dict[str, str]]:
+    # Text around the object and trailing commas
+    start, end = text.find("{"), text.rfind("}")
+    if start != -1 and end > start:
+        fields = _loads_json(_TRAILING_COMMA.sub(r"\1", text[start:end + 1]))
+        if fields and "resposta" in fields:
+            return fields
+
+    # Invalid or truncated JSON: the string values of the known fields are read one by one
+    fields = {}
+    for field, value in _JSON_FIELD.findall(text):
+        # A value cut inside an escape sequence
+        value = re.sub(r'\\(u[0-9a-fA-F]{0,3})?$', '', value)
+        try:
+            fields[field] = json.loads(f'"{value}"', strict=False)
+        except ValueError:
+            fields[field] = value
+    return fields if "resposta" in fields else None
+
+
+def parse_output(text: str) -> Tuple[str, str]:
+    """
+    Interpreta uma resposta completa do modelo, no formato JSON ou com os delimitadores ###.
+
+    A saída no formato pedido (OUTPUT_FORMAT) é lida diretamente. Caso contrário é feito um reparo local, sem nova
+    chamada ao modelo: o objeto JSON é extraído do texto ao redor, vírgulas sobrando são removidas e os campos de
+    um JSON cortado são recuperados; uma saída com os delimitadores ### é aceita no modo JSON e vice-versa. Se nada
+    for reconhecido, o texto gerado é usado como resposta, em vez de ser descartado. Os resultados são contados
+    em `output_stats`.
+
+    Args:
+        text (str): O texto gerado pelo modelo.
+
+    Returns:
+        Tuple[str, str]: Uma tupla contendo a resposta e o pensamento. Se o pensamento não puder ser extraído,
+        ele contém PENSAMENTO_ERROR.
+    """
+
+    body = _strip_fences(text)
+    fields = _loads_json(body) if OUTPUT_FORMAT == "json" else None
+    outcome = "parsed"
+
+    if fields is None or "resposta" not in fields:
+        outcome = "repaired"
+        resposta, pensamento = parse_sections(body)
+        if pensamento != PENSAMENTO_ERROR:
+            if OUTPUT_FORMAT == "sections":
+                outcome = "parsed"
+            fields = {"pensamento": pensamento, "resposta": resposta}
+        else:
+            fields = _repair_json(body)
+
+    if fields is None:
+        if body:
+            outcome = "salvaged"
+            fields = {"resposta": body}
+        else:
+            outcome = "failed"
+            fields = {"resposta": RESPOSTA_ERROR}
+
+    output_stats.record(outcome)
+    if outcome != "parsed":
+        logger.warning(f"Model output not in the expected format ({outcome}): {output_stats.snapshot()}")
+
+    resposta = clean_completion(fields["resposta"]).strip()
+    pensamento = clean_completion(fields.get("pensamento", "")).strip() or PENSAMENTO_ERROR
+    return (resposta, pensamento)
+
+
+class SectionStreamParser:
+    """
+    Separa incrementalmente as seções PENSAMENTO e RESPOSTA enquanto os tokens do modelo chegam.
+
+    Cada chamada a `feed` devolve os trechos que já podem ser exibidos, identificados pela seção
+    a que pertencem. Um delimitador dividido entre dois tokens é retido até ser reconhecido, e o
+    texto anterior ao primeiro delimitador é descartado, como no parser da resposta completa.
+    """
+
+    def __init__(self) -> None:
+        self.section: Optional[str] = None
+        self.sections = {"pensamento": "", "resposta": ""}
+        self._buffer = ""
+        self._seen = set()
+
+    def feed(self, token: str) -> List[Tuple[str, str]]:
+        """
+        Processa um novo trecho gerado pelo modelo.
+
+        Args:
+            token (str): O trecho recebido do modelo.
+
+        Returns:
+            List[Tuple[str, str]]: Os pares (seção, texto) prontos para envio ao cliente.
+        """
+
+        self._buffer += clean_completion(token)
+        events = []
+
+        while True:
+            positions = [(self._buffer.find(marker), marker) for marker in _MARKERS]
+            positions = [(pos, marker) for pos, marker in positions if pos != -1]
+            if not positions:
+                break
+
+            pos, marker = min(positions)
+            self._emit(self._buffer[:pos], events)
+            self.section = _MARKERS[marker]
+            self._seen.add(self.section)
+            self._buffer = self._buffer[pos + len(marker):]
+
+        # Hold back a suffix that may be the beginning of a delimiter split across tokens
+        keep = 0
+        for marker in _MARKERS:
+            for size in range(min(len(marker) - 1, len(self._buffer)), 0, -1):
+                if marker.startswith(self._buffer[-size:]):
+                    keep = max(keep, size)
+                    break
+
+        self._emit(self._buffer[:len(self._buffer) - keep], events)
+        self._buffer = self._buffer[len(self._buffer) - keep:]
+
+        return events
+
+    def close(self) -> List[Tuple[str, str]]:
+        """
+        Finaliza o processamento, liberando o texto retido.
+
+        Returns:
+            List[Tuple[str, str]]: Os pares (seção, texto) restantes.
+        """
+
+        events = []
+        self._emit(self._buffer, events)
+        self._buffer = ""
+        return events
+
+    def result(self) -> Tuple[str, str]:
+        """
+        Retorna a resposta e o pensamento acumulados, com as mesmas mensagens de erro de `parse_sections`.
+
+        Returns:
+            Tuple[str, str]: Uma tupla contendo a resposta e o pensamento.
+        """
+
+        if self._seen != {"pensamento", "resposta"}:
+            return (RESPOSTA_ERROR, PENSAMENTO_ERROR)
+
+        return (self.sections["resposta"].strip(), self.sections["pensamento"].strip())
+
+    def _emit(self, text: str, events: List[Tuple[str, str]]) -> None:
+        if not text or self.section is None:
+            return
+
+        if not self.sections[self.section]:
+            text = text.lstrip()
+            if not text:
+                return
+
+        self.sections[self.section] += text
+        events.append((self.section, text))
+
+
+class JsonStreamParser(SectionStreamParser):
+    """
+    Separa incrementalmente os campos "pensamento" e "resposta" de um objeto JSON enquanto os tokens do modelo chegam.
+
+    O texto dos campos é decodificado (escapes JSON) e repassado assim que chega, sem esperar o fim do objeto.
+    Se a saída não começar com um objeto JSON (ex.: o modelo usou os delimitadores ###), o texto é repassado a
+    um `SectionStreamParser`. Ao final, `result` interpreta a saída completa com `parse_output`, que inclui o
+    reparo local.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.text = ""
+        self._fallback: Optional[SectionStreamParser] = None
+        self._started = False
+        self._depth = 0
+        self._string: Optional[str] = None
+        self._key = ""
+        self._value_key: Optional[str] = None
+        self._escape: Optional[str] = None
+        self._expect_value = False
+
+    def feed(self, token: str) -> List[Tuple[str, str]]:
+        """
+        Processa um novo trecho gerado pelo modelo.
+
+        Args:
+            token (str): O trecho recebido do modelo.
+
+        Returns:
+            List[Tuple[str, str]]: Os pares (campo, texto) prontos para envio ao cliente.
+        """
+
+        self.text += token
+        if self._fallback is not None:
+            return self._fallback.feed(token)
+
+        if not self._started:
+            head = self.text.lstrip()
+            if not head:
+                return []
+            if head[0] not in "{`":
+                self._fallback = SectionStreamParser()
+                return self._fallback.feed(self.text)
+            self._started = True
+            token = self.text
+
+        pending: Dict[str, str] = {}
+        for char in token:
+            self._consume(char, pending)
+
+        events = []
+        for field, text in pending.items():
+            self.section = field
+            self._emit(clean_completion(text), events)
+        return events
+
+    def close(self) -> List[Tuple[str, str]]:
+        if self._fallback is not None:
+            return self._fallback.close()
+        return []
+
+    def result(self) -> Tuple[str, str]:
+        """
+        Retorna a resposta e o pensamento da saída completa, interpretada por `parse_output`.
+
+        Returns:
+            Tuple[str, str]: Uma tupla contendo a resposta e o pensamento.
+        """
+
+        return parse_output(self.text)
+
+    def _consume(self, char: str, pending: Dict[str, str]) -> None:
+        if self._string is None:
+            if char == '"' and self._depth == 1:
+                self._string = "value" if self._expect_value else "key"
+                if self._string == "key":
+                    self._key = ""
+                elif self._key in _FIELDS:
+                    self._value_key = self._key
+            elif char == '"':
+                self._string = "nested"
+            elif char == ':':
+                self._expect_value = True
+            elif char == ',':
+                self._expect_value = False
+            elif char in "{[":
+                self._depth += 1
+                self._expect_value = False
+            elif char in "}]":
+                self._depth -= 1
+            return
+
+        if self._escape is not None:
+            self._escape += char
+            if self._escape[0] == 'u' and len(self._escape) < 5:
+                return
+            if self._escape[0] == 'u':
+                try:
+                    decoded = chr(int(self._escape[1:], 16))
+                except ValueError:
+                    decoded = ""
+            else:
+                decoded = _JSON_ESCAPES.get(self._escape, self._escape)
+            self._escape = None
+            self._append(decoded, pending)
+        elif char == '\\':
+            self._escape = ""
+        elif char == '"':
+            self._string = None
+            self._value_key = None
+            self._expect_value = False
+        else:
+            self._append(char, pending)
+
+    def _append(self, text: str, pending: Dict[str, str]) -> None:
+        if self._string == "key":
+            self._key += text
+        elif self._value_key is not None:
+            pending[self._value_key] = pending.get(self._value_key, "") + text
+
+
+def create_stream_parser() -> SectionStreamParser:
+    """
+    Cria o parser incremental para o formato pedido ao modelo (OUTPUT_FORMAT).
+
+    Returns:
+        SectionStreamParser: Um `JsonStreamParser` no modo JSON ou um `SectionStreamParser`.
+    """
+
+    return JsonStreamParser() if OUTPUT_FORMAT == "json" else SectionStreamParser()
@@ -0,0 +1,103 @@
+import os
+import json
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional
+import pypdf
+from pypdf import PdfReader
+from dotenv import load_dotenv
+from loguru import logger
+from langchain.docstore.document import Document
+from src.backend.rag.manifest import file_hash
+from src.backend.utils.utils import folders
+
+load_dotenv()
+
+
+# Part of the cache key: bump the suffix when the extraction itself changes
+PDF_EXTRACTOR_VERSION = f"pypdf-{pypdf.__version__}-1"
+PDF_TEXT_CACHE_ENABLED = os.getenv("PDF_TEXT_CACHE_ENABLED", "true").lower() == "true"
+PDF_TEXT_CACHE_DIR = os.getenv("PDF_TEXT_CACHE_DIR", os.path.join(folders.CACHE, "pdf_text"))
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Smaller PDFs are read in the calling process
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "64"))
+PDF_PAGES_PER_TASK = 16
+
+
+def _extract_range(path: str, start: int, stop: int) -> List[str]:
+    # Runs in the worker processes: each one opens the file and reads its range of pages
+    reader = PdfReader(path)
+    return [reader.pages[number].extract_text() for number in range(start, stop)]
+
+
+def _extract_pages(path: str, workers: int) -> Iterator[str]:
+    reader = PdfReader(path)
+    count = len(reader.pages)
+
+    if workers <= 1 or count < PDF_PARALLEL_MIN_PAGES:
+        for page in reader.pages:
+            yield page.extract_text()
+        return
+
+    logger.info(f"Extracting {os.path.basename(path)} ({count} pages) in {workers} processes")
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Ranges are collected in submission order, with a bounded number in flight
+        pending = deque()
+        for start in range(0, count, PDF_PAGES_PER_TASK):
+            pending.append(executor.submit(_extract_range, path, start, min(start + PDF_PAGES_PER_TASK, count)))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def _cache_path(path: str) -> str:
+    return os.path.join(PDF_TEXT_CACHE_DIR, f"{file_hash(path)}-{PDF_EXTRACTOR_VERSION}.jsonl")
+
+
+def iter_pdf_pages(path: str, workers: int = PDF_EXTRACT_WORKERS) -> Iterator[Document]:
+    """
+    Extrai o texto de um PDF, devolvendo uma página por vez.
+
+    As páginas são entregues à medida que são extraídas, de modo que o chunking pode começar antes do fim do
+    arquivo. PDFs com pelo menos PDF_PARALLEL_MIN_PAGES páginas são extraídos em `workers` processos, em faixas
+    de páginas, mantendo a ordem.
+
+    O texto extraído é gravado em cache no disco, com a chave formada pelo SHA-256 do arquivo e pela versão do
+    extrator (PDF_EXTRACTOR_VERSION); um PDF inalterado é lido do cache sem ser processado de novo. Uma extração
+    interrompida não é gravada.
+
+    Args:
+        path (str): O caminho do arquivo PDF.
+        workers (int, opcional): O número de processos para PDFs grandes. O padrão é PDF_EXTRACT_WORKERS.
+
+    Yields:
+        Document: O texto de cada página, com `source` e `page` (a partir de 0) em `metadata`.
+    """
+
+    cache_path: Optional[str] = _cache_path(path) if PDF_TEXT_CACHE_ENABLED else None
+
+    if cache_path is not None and os.path.exists(cache_path):
+        with open(cache_path, 'r', encoding='utf8') as f:
+            for number, line in enumerate(f):
+                yield Document(page_content=json.loads(line), metadata={'source': path, 'page': number})
+        return
+
+    if cache_path is None:
+        for number, text in enumerate(_extract_pages(path, workers)):
+            yield Document(page_content=text, metadata={'source': path, 'page': number})
+        return
+
+    os.makedirs(PDF_TEXT_CACHE_DIR, exist_ok=True)
+    temporary_path = f"{cache_path}.{os.getpid()}.tmp"
+    complete = False
+    try:
+        with open(temporary_path, 'w', encoding='utf8') as f:
+            for number, text in enumerate(_extract_pages(path, workers)):
+                f.write(json.dumps(text, ensure_ascii=False) + "\n")
+                yield Document(page_content=text, metadata={'source': path, 'page': number})
+        complete = True
+        os.replace(temporary_path, cache_path)
+    finally:
+        if not complete and os.path.exists(temporary_path):
+            os.remove(temporary_path)
@@ -0,0 +1,169 @@
+import string
+from typing import Dict, List, Sequence, Tuple
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from src.backend.rag.context_builder import count_tokens
+from src.backend.rag.output_parser import OUTPUT_FORMAT
+
+
+PROMPT_FIELDS = frozenset({"query", "context"})
+
+COMMON_INSTRUCTIONS = """Caso sejam necessárias informações adicionais, pergunte ao usuário.
+Caso você não saiba a resposta, não invente, apenas diga que não sabe.
+Responda apenas com informações obtidas através do contexto.
+Para explicar o pensamento de forma clara, detalhe o processo de raciocínio lógico seguido para conectar a pergunta com as informações no contexto."""
+
+SECTIONS_FORMAT_INSTRUCTIONS = f"""{COMMON_INSTRUCTIONS}
+A sua resposta precisa ter sempre duas seções, PENSAMENTO e RESPOSTA, e deve ser sempre apresentada exclusivamente no seguinte formato:
+
+"
+###PENSAMENTO###
+
+
+###RESPOSTA###
+"
+
+Traga as respostas sempre no formato demonstrado acima, com PENSAMENTO e RESPOSTA sinalizados por ###."""
+
+JSON_FORMAT_INSTRUCTIONS = f"""{COMMON_INSTRUCTIONS}
+A sua resposta deve ser sempre um único objeto JSON, sem nenhum texto antes ou depois, com os campos "pensamento" e "resposta", nesta ordem:
+
+{{"pensamento": "<o seu pensamento>", "resposta": "<a sua resposta ao usuário>"}}"""
+
+FORMAT_INSTRUCTIONS = JSON_FORMAT_INSTRUCTIONS if OUTPUT_FORMAT == "json" else SECTIONS_FORMAT_INSTRUCTIONS
+
+VITORIA_SYSTEM = f"""Você é um agente de inteligência artificial com o nome de Judite, e capacitado para atuar nos setores de Talent e Recursos Humanos.
+Seus conhecimentos específicos sobre o assunto estão no contexto enviado pelo usuário entre ***.
+Você trabalha na EY, também chamada de Ernst & Young.
+O usuário também trabalha na EY e irá te fazer uma pergunta.
+Seu objetivo é ler essa pergunta, explicar seu pensamento e retornar uma resposta clara e abrangente para o usuário.
+{FORMAT_INSTRUCTIONS}
+Instruções específicas para as perguntas do usuário:
+- Se a pergunta contiver "quem", forneça informações sobre a(s) pessoa(s) envolvida(s).
+- Se a pergunta contiver "quais", liste os itens relevantes mencionados no contexto.
+- Se a pergunta contiver "quanto", enumere os resultados e forneça números ou quantidades específicas. Nesse caso, deixe para explicar mais no pensamento e seja econômico na resposta.
+- Lembre-se sempre de filtrar as informações de acordo com o que o usuário informou.
+- Utilize linguagem característica do setor de talent/recursos humanos."""
+
+DATALIA_SYSTEM = f"""Você é um agente de inteligência artificial com o nome de Datalia.
+Seus conhecimentos específicos estão no contexto enviado pelo usuário entre ***.
+Você trabalha na EY, também chamada de Ernst & Young.
+O usuário também trabalha na EY e irá te fazer uma pergunta.
+Seu objetivo é ler essa pergunta, explicar seu pensamento e retornar uma resposta clara e objetiva para o usuário.
+{FORMAT_INSTRUCTIONS}"""
+
+USER_TEMPLATE = "***CONTEXTO: {context}***\n\nA pergunta feita pelo usuário é: {query}"
+
+
+def _compile(template: str) -> Tuple[Tuple[str, str], ...]:
+    # Parses the template once into (literal, field) pairs, so formatting is a single join
+    parts = []
+    for literal, field, format_spec, conversion in string.Formatter().parse(template):
+        if field is not None and (field not in PROMPT_FIELDS or format_spec or conversion):
+            raise ValueError(f"Invalid prompt field: {{{field}}}")
+        parts.append((literal, field))
+    return tuple(parts)
+
+
+class AgentPrompt:
+    """
+    Template de prompt de um agente, compilado uma única vez.
+
+    As mensagens enviadas ao modelo seguem sempre a mesma ordem: mensagem de sistema (estática), histórico da
+    conversa e, por último, a mensagem do usuário com o contexto e a pergunta. A mensagem de sistema é o mesmo
+    objeto em todas as chamadas, de modo que o início do prompt é idêntico entre as requisições e pode ser
+    reaproveitado pelo cache de prefixo do provedor.
+
+    Args:
+        name (str): O nome do agente.
+        system (str): As instruções do agente.
+        user_template (str, opcional): A mensagem do usuário, com os campos {context} e {query}.
+            O padrão é USER_TEMPLATE.
+
+    Raises:
+        ValueError: Se o template do usuário tiver campos diferentes de {context} e {query}.
+    """
+
+    def __init__(self, name: str, system: str, user_template: str = USER_TEMPLATE) -> None:
+        self.name = name
+        self.system_message = SystemMessage(content=system)
+        self.prefix_tokens = count_tokens(system)
+        self._user_parts = _compile(user_template)
+
+    def format_user(self, query: str, context: str) -> str:
+        """
+        Monta a mensagem do usuário com o contexto e a pergunta.
+
+        Args:
+            query (str): A pergunta feita pelo usuário.
+            context (str): O conteúdo dos documentos recuperados.
+
+        Returns:
+            str: A mensagem do usuário.
+        """
+
+        values = {"query": query, "context": context}
+        return "".join(literal + (values[field] if field else "") for literal, field in self._user_parts)
+
+    def format_messages(self, query: str, context: str, history: Sequence[BaseMessage] = ()) -> List[BaseMessage]:
+        """
+        Monta as mensagens enviadas ao modelo.
+
+        Args:
+            query (str): A pergunta feita pelo usuário.
+            context (str): O conteúdo dos documentos recuperados.
+            history (Sequence[BaseMessage], opcional): As mensagens anteriores da conversa.
+
+        Returns:
+            List[BaseMessage]: A mensagem de sistema, o histórico e a mensagem do usuário.
+        """
+
+        return [self.system_message, *history, HumanMessage(content=self.format_user(query, context))]
+
+
+_PROMPTS: Dict[str, AgentPrompt] = {}
+
+
+def register_prompt(prompt: AgentPrompt) -> None:
+    """
+    Registra o template de prompt de um agente, substituindo um template com o mesmo nome.
+
+    Args:
+        prompt (AgentPrompt): O template.
+    """
+
+    _PROMPTS[prompt.name] = prompt
+
+
+def agent_names() -> List[str]:
+    """
+    Retorna os nomes dos agentes com template registrado.
+
+    Returns:
+        List[str]: Os nomes, em ordem alfabética.
+    """
+
+    return sorted(_PROMPTS)
+
+
+def get_prompt(name: str) -> AgentPrompt:
+    """
+    Retorna o template de prompt de um agente.
+
+    Args:
+        name (str): O nome do agente (ex.: 'vitoria', 'datalia').
+
+    Returns:
+        AgentPrompt: O template registrado.
+
+    Raises:
+        ValueError: Se não houver template registrado com o nome.
+    """
+
+    try:
+        return _PROMPTS[name]
+    except KeyError:
+        raise ValueError(f"Unknown agent prompt: {name}") from None
+
+
+register_prompt(AgentPrompt("vitoria", VITORIA_SYSTEM))
+register_prompt(AgentPrompt("datalia", DATALIA_SYSTEM))
@@ -1,21 +1,21 @@
-from typing import List, Dict
-from langchain_community.document_loaders import PyPDFLoader
+from typing import Iterator, List, Dict
 from langchain_community.docstore.document import Document
+from src.backend.rag.pdf_reader import iter_pdf_pages
+from src.backend.rag.tabular import iter_table_chunks
 
 
-def load_pdf(path: str) -> List[Document]:
+def load_pdf(path: str) -> Iterator[Document]:
     """
-    Carrega um documento PDF e o retorna como uma lista de objetos Document.
+    Carrega um documento PDF, uma página por vez (ver `iter_pdf_pages`).
 
     Args:
         path (str): O caminho para o arquivo PDF.
 
     Returns:
-        List[Document]: Uma lista contendo os documentos carregados.
+        Iterator[Document]: As páginas do documento, à medida que são extraídas.
     """
 
-    loader = PyPDFLoader(path)
-    return loader.load()
+    return iter_pdf_pages(path)
 
 def read_txt_file(path: str) -> List[Document]:
     """
@@ -30,21 +30,32 @@ def read_txt_file(path: str) -> List[Document]:
 
     with open(path, 'r', encoding='utf-8') as file:
         lines = file.read()
-        document = [Document(lines)]
+        document = [Document(page_content=lines, metadata={'source': path})]
     return document
 
-def read_csv_file(path: str) -> List[Document]:
+def read_csv_file(path: str) -> Iterator[Document]:
     """
-    Lê um arquivo CSV e retorna seu conteúdo como uma lista de objetos Document.
+    Lê um arquivo CSV em fluxo e o divide em chunks de linhas inteiras, com o cabeçalho (ver `iter_table_chunks`).
 
     Args:
         path (str): O caminho para o arquivo CSV.
 
     Returns:
-        List[Document]: Uma lista contendo o documento lido.
+        Iterator[Document]: Os chunks do arquivo, já prontos para indexação.
     """
-    
-    with open(path, 'r') as file:
-        data = file.read()
-        document = [Document(data)]
-    return document
+
+    return iter_table_chunks(path)
+
+def read_excel_file(path: str) -> Iterator[Document]:
+    """
+    Lê um arquivo .xlsx ou .xls em fluxo e divide cada planilha em chunks de linhas inteiras, com o cabeçalho
+    (ver `iter_table_chunks`).
+
+    Args:
+        path (str): O caminho para o arquivo.
+
+    Returns:
+        Iterator[Document]: Os chunks do arquivo, já prontos para indexação.
+    """
+
+    return iter_table_chunks(path)
@@ -0,0 +1,152 @@
+import os
+import json
+from typing import Dict, List, NamedTuple, Optional, Sequence
+import numpy as np
+from dotenv import load_dotenv
+from loguru import logger
+from langchain.docstore.document import Document
+from src.backend.vector_store.bm25 import tokenize
+
+load_dotenv()
+
+
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "true").lower() == "true"
+# Documents fetched from the vector store before re-ranking
+RETRIEVAL_CANDIDATES = int(os.getenv("RETRIEVAL_CANDIDATES", "20"))
+# Documents kept after re-ranking (the context builder then applies the token budget)
+RETRIEVAL_TOP_N = int(os.getenv("RETRIEVAL_TOP_N", "5"))
+# Overrides of any RetrievalConfig field, per index name or for all indexes under "default", ex.:
+# {"default": {"top_n": 4}, "rh-index": {"candidates": 30, "source_priors": {"politica": 0.1}}}
+RETRIEVAL_CONFIG = os.getenv("RETRIEVAL_CONFIG", "")
+
+
+class RetrievalConfig(NamedTuple):
+    """
+    Parâmetros da busca em dois estágios de um índice.
+    """
+
+    candidates: int = RETRIEVAL_CANDIDATES
+    top_n: int = RETRIEVAL_TOP_N
+    lexical_weight: float = 0.35
+    # Only used with the vectors stored in a local store or mirror; the candidates are never embedded again
+    vector_weight: float = 0.35
+    rank_weight: float = 0.2
+    page_weight: float = 0.1
+    # Score added to the documents whose source contains the key
+    source_priors: Dict[str, float] = {}
+
+
+def _load_overrides() -> Dict[str, Dict]:
+    if not RETRIEVAL_CONFIG:
+        return {}
+    try:
+        overrides = json.loads(RETRIEVAL_CONFIG)
+    except ValueError as e:
+        logger.error(f"Invalid RETRIEVAL_CONFIG, using the defaults: {e}")
+        return {}
+    return overrides if isinstance(overrides, dict) else {}
+
+
+_OVERRIDES = _load_overrides()
+_CONFIGS: Dict[str, RetrievalConfig] = {}
+
+
+def get_retrieval_config(index_name: str) -> RetrievalConfig:
+    """
+    Retorna os parâmetros da busca de um índice: os padrões, as substituições de "default" e as do índice
+    em RETRIEVAL_CONFIG, nesta ordem.
+
+    Args:
+        index_name (str): O nome do índice.
+
+    Returns:
+        RetrievalConfig: Os parâmetros do índice.
+    """
+
+    config = _CONFIGS.get(index_name)
+    if config is None:
+        values = {**_OVERRIDES.get("default", {}), **_OVERRIDES.get(index_name, {})}
+        unknown = set(values) - set(RetrievalConfig._fields)
+        if unknown:
+            logger.warning(f"Unknown retrieval settings for {index_name}: {sorted(unknown)}")
+        config = RetrievalConfig(**{key: value for key, value in values.items() if key in RetrievalConfig._fields})
+        _CONFIGS[index_name] = config
+    return config
+
+
+def _page_numbers(docs: Sequence[Document]) -> np.ndarray:
+    pages = np.full(len(docs), np.nan)
+    for i, doc in enumerate(docs):
+        try:
+            pages[i] = float(doc.metadata.get("page"))
+        except (TypeError, ValueError):
+            continue
+    return pages
+
+
+def _min_max(values: np.ndarray) -> np.ndarray:
+    spread = values.max() - values.min()
+    if spread <= 0:
+        return np.zeros_like(values)
+    return (values - values.min()) / spread
+
+
+def rerank(query: str, docs: List[Document], config: RetrievalConfig, query_vector: Optional[List[float]] = None,
+           doc_vectors: Optional[np.ndarray] = None) -> List[Document]:
+    """
+    Reordena os documentos candidatos com uma pontuação local e barata e mantém os `top_n` melhores.
+
+    A pontuação é a soma ponderada de:
+    - cobertura lexical: a fração dos termos da consulta presentes no documento, ponderada pelo IDF calculado
+      entre os candidatos (termos raros entre eles valem mais);
+    - similaridade de cosseno entre os vetores da consulta e do documento, normalizada entre os candidatos
+      (apenas quando os vetores são informados);
+    - posição do documento na busca original;
+    - prior de página: as primeiras páginas de um documento têm um pequeno bônus;
+    - prior de fonte: o bônus de `source_priors` cuja chave aparece na fonte do documento.
+
+    Todos os termos são calculados de uma vez para os candidatos com NumPy.
+
+    Args:
+        query (str): A consulta.
+        docs (List[Document]): Os candidatos, na ordem da busca.
+        config (RetrievalConfig): Os pesos e o número de documentos mantidos.
+        query_vector (List[float], opcional): O vetor da consulta.
+        doc_vectors (np.ndarray, opcional): Os vetores dos candidatos, na mesma ordem.
+
+    Returns:
+        List[Document]: Os `top_n` documentos, do mais para o menos relevante.
+    """
+
+    n = len(docs)
+    if n <= 1:
+        return docs[:config.top_n]
+
+    scores = config.rank_weight / np.arange(1, n + 1)
+
+    query_terms = list(dict.fromkeys(tokenize(query)))
+    if query_terms and config.lexical_weight:
+        doc_terms = [set(tokenize(doc.page_content)) for doc in docs]
+        matches = np.array([[term in terms for term in query_terms] for terms in doc_terms], dtype=np.float32)
+        frequency = matches.sum(axis=0)
+        idf = np.where(frequency > 0, np.log1p(n / np.maximum(frequency, 1)), 0.0)
+        if idf.sum() > 0:
+            scores += config.lexical_weight * (matches @ idf) / idf.sum()
+
+    if query_vector is not None and doc_vectors is not None and config.vector_weight:
+        vectors = np.asarray(doc_vectors, dtype=np.float32)
+        query_array = np.asarray(query_vector, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1) * np.linalg.norm(query_array)
+        cosine = (vectors @ query_array) / np.maximum(norms, 1e-12)
+        scores += config.vector_weight * _min_max(cosine)
+
+    if config.page_weight:
+        pages = _page_numbers(docs)
+        known = ~np.isnan(pages)
+        scores[known] += config.page_weight / (1 + np.log1p(np.maximum(pages[known], 0)))
+
+    for key, prior in config.source_priors.items():
+        scores += prior * np.array([key in str(doc.metadata.get("source", "")) for doc in docs])
+
+    order = np.argsort(-scores, kind="stable")[:config.top_n]
+    return [docs[i] for i in order]
@@ -0,0 +1,208 @@
+import os
+import time
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from loguru import logger
+from src.backend.utils.utils import folders
+
+load_dotenv()
+
+
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.97"))
+SEMANTIC_CACHE_TTL = int(os.getenv("SEMANTIC_CACHE_TTL", "3600"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "500"))
+
+
+def _normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def _generation_file(index_name: str) -> str:
+    return os.path.join(folders.CACHE, f"{index_name}.generation")
+
+
+def mark_index_updated(index_name: str) -> None:
+    """
+    Sinaliza que o índice foi reingerido, invalidando as respostas em cache de todos os processos do host.
+
+    A sinalização é feita por um arquivo de geração por índice, cujo mtime é comparado pelos
+    workers da aplicação a cada consulta. O arquivo é local: nos demais hosts, uma reconstrução completa
+    invalida o cache pela troca do alias (ver `SemanticCache.lookup`), mas as respostas anteriores a uma
+    atualização incremental continuam válidas até expirar o SEMANTIC_CACHE_TTL.
+
+    Args:
+        index_name (str): O nome do índice que foi atualizado.
+    """
+
+    os.makedirs(folders.CACHE, exist_ok=True)
+    with open(_generation_file(index_name), 'w', encoding='utf8') as f:
+        f.write(str(time.time()))
+
+
+class SemanticCache:
+    """
+    Cache de respostas do agente indexado pelo embedding da pergunta.
+
+    Uma pergunta é considerada repetida quando a similaridade de cosseno entre o seu embedding e o de uma
+    pergunta já respondida no mesmo índice e com o mesmo escopo (ex.: os filtros da busca) é maior ou igual ao
+    limiar configurado. As entradas expiram após o TTL e, ao atingir o tamanho máximo, as menos usadas
+    recentemente são descartadas.
+
+    Args:
+        threshold (float): Similaridade de cosseno mínima para considerar um acerto.
+        ttl (int): Tempo de vida de cada entrada, em segundos.
+        max_entries (int): Número máximo de entradas por índice e escopo.
+    """
+
+    def __init__(self, threshold: float = SEMANTIC_CACHE_THRESHOLD, ttl: int = SEMANTIC_CACHE_TTL,
+                 max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES) -> None:
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # Keyed by (index name, scope)
+        self._entries: Dict[Tuple[str, str], OrderedDict] = {}
+        self._matrices: Dict[Tuple[str, str], Tuple[List[str], np.ndarray]] = {}
+        # Index name -> (mtime of the generation file, index version)
+        self._generations: Dict[str, Tuple[Optional[int], str]] = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, index_name: str, query: str, query_vector: Optional[List[float]] = None,
+               scope: str = "", version: str = "") -> Optional[Tuple[str, str]]:
+        """
+        Procura uma resposta em cache para a pergunta.
+
+        A pergunta idêntica (ignorando caixa e espaços) é resolvida sem embedding; caso contrário é feita
+        a busca por similaridade, se o vetor da pergunta for informado.
+
+        As respostas de um índice são descartadas quando a sua versão muda, ex.: quando o alias passa a apontar
+        para o índice físico de uma reconstrução, o que todos os hosts da aplicação observam.
+
+        Args:
+            index_name (str): O índice consultado.
+            query (str): A pergunta do usuário.
+            query_vector (List[float], opcional): O embedding da pergunta.
+            scope (str, opcional): O escopo da busca (ex.: `SearchFilters.cache_key()`). O padrão é "".
+            version (str, opcional): A versão do índice (ex.: o índice físico do alias). O padrão é "".
+
+        Returns:
+            Optional[Tuple[str, str]]: A tupla (resposta, pensamento) em cache ou None.
+        """
+
+        namespace = (index_name, scope)
+        with self._lock:
+            self._check_generation(index_name, version)
+            entries = self._entries.get(namespace)
+            if not entries:
+                return None
+
+            self._evict_expired(namespace)
+
+            key = _normalize_query(query)
+            if key not in entries and query_vector is not None and entries:
+                keys, matrix = self._get_matrix(namespace)
+                scores = matrix @ self._unit(query_vector)
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    key = keys[best]
+
+            entry = entries.get(key)
+            if entry is None:
+                return None
+
+            entries.move_to_end(key)
+            return entry["resposta"], entry["pensamento"]
+
+    def store(self, index_name: str, query: str, query_vector: List[float], resposta: str, pensamento: str,
+              scope: str = "", version: str = "") -> None:
+        """
+        Armazena a resposta gerada para a pergunta.
+
+        Args:
+            index_name (str): O índice consultado.
+            query (str): A pergunta do usuário.
+            query_vector (List[float]): O embedding da pergunta.
+            resposta (str): A resposta do agente.
+            pensamento (str): O pensamento do agente.
+            scope (str, opcional): O escopo da busca (ex.: `SearchFilters.cache_key()`). O padrão é "".
+            version (str, opcional): A versão do índice (ex.: o índice físico do alias). O padrão é "".
+        """
+
+        namespace = (index_name, scope)
+        with self._lock:
+            self._check_generation(index_name, version)
+            entries = self._entries.setdefault(namespace, OrderedDict())
+            entries[_normalize_query(query)] = {
+                "vector": self._unit(query_vector),
+                "resposta": resposta,
+                "pensamento": pensamento,
+                "created_at": time.time(),
+            }
+            entries.move_to_end(_normalize_query(query))
+
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+
+            self._matrices.pop(namespace, None)
+
+    def invalidate(self, index_name: Optional[str] = None) -> None:
+        """
+        Descarta as respostas em cache de um índice (ou de todos, se nenhum for informado).
+
+        Args:
+            index_name (str, opcional): O índice a ser invalidado.
+        """
+
+        with self._lock:
+            if index_name is None:
+                self._entries.clear()
+                self._matrices.clear()
+            else:
+                self._drop_index(index_name)
+
+    def _check_generation(self, index_name: str, version: str) -> None:
+        try:
+            generation = (os.stat(_generation_file(index_name)).st_mtime_ns, version)
+        except OSError:
+            generation = (None, version)
+
+        if index_name in self._generations and self._generations[index_name] != generation:
+            logger.info(f"Index {index_name} was re-ingested, clearing semantic cache")
+            self._drop_index(index_name)
+
+        self._generations[index_name] = generation
+
+    def _drop_index(self, index_name: str) -> None:
+        # All scopes of the index
+        for namespace in [namespace for namespace in self._entries if namespace[0] == index_name]:
+            self._entries.pop(namespace, None)
+            self._matrices.pop(namespace, None)
+
+    def _evict_expired(self, namespace: Tuple[str, str]) -> None:
+        entries = self._entries[namespace]
+        now = time.time()
+        expired = [key for key, entry in entries.items() if now - entry["created_at"] > self.ttl]
+        for key in expired:
+            del entries[key]
+        if expired:
+            self._matrices.pop(namespace, None)
+
+    def _get_matrix(self, namespace: Tuple[str, str]) -> Tuple[List[str], np.ndarray]:
+        if namespace not in self._matrices:
+            entries = self._entries[namespace]
+            keys = list(entries.keys())
+            matrix = np.vstack([entries[key]["vector"] for key in keys])
+            self._matrices[namespace] = (keys, matrix)
+        return self._matrices[namespace]
+
+    @staticmethod
+    def _unit(vector: List[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        return array / norm if norm else array
+
+
+semantic_cache = SemanticCache()
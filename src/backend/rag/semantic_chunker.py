@@ -0,0 +1,206 @@
+import re
+import hashlib
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from langchain.docstore.document import Document
+from src.backend.rag.token_chunker import CHUNK_TOKEN_ENCODING, get_encoding, token_windows
+
+
+# Offsets are positions in the pages of a source joined by this separator
+PAGE_SEPARATOR = "\n\n"
+PARAGRAPH_BREAK = re.compile(r"\n[ \t]*\n\s*")
+MARKDOWN_HEADING = re.compile(r"^#{1,6}\s+(.+)$")
+# "3.2", "3.2." and "12." are section numbers; a bare number is only accepted with one digit ("3 Férias"), as
+# wrapped lines often start with quantities and years ("30 dias de férias", "2024 foi o ano base")
+NUMBERED_HEADING = re.compile(r"^(\d+(\.\d+)+\.?|\d+\.|\d|[IVXLC]+\.)\s+(?P<title>\S.*)$")
+# The keyword is followed by its number or letter ("Anexo 1", "CAPÍTULO II", "Parte A")
+KEYWORD_HEADING = re.compile(r"^(?i:cap[ií]tulo|se[cç][aã]o|anexo|t[ií]tulo|parte)\s+(\d+|[IVXLC]+|[A-Z])\b")
+MAX_HEADING_CHARS = 120
+MAX_HEADING_WORDS = 12
+
+
+def heading_title(line: str) -> Optional[str]:
+    """
+    Reconhece uma linha de título: Markdown ("# Férias"), numerada ("3.2 Férias coletivas"), com palavra-chave
+    ("CAPÍTULO II", "Anexo 1") ou curta e toda em maiúsculas ("POLÍTICA DE FÉRIAS").
+
+    Títulos numerados e com palavra-chave começam com maiúscula e têm no máximo MAX_HEADING_WORDS palavras, de
+    modo que linhas quebradas de um parágrafo ("30 dias de férias corridos", "1 salário mínimo por dependente")
+    não são tomadas por títulos.
+
+    Args:
+        line (str): A linha.
+
+    Returns:
+        Optional[str]: O título, ou None se a linha não for um título.
+    """
+
+    line = line.strip()
+    if not line or len(line) > MAX_HEADING_CHARS:
+        return None
+
+    match = MARKDOWN_HEADING.match(line)
+    if match:
+        return match.group(1).strip()
+
+    # Items of numbered lists and sentences end with punctuation, titles usually do not
+    if line[-1] in ".,;:" or len(line.split()) > MAX_HEADING_WORDS:
+        return None
+
+    match = NUMBERED_HEADING.match(line)
+    if match:
+        return line if match.group("title")[0].isupper() else None
+
+    if KEYWORD_HEADING.match(line):
+        return line
+
+    letters = [char for char in line if char.isalpha()]
+    if len(letters) >= 4 and all(char.isupper() for char in letters):
+        return line
+
+    return None
+
+
+def _blocks(text: str) -> Iterator[Tuple[int, int, Optional[str]]]:
+    # Paragraphs of a page as (start, end, title); a title line is a block of its own
+    position = 0
+    for separator in [*PARAGRAPH_BREAK.finditer(text), None]:
+        end = separator.start() if separator else len(text)
+        block_start = position
+        line_start = position
+        for line in text[position:end].split("\n"):
+            title = heading_title(line)
+            if title is not None:
+                if text[block_start:line_start].strip():
+                    yield block_start, line_start, None
+                yield line_start, line_start + len(line), title
+                block_start = line_start + len(line) + 1
+            line_start += len(line) + 1
+        if text[block_start:end].strip():
+            yield block_start, end, None
+        position = separator.end() if separator else len(text)
+
+
+class _Chunk:
+
+    def __init__(self) -> None:
+        self.parts: List[str] = []
+        self.tokens = 0
+        self.char_start = self.char_end = 0
+        self.page_start = self.page_end = None
+        self.title_only = False
+
+    def add(self, text: str, tokens: int, char_start: int, char_end: int, page) -> None:
+        if not self.parts:
+            self.char_start = char_start
+            self.page_start = page
+        self.title_only = False
+        self.parts.append(text)
+        self.tokens += tokens
+        self.char_end = char_end
+        self.page_end = page
+
+
+def iter_semantic_chunks(documents: Iterable[Document], chunk_size: int = 500, chunk_overlap: int = 100,
+                         encoding_name: str = CHUNK_TOKEN_ENCODING) -> Iterator[Document]:
+    """
+    Divide documentos em chunks que seguem a estrutura do texto: títulos e parágrafos.
+
+    Os parágrafos (separados por linhas em branco) são agrupados, na ordem, até `chunk_size` tokens; um título
+    sempre inicia um novo chunk e passa a ser a seção dos chunks seguintes; títulos consecutivos ficam no mesmo
+    chunk, junto com o texto que os segue, e nunca formam um chunk sozinhos. Um parágrafo maior que `chunk_size`
+    é dividido em janelas de tokens com `chunk_overlap` tokens de sobreposição (a primeira janela leva o título
+    que a precede, se houver). As páginas consecutivas de uma mesma fonte são tratadas como um único texto, de
+    modo que um chunk pode cruzar páginas.
+
+    Os documentos são processados à medida que chegam. Cada chunk recebe em `metadata`:
+    - `source`: o arquivo de origem;
+    - `page`, `page_start` e `page_end`: as páginas em que o chunk começa e termina;
+    - `section`: o último título antes do chunk (vazio se não houver);
+    - `char_start` e `char_end`: a posição do chunk no texto da fonte (as páginas unidas por PAGE_SEPARATOR);
+    - `token_count`: o número de tokens do chunk;
+    - `chunk_id`: um identificador estável, derivado da fonte, da seção e do conteúdo, que não muda quando
+      outras partes do arquivo são alteradas.
+
+    Args:
+        documents (Iterable[Document]): Os documentos (ex.: as páginas de um PDF), na ordem.
+        chunk_size (int, opcional): O tamanho máximo de um chunk, em tokens. O padrão é 500.
+        chunk_overlap (int, opcional): A sobreposição entre as partes de um parágrafo longo. O padrão é 100.
+        encoding_name (str, opcional): A codificação do tiktoken. O padrão é CHUNK_TOKEN_ENCODING.
+
+    Yields:
+        Document: Os chunks, na ordem do texto.
+    """
+
+    encoding = get_encoding(encoding_name)
+    source = None
+    offset = 0
+    section = ""
+    chunk = _Chunk()
+    seen: Dict[str, int] = {}
+
+    def flush() -> Iterator[Document]:
+        nonlocal chunk
+        if chunk.parts:
+            text = "\n\n".join(chunk.parts)
+            key = hashlib.sha256(f"{source}|{section}|{text}".encode('utf-8')).hexdigest()
+            # Identical chunks of the same source (ex.: repeated disclaimers) get distinct IDs
+            seen[key] = seen.get(key, 0) + 1
+            if seen[key] > 1:
+                key = hashlib.sha256(f"{key}|{seen[key]}".encode('utf-8')).hexdigest()
+            yield Document(page_content=text, metadata={
+                "source": source,
+                "page": chunk.page_start,
+                "page_start": chunk.page_start,
+                "page_end": chunk.page_end,
+                "section": section,
+                "char_start": chunk.char_start,
+                "char_end": chunk.char_end,
+                "token_count": len(encoding.encode_ordinary(text)),
+                "chunk_id": key,
+            })
+        chunk = _Chunk()
+
+    for document in documents:
+        if document.metadata.get("source") != source:
+            yield from flush()
+            source, offset, section, seen = document.metadata.get("source"), 0, "", {}
+
+        page = document.metadata.get("page")
+        text = document.page_content
+        blocks = [(start, end, title) for start, end, title in _blocks(text)]
+        encoded = encoding.encode_ordinary_batch([text[start:end].strip() for start, end, _ in blocks])
+
+        for (start, end, title), tokens in zip(blocks, encoded):
+            block = text[start:end].strip()
+            char_start, char_end = offset + start, offset + end
+
+            if title is not None:
+                # Consecutive titles ("CAPÍTULO II", then "2.1 Férias") stay together until the next body
+                if not chunk.title_only:
+                    yield from flush()
+                section = title
+                chunk.add(block, len(tokens), char_start, char_end, page)
+                chunk.title_only = True
+                continue
+
+            if len(tokens) > chunk_size:
+                # A title stays with the first window of its paragraph; the last window stays open for the next blocks
+                if not chunk.title_only:
+                    yield from flush()
+                starts, ends = token_windows(len(tokens), chunk_size, chunk_overlap)
+                for i, (window_start, window_end) in enumerate(zip(starts.tolist(), ends.tolist())):
+                    if i:
+                        yield from flush()
+                    prefix = len(encoding.decode_bytes(tokens[:window_start]).decode('utf-8', errors='ignore'))
+                    part = encoding.decode(tokens[window_start:window_end])
+                    chunk.add(part, window_end - window_start, char_start + prefix,
+                              char_start + prefix + len(part), page)
+                continue
+
+            if chunk.parts and not chunk.title_only and chunk.tokens + len(tokens) > chunk_size:
+                yield from flush()
+            chunk.add(block, len(tokens), char_start, char_end, page)
+
+        offset += len(text) + len(PAGE_SEPARATOR)
+
+    yield from flush()
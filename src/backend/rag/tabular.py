@@ -0,0 +1,182 @@
+import os
+import csv
+from datetime import date, datetime, time
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Tuple
+from dotenv import load_dotenv
+from langchain.docstore.document import Document
+
+load_dotenv()
+
+
+TABULAR_EXTENSIONS = ('.csv', '.xlsx', '.xls')
+# A chunk is closed at whichever limit comes first; a single larger row still becomes one chunk
+TABLE_ROWS_PER_CHUNK = int(os.getenv("TABLE_ROWS_PER_CHUNK", "50"))
+TABLE_CHUNK_TOKENS = int(os.getenv("TABLE_CHUNK_TOKENS", "500"))
+TABLE_COLUMN_SEPARATOR = " | "
+CSV_DELIMITERS = ",;\t|"
+CSV_SAMPLE_BYTES = 64 * 1024
+
+
+def _format_value(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, datetime):
+        return value.date().isoformat() if value.time() == time() else value.isoformat(sep=" ")
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    return " ".join(str(value).split())
+
+
+def _detect_encoding(path: str) -> str:
+    with open(path, 'rb') as f:
+        sample = f.read(CSV_SAMPLE_BYTES)
+    try:
+        sample.decode('utf-8-sig')
+        return 'utf-8-sig'
+    except UnicodeDecodeError as e:
+        # A multi-byte character cut at the end of the sample is still UTF-8
+        if e.start >= len(sample) - 3:
+            return 'utf-8-sig'
+        # Spreadsheet exports in Portuguese are usually Windows-1252
+        return 'cp1252'
+
+
+def iter_csv_rows(path: str) -> Iterator[Tuple[str, List[str]]]:
+    """
+    Lê as linhas de um CSV uma a uma, sem carregar o arquivo inteiro.
+
+    A codificação (UTF-8 ou Windows-1252) e o delimitador (vírgula, ponto e vírgula, tabulação ou barra vertical)
+    são detectados a partir do início do arquivo.
+
+    Args:
+        path (str): O caminho do arquivo CSV.
+
+    Yields:
+        Tuple[str, List[str]]: O nome da tabela (vazio para CSV) e os valores de cada linha, a começar pelo cabeçalho.
+    """
+
+    with open(path, 'r', encoding=_detect_encoding(path), newline='') as f:
+        sample = f.read(CSV_SAMPLE_BYTES)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=CSV_DELIMITERS)
+        except csv.Error:
+            dialect = csv.excel
+        for row in csv.reader(f, dialect):
+            yield "", row
+
+
+def iter_excel_rows(path: str) -> Iterator[Tuple[str, Sequence[Any]]]:
+    """
+    Lê as linhas de todas as planilhas de um arquivo .xlsx (openpyxl, modo somente leitura) ou .xls (xlrd).
+
+    Args:
+        path (str): O caminho do arquivo.
+
+    Yields:
+        Tuple[str, Sequence[Any]]: O nome da planilha e os valores de cada linha, a começar pelo cabeçalho de
+        cada planilha.
+    """
+
+    if path.lower().endswith('.xls'):
+        import xlrd
+
+        workbook = xlrd.open_workbook(path, on_demand=True)
+        try:
+            for sheet_name in workbook.sheet_names():
+                sheet = workbook.sheet_by_name(sheet_name)
+                for number in range(sheet.nrows):
+                    row = []
+                    for cell in sheet.row(number):
+                        if cell.ctype == xlrd.XL_CELL_DATE:
+                            row.append(xlrd.xldate.xldate_as_datetime(cell.value, workbook.datemode))
+                        else:
+                            row.append(cell.value)
+                    yield sheet_name, row
+                workbook.unload_sheet(sheet_name)
+        finally:
+            workbook.release_resources()
+        return
+
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            for row in sheet.iter_rows(values_only=True):
+                yield sheet.title, row
+    finally:
+        workbook.close()
+
+
+def _chunk(path: str, table: str, header: List[str], rows: List[str], first_row: int, last_row: int) -> Document:
+    text = "\n".join([TABLE_COLUMN_SEPARATOR.join(header), *rows])
+    metadata = {'source': path, 'row_start': first_row, 'row_end': last_row}
+    if table:
+        metadata['sheet'] = table
+    return Document(page_content=text, metadata=metadata)
+
+
+def iter_table_chunks(path: str, rows_per_chunk: int = TABLE_ROWS_PER_CHUNK,
+                      max_tokens: int = TABLE_CHUNK_TOKENS) -> Iterator[Document]:
+    """
+    Divide um arquivo tabular (CSV, .xlsx ou .xls) em chunks de linhas inteiras, lendo as linhas em fluxo.
+
+    Cada chunk começa com o cabeçalho da tabela, seguido de até `rows_per_chunk` linhas ou de aproximadamente
+    `max_tokens` tokens, o que vier primeiro; uma linha nunca é dividida entre chunks. Linhas vazias são
+    ignoradas. Em `metadata` ficam o arquivo (`source`), a planilha (`sheet`, em .xlsx e .xls) e o intervalo de
+    linhas do chunk (`row_start` e `row_end`), numeradas como na planilha (o cabeçalho é a linha 1).
+
+    Args:
+        path (str): O caminho do arquivo.
+        rows_per_chunk (int, opcional): O número máximo de linhas por chunk. O padrão é TABLE_ROWS_PER_CHUNK.
+        max_tokens (int, opcional): O tamanho aproximado máximo de um chunk. O padrão é TABLE_CHUNK_TOKENS.
+
+    Yields:
+        Document: Os chunks, na ordem do arquivo.
+    """
+
+    rows: Iterable[Tuple[str, Sequence[Any]]] = (
+        iter_csv_rows(path) if path.lower().endswith('.csv') else iter_excel_rows(path)
+    )
+
+    table: Optional[str] = None
+    header: List[str] = []
+    buffer: List[str] = []
+    size = header_size = 0
+    first_row = last_row = row_number = 0
+
+    for row_table, values in rows:
+        if row_table != table:
+            if buffer:
+                yield _chunk(path, table, header, buffer, first_row, last_row)
+            table, header, buffer, size, row_number = row_table, [], [], 0, 0
+
+        row_number += 1
+        cells = [_format_value(value) for value in values]
+        if not any(cells):
+            continue
+        while not cells[-1]:
+            cells.pop()
+
+        if not header:
+            header = cells
+            header_size = len(TABLE_COLUMN_SEPARATOR.join(header)) // 4
+            continue
+
+        line = TABLE_COLUMN_SEPARATOR.join(cells)
+        line_size = len(line) // 4 + 1
+        if buffer and (len(buffer) >= rows_per_chunk or header_size + size + line_size > max_tokens):
+            yield _chunk(path, table, header, buffer, first_row, last_row)
+            buffer, size = [], 0
+
+        if not buffer:
+            first_row = row_number
+        buffer.append(line)
+        size += line_size
+        last_row = row_number
+
+    if buffer:
+        yield _chunk(path, table, header, buffer, first_row, last_row)
@@ -0,0 +1,110 @@
+import os
+from functools import lru_cache
+from typing import Iterable, Iterator, List, Tuple
+import numpy as np
+import tiktoken
+from dotenv import load_dotenv
+from langchain.docstore.document import Document
+
+load_dotenv()
+
+
+# The tokenizer of the chat and embedding models, so token_count is also valid for prompt budgeting.
+# "gpt2" reproduces the chunks of LangChain's TokenTextSplitter.
+CHUNK_TOKEN_ENCODING = os.getenv("CHUNK_TOKEN_ENCODING", "cl100k_base")
+CHUNK_ENCODE_THREADS = int(os.getenv("CHUNK_ENCODE_THREADS", str(min(8, os.cpu_count() or 1))))
+
+
+@lru_cache(maxsize=None)
+def get_encoding(name: str = CHUNK_TOKEN_ENCODING) -> tiktoken.Encoding:
+    """
+    Retorna o tokenizador tiktoken, carregado uma única vez por processo.
+
+    Args:
+        name (str, opcional): O nome da codificação. O padrão é CHUNK_TOKEN_ENCODING.
+
+    Returns:
+        tiktoken.Encoding: O tokenizador.
+    """
+
+    return tiktoken.get_encoding(name)
+
+
+def token_windows(n_tokens: int, chunk_size: int, chunk_overlap: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Calcula as janelas de tokens de um documento: cada uma tem até `chunk_size` tokens e começa `chunk_size -
+    chunk_overlap` tokens depois da anterior; a última termina no fim do documento.
+
+    Args:
+        n_tokens (int): O número de tokens do documento.
+        chunk_size (int): O tamanho máximo de uma janela.
+        chunk_overlap (int): O número de tokens repetidos entre janelas vizinhas.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: O início e o fim (exclusivo) de cada janela.
+
+    Raises:
+        ValueError: Se a sobreposição não for menor que o tamanho da janela.
+    """
+
+    step = chunk_size - chunk_overlap
+    if step <= 0:
+        raise ValueError(f"chunk_overlap ({chunk_overlap}) must be smaller than chunk_size ({chunk_size})")
+
+    if n_tokens == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    count = 1 if n_tokens <= chunk_size else -(-(n_tokens - chunk_size) // step) + 1
+    starts = np.arange(count, dtype=np.int64) * step
+    return starts, np.minimum(starts + chunk_size, n_tokens)
+
+
+def iter_token_chunks(documents: Iterable[Document], chunk_size: int = 500, chunk_overlap: int = 100,
+                      encoding_name: str = CHUNK_TOKEN_ENCODING,
+                      threads: int = CHUNK_ENCODE_THREADS) -> Iterator[Document]:
+    """
+    Divide documentos em chunks de tokens.
+
+    Todos os documentos são codificados de uma vez (`encode_ordinary_batch`, em `threads` threads, já que o
+    tiktoken libera o GIL); cada documento é codificado uma única vez e as janelas são fatias do mesmo array de
+    tokens. O texto de cada chunk só é decodificado quando o chunk é consumido. Cada chunk leva em `metadata`
+    o seu número de tokens (`token_count`), além dos metadados do documento de origem.
+
+    Args:
+        documents (Iterable[Document]): Os documentos.
+        chunk_size (int, opcional): O tamanho máximo de um chunk, em tokens. O padrão é 500.
+        chunk_overlap (int, opcional): O número de tokens repetidos entre chunks vizinhos. O padrão é 100.
+        encoding_name (str, opcional): A codificação do tiktoken. O padrão é CHUNK_TOKEN_ENCODING.
+        threads (int, opcional): O número de threads de codificação. O padrão é CHUNK_ENCODE_THREADS.
+
+    Yields:
+        Document: Os chunks, na ordem dos documentos.
+    """
+
+    documents = list(documents)
+    encoding = get_encoding(encoding_name)
+    encoded = encoding.encode_ordinary_batch([doc.page_content for doc in documents], num_threads=max(1, threads))
+
+    for doc, tokens in zip(documents, encoded):
+        starts, ends = token_windows(len(tokens), chunk_size, chunk_overlap)
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            metadata = dict(doc.metadata)
+            metadata["token_count"] = end - start
+            yield Document(page_content=encoding.decode(tokens[start:end]), metadata=metadata)
+
+
+def split_documents_on_tokens(documents: Iterable[Document], chunk_size: int = 500,
+                              chunk_overlap: int = 100) -> List[Document]:
+    """
+    Versão de `iter_token_chunks` que devolve todos os chunks em uma lista.
+
+    Args:
+        documents (Iterable[Document]): Os documentos.
+        chunk_size (int, opcional): O tamanho máximo de um chunk, em tokens. O padrão é 500.
+        chunk_overlap (int, opcional): O número de tokens repetidos entre chunks vizinhos. O padrão é 100.
+
+    Returns:
+        List[Document]: Os chunks.
+    """
+
+    return list(iter_token_chunks(documents, chunk_size=chunk_size, chunk_overlap=chunk_overlap))
@@ -3,8 +3,9 @@ import uuid
 from flask import Blueprint, request, render_template, make_response, redirect, url_for, session
 import identity.web
 from dotenv import load_dotenv
-from langchain.memory import ConversationBufferWindowMemory
 from src.backend.utils.utils import folders
+from src.backend.rag.conversation_store import conversation_store, conversation_key
+from src.backend.rag.prompts import agent_names
 
 
 load_dotenv()
@@ -51,13 +52,9 @@ def auth_response():
     
     user_id = session.get('user_id')
 
+    # The conversation itself lives in the conversation store, keyed by this ID
     if not user_id:
         session['user_id'] = str(uuid.uuid4())
-        session['messages'] = {
-            "ai": [],
-            "user": []
-        }
-        session['history'] = ConversationBufferWindowMemory(return_messages=True, k=1)
 
     return redirect(url_for("home.show_chat"))
 
@@ -68,9 +65,8 @@ def logout():
     user_id = session.get('user_id')
 
     if user_id:
-        session.pop(user_id, None)
-        session.pop('history')
-        session.pop('messages')
+        for agent in agent_names():
+            conversation_store.clear(conversation_key(user_id, agent))
     
     session.clear()
 
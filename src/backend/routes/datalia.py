@@ -1,12 +1,70 @@
-from flask import Blueprint
+import os
+from flask import Blueprint, request, jsonify, session
+from src.backend.rag.chains import run_query_on_docs
+from src.backend.rag.conversation_store import conversation_store, conversation_key
+from src.backend.vector_store.filters import parse_filters
 from src.backend.utils.utils import folders
+from src.backend.utils.conversation_log import conversation_log
+from dotenv import load_dotenv
+from loguru import logger
+
+load_dotenv()
 
 
 bp = Blueprint("datalia_agent", __name__, template_folder=folders.TEMPLATES,
                 static_folder=folders.STATIC)
 
 
+# The agent searches the same index as Vitória unless it has one of its own
+INDEX = os.getenv("DATALIA_INDEX", os.getenv("INDEX"))
+AGENT = "datalia"
+
+
 @bp.route('/agente2')
 def datalia():
     return "Você escolheu Agente 2!"
 
+
+@bp.route('/agente2/query', methods=['POST'])
+def query_datalia():
+    """
+    Envia uma consulta para a agente Datalia e retorna a resposta.
+
+    Método HTTP:
+        POST
+
+    Dados de entrada:
+        JSON contendo 'query' e, opcionalmente, 'filters' (ver `query_vitoria`).
+
+    Respostas:
+        200: Retorna a resposta do chatbot e o pensamento do agente.
+        400: Requisição inválida (dados faltando, filtros inválidos ou usuário não autenticado).
+        500: Erro interno do servidor.
+    """
+
+    try:
+        data = request.json
+        query = data.get('query')
+
+        if not query:
+            return jsonify({'error': 'Query is required'}), 400
+
+        try:
+            filters = parse_filters(data.get('filters'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        user = session.get('user_id')
+
+        if not user:
+            return jsonify({'error': 'User ID is required'}), 400
+
+        resp, pensamento = run_query_on_docs(query, history=conversation_store.memory(conversation_key(user, AGENT)),
+                                             index_name=INDEX, agent=AGENT, filters=filters)
+
+        conversation_log.log(user, query, resp, pensamento, agent=AGENT)
+
+        return jsonify({'response': resp, 'thought': pensamento})
+    except Exception as e:
+        logger.error(f"agente2: An error occurred: {e}")
+        return jsonify({'error': str(e)}), 500
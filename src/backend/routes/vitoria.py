@@ -1,7 +1,11 @@
 import os
-from flask import Blueprint, request, jsonify, render_template, session, redirect, url_for
-from src.backend.rag.chains import run_query_on_docs
-from src.backend.utils.utils import folders, save_messages_from_session
+import json
+from flask import Blueprint, request, jsonify, render_template, session, redirect, url_for, Response, stream_with_context
+from src.backend.rag.chains import run_query_on_docs, arun_query_on_docs, stream_query_on_docs
+from src.backend.rag.conversation_store import conversation_store, conversation_key
+from src.backend.vector_store.filters import parse_filters
+from src.backend.utils.utils import folders
+from src.backend.utils.conversation_log import conversation_log
 from dotenv import load_dotenv
 from loguru import logger
 
@@ -13,6 +17,7 @@ bp = Blueprint("vitoria_agent", __name__, template_folder=folders.TEMPLATES,
 
 
 INDEX = os.getenv("INDEX")
+AGENT = "vitoria"
 
 
 @bp.route('/chatAgente1', methods=['GET'])
@@ -45,11 +50,12 @@ def query_vitoria():
         POST
 
     Dados de entrada:
-        JSON contendo 'query'.
+        JSON contendo 'query' e, opcionalmente, 'filters', que restringe a busca por 'source', 'area',
+        'doc_type', 'date_from' e 'date_to' (ex.: {"area": "parentalidade"}).
 
     Respostas:
         200: Retorna a resposta do chatbot e o pensamento do agente.
-        400: Requisição inválida (dados faltando ou usuário não autenticado).
+        400: Requisição inválida (dados faltando, filtros inválidos ou usuário não autenticado).
         500: Erro interno do servidor.
     """
 
@@ -60,6 +66,11 @@ def query_vitoria():
 
         if not query:
             return jsonify({'error': 'Query is required'}), 400
+
+        try:
+            filters = parse_filters(data.get('filters'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         user = session.get('user_id')
 
@@ -67,12 +78,11 @@ def query_vitoria():
             return jsonify({'error': 'User ID is required'}), 400
 
         # Run the query using run_query_on_docs
-        resp, pensamento = run_query_on_docs(query, history=session['history'], index_name=INDEX)
-
-        session['messages']["user"].append(query)
-        session['messages']["ai"].append(resp)
+        resp, pensamento = run_query_on_docs(query, history=conversation_store.memory(conversation_key(user, AGENT)),
+                                             index_name=INDEX, agent=AGENT, filters=filters)
 
-        # save_messages_from_session(session=session)
+        # Queued and written in the background, off the request path
+        conversation_log.log(user, query, resp, pensamento, agent=AGENT)
 
         # Return the response as JSON
         return jsonify({'response': resp, 'thought': pensamento})
@@ -80,3 +90,100 @@ def query_vitoria():
         logger.error(f"chatAgente1: An error occurred: {e}")
         return jsonify({'error': str(e)}), 500
 
+
+async def aquery_vitoria():
+    """
+    Versão assíncrona de `query_vitoria`, servida diretamente no event loop pelo ponto de entrada ASGI (asgi.py).
+
+    Deve ser executada dentro de um contexto de requisição Flask. Os dados de entrada e as respostas
+    são os mesmos de `query_vitoria`.
+    """
+
+    try:
+        data = request.json
+        query = data.get('query')
+
+        if not query:
+            return jsonify({'error': 'Query is required'}), 400
+
+        try:
+            filters = parse_filters(data.get('filters'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        user = session.get('user_id')
+
+        if not user:
+            return jsonify({'error': 'User ID is required'}), 400
+
+        resp, pensamento = await arun_query_on_docs(query, history=conversation_store.memory(conversation_key(user, AGENT)),
+                                                    index_name=INDEX, agent=AGENT, filters=filters)
+
+        conversation_log.log(user, query, resp, pensamento, agent=AGENT)
+
+        return jsonify({'response': resp, 'thought': pensamento})
+    except Exception as e:
+        logger.error(f"chatAgente1: An error occurred: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@bp.route('/chatAgente1/query/stream', methods=['POST'])
+def query_vitoria_stream():
+    """
+    Envia uma consulta para a agente do chatbot Vitória e transmite a resposta à medida que é gerada (Server-Sent Events).
+
+    Método HTTP:
+        POST
+
+    Dados de entrada:
+        JSON contendo 'query' e, opcionalmente, 'filters', que restringe a busca por 'source', 'area',
+        'doc_type', 'date_from' e 'date_to' (ex.: {"area": "parentalidade"}).
+
+    Eventos:
+        pensamento: Trecho do pensamento do agente, no campo 'text'.
+        resposta: Trecho da resposta do agente, no campo 'text'.
+        done: Resposta e pensamento completos, nos campos 'response' e 'thought'.
+        error: Erro ocorrido durante a geração, no campo 'error'.
+
+    Respostas:
+        200: Fluxo text/event-stream com os eventos acima.
+        400: Requisição inválida (dados faltando, filtros inválidos ou usuário não autenticado).
+    """
+
+    data = request.json
+    query = data.get('query')
+
+    if not query:
+        return jsonify({'error': 'Query is required'}), 400
+
+    try:
+        filters = parse_filters(data.get('filters'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    user = session.get('user_id')
+
+    if not user:
+        return jsonify({'error': 'User ID is required'}), 400
+
+    def generate():
+        try:
+            # The history is written to the conversation store, so the session does not change while streaming
+            for event, payload in stream_query_on_docs(query, history=conversation_store.memory(conversation_key(user, AGENT)),
+                                                       index_name=INDEX, agent=AGENT, filters=filters):
+                if event == "done":
+                    resp, pensamento = payload
+                    conversation_log.log(user, query, resp, pensamento, agent=AGENT)
+                    yield _sse("done", {'response': resp, 'thought': pensamento})
+                else:
+                    yield _sse(event, {'text': payload})
+        except Exception as e:
+            logger.error(f"chatAgente1/stream: An error occurred: {e}")
+            yield _sse("error", {'error': str(e)})
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
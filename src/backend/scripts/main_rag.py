@@ -1,5 +1,9 @@
 import sys 
 import os
+import time
+import argparse
+from datetime import datetime
+from typing import List
 
 module_path = os.path.abspath(os.path.join('../../../'))
 
@@ -7,9 +11,9 @@ if module_path not in sys.path:
     sys.path.append(module_path)
 
 from src.backend.vector_store import VectorDatabase
-from src.backend.rag.chunks import create_chunks
-# from src.backend.storage.process_docs import load_pdf, read_txt_file, read_csv_file
-from src.backend.rag.read_data import load_pdf, read_txt_file, read_csv_file
+from src.backend.rag.ingestion import ingest_files, LOADERS
+from src.backend.rag.manifest import IngestionManifest
+from src.backend.rag.semantic_cache import mark_index_updated
 # from src.backend.utils.utils import convert_to_dataframe
 from langchain_community.docstore.document import Document
 from dotenv import load_dotenv
@@ -18,14 +22,17 @@ from loguru import logger
 load_dotenv()
 
 """Aplicacao para fazer upload de documentos, chunks, e vector Storage 
-   uso: python main_rag.py
+   uso: python main_rag.py [--full]
 """
 
 INDEX = os.getenv("INDEX")
+INDEX_VERSIONS_TO_KEEP = int(os.getenv("INDEX_VERSIONS_TO_KEEP", "2"))
+INDEX_VALIDATION_TIMEOUT = float(os.getenv("INDEX_VALIDATION_TIMEOUT", "120"))
+INDEX_SMOKE_QUERY = os.getenv("INDEX_SMOKE_QUERY", "férias")
 local_folder_path = "docs_for_embeddings"
 
 
-def rag():
+def rag(full_rebuild: bool = False):
     """
     Processa dados para o sistema RAG (Retrieval-Augmented Generation).
 
@@ -36,6 +43,22 @@ def rag():
     5. Cria um índice no banco de dados vetorial, se não existir.
     6. Adiciona os documentos ao banco de dados vetorial.
 
+    Leitura, chunking, embeddings e upload rodam em pipeline (ver `ingest_files`): os arquivos são
+    processados em paralelo e os uploads são feitos em lotes grandes.
+
+    A ingestão é incremental: um manifesto local registra mtime, hash e os IDs dos chunks de cada arquivo.
+    Apenas arquivos novos ou alterados são processados, e os chunks de arquivos removidos ou alterados são
+    excluídos do índice pelo ID, sem recriá-lo.
+
+    INDEX é o nome lógico usado pelas consultas. Com `full_rebuild`, todos os arquivos são ingeridos em um novo
+    índice e o alias INDEX só é trocado após a validação (ver `rebuild`); o índice atual continua atendendo as
+    consultas durante toda a reconstrução.
+    A reconstrução também é feita quando o índice atual não tem todos os campos esperados (ex.: um índice criado
+    antes da inclusão dos campos de filtro), pois os uploads incrementais seriam rejeitados.
+
+    Args:
+        full_rebuild (bool, opcional): Se True, o índice é reconstruído e todos os arquivos são reingeridos.
+
     Operações principais:
     - **Obtenção de dados**: Obtém dados de uma fonte externa usando a função `get_dados_entregas()`.
     - **Conversão e preparação**: Converte dados para JSON e cria instâncias de `Document`.
@@ -46,40 +69,182 @@ def rag():
     - Registra o início e a conclusão das operações de obtenção de dados, chunking e armazenamento.
     - Captura e registra erros durante a criação de índices e a adição de documentos.
     """
-    vector_db = VectorDatabase(provider="AZURE")
-    
+    vector_db = VectorDatabase()
+
+    logger.info("Getting data...")
+    paths = [
+        os.path.join(local_folder_path, file_name) for file_name in sorted(os.listdir(local_folder_path))
+        if os.path.splitext(file_name)[1].lower() in LOADERS
+    ]
+
+    if full_rebuild:
+        if rebuild(vector_db, paths):
+            # Cached answers were generated from the previous contents of the index
+            mark_index_updated(INDEX)
+        return
+
+    # Incremental runs update the index currently served by the alias
+    index_name = vector_db.resolve_index_name(INDEX)
+    manifest = IngestionManifest(index_name)
+
     try:
-        vector_db.create_index_in_vector_store(INDEX)
+        vector_db.create_index_in_vector_store(index_name, recreate=False)
         logger.info("Creating new Indexes")
     except Exception as e:
         logger.error(f"create_index_in_vector_store: {e}")
 
+    # The metadata of the chunks is sent as index fields, so an index without the new fields rejects every upload
+    missing_fields = vector_db.get_missing_fields(index_name)
+    if missing_fields:
+        logger.warning(f"{index_name} has no fields {missing_fields}, rebuilding it")
+        if rebuild(vector_db, paths):
+            mark_index_updated(INDEX)
+        return
 
-    logger.info("Getting data...")
-    for file_name in os.listdir(local_folder_path):
-        if file_name.lower().endswith('.pdf'):
-            pdf_file_path = os.path.join(local_folder_path, file_name)
-            data = load_pdf(pdf_file_path)
-            chunks = create_chunks(data, chunk_method="token", chunk_size=500, chunk_overlap=100)
-            logger.info("Chunking .pdf")
-        elif file_name.lower().endswith('.txt'):
-            txt_file_path = os.path.join(local_folder_path, file_name)
-            data = read_txt_file(txt_file_path)
-            chunks = create_chunks(data, chunk_method="token", chunk_size=500, chunk_overlap=100)
-            logger.info("Chunking .txt")
-        elif file_name.lower().endswith('.csv'):
-            csv_file_path = os.path.join(local_folder_path, file_name)
-            data = read_csv_file(csv_file_path)
-            chunks = create_chunks(data, chunk_method="token", chunk_size=500, chunk_overlap=100)
-            logger.info("Chunking .csv")
-            
+    changed, removed = manifest.diff(paths)
+    logger.info(f"{len(changed)} new or changed files, {len(removed)} removed files")
+
+    try:
+        added_ids = ingest_files(vector_db, index_name, changed)
+        logger.info("Adding documents to the vector store")
+
+        # Old chunks are deleted only after the new version is in the index
+        for path in changed:
+            if path not in added_ids:
+                # Could not be read, keep the previous version and retry on the next run
+                continue
+            new_ids = added_ids[path]
+            stale_ids = list(set(manifest.chunk_ids(path)) - set(new_ids))
+            vector_db.delete_documents_from_vector_store(index_name, stale_ids)
+            manifest.update(path, new_ids)
+
+        for path in removed:
+            vector_db.delete_documents_from_vector_store(index_name, manifest.chunk_ids(path))
+            manifest.remove(path)
+    except Exception as e:
+        logger.error(f"ingest_files: {e}")
+    finally:
+        manifest.save()
+
+    # Cached answers were generated from the previous contents of the index
+    if changed or removed:
+        mark_index_updated(INDEX)
+
+
+def rebuild(vector_db: VectorDatabase, paths: List[str]) -> bool:
+    """
+    Reconstrói o índice sem interromper as consultas (blue/green).
+
+    Os arquivos são ingeridos em um novo índice versionado (`<INDEX>-v<timestamp>`), enquanto o índice atual
+    continua respondendo pelo alias INDEX. O novo índice é validado pela contagem de documentos e por uma
+    consulta de teste; só então o alias passa a apontar para ele. As versões antigas além de
+    INDEX_VERSIONS_TO_KEEP são excluídas.
+
+    Args:
+        vector_db (VectorDatabase): A vector store de destino.
+        paths (List[str]): Os caminhos dos arquivos a serem ingeridos.
+
+    Returns:
+        bool: True se o alias passou a apontar para o novo índice.
+    """
+
+    index_name = f"{INDEX}-v{datetime.now():%Y%m%d%H%M%S}"
+    previous_index_name = vector_db.resolve_index_name(INDEX)
+    manifest = IngestionManifest(index_name)
+    logger.info(f"Building {index_name} (serving {previous_index_name})")
+
+    try:
+        vector_db.create_index_in_vector_store(index_name, recreate=False)
+        added_ids = ingest_files(vector_db, index_name, paths)
+        for path, ids in added_ids.items():
+            manifest.update(path, ids)
+
+        expected_count = len({doc_id for ids in added_ids.values() for doc_id in ids})
+        if not validate_index(vector_db, index_name, expected_count):
+            raise RuntimeError(f"{index_name} failed validation")
+
+        manifest.save()
+        vector_db.swap_index_alias(INDEX, index_name)
+        logger.info(f"{INDEX} now points to {index_name}")
+    except Exception as e:
+        logger.error(f"rebuild: {e}. {INDEX} still points to {previous_index_name}")
+        vector_db.delete_index_from_vector_store(index_name)
+        manifest.delete()
+        return False
+
+    if previous_index_name == INDEX:
+        # The first swap replaced the plain index named INDEX with the alias
+        IngestionManifest(INDEX).delete()
+
+    delete_old_versions(vector_db, index_name)
+    return True
+
+
+def validate_index(vector_db: VectorDatabase, index_name: str, expected_count: int) -> bool:
+    """
+    Verifica se um índice recém-construído pode passar a atender as consultas.
+
+    Aguarda (até INDEX_VALIDATION_TIMEOUT segundos) que as estatísticas do índice reportem todos os
+    documentos enviados e executa uma consulta de teste (INDEX_SMOKE_QUERY), que deve retornar resultados.
+
+    Args:
+        vector_db (VectorDatabase): A vector store.
+        index_name (str): O nome do índice.
+        expected_count (int): O número de documentos enviados ao índice.
+
+    Returns:
+        bool: True se o índice é válido.
+    """
+
+    if expected_count == 0:
+        logger.error(f"validate_index: no documents were added to {index_name}")
+        return False
+
+    deadline = time.monotonic() + INDEX_VALIDATION_TIMEOUT
+    # Index statistics lag behind the uploads by a few seconds
+    while (document_count := vector_db.get_document_count(index_name)) < expected_count:
+        if time.monotonic() > deadline:
+            logger.error(f"validate_index: {index_name} has {document_count} of {expected_count} documents")
+            return False
+        time.sleep(5)
+
+    docs = vector_db.get_relevant_documents(INDEX_SMOKE_QUERY, index_name, "hybrid")
+    if not docs:
+        logger.error(f"validate_index: smoke query returned no documents from {index_name}")
+        return False
+
+    logger.info(f"validate_index: {index_name} has {document_count} documents")
+    return True
+
+
+def delete_old_versions(vector_db: VectorDatabase, active_index_name: str) -> None:
+    """
+    Exclui as versões antigas do índice, mantendo as INDEX_VERSIONS_TO_KEEP mais recentes (a ativa e as
+    anteriores, para permitir voltar o alias em caso de problema).
+
+    Args:
+        vector_db (VectorDatabase): A vector store.
+        active_index_name (str): O índice para o qual o alias aponta, nunca excluído.
+    """
+
+    versions = vector_db.list_index_versions(INDEX)
+    old_versions = versions[:-max(1, INDEX_VERSIONS_TO_KEEP)]
+    for index_name in old_versions:
+        if index_name == active_index_name:
+            continue
         try:
-            vector_db.add_documents_to_vector_store_with_retry(INDEX, chunks)  
-            logger.info("Adding documents to the vector store")
+            vector_db.delete_index_from_vector_store(index_name)
+            IngestionManifest(index_name).delete()
+            logger.info(f"Deleted old index {index_name}")
         except Exception as e:
-            logger.error(f"add_documents_to_vector_store_with_retry: {e}")
+            logger.error(f"delete_old_versions: {index_name}: {e}")
+
 
 if __name__=="__main__":
-    rag()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--full", action="store_true", help="Reconstrói o índice em uma nova versão e troca o alias")
+    args = parser.parse_args()
+
+    rag(full_rebuild=args.full)
 
     
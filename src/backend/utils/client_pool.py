@@ -0,0 +1,76 @@
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+from loguru import logger
+
+
+# Marks a missing client, as a factory may return None (ex.: the AWS stubs)
+_MISSING = object()
+
+
+class ClientPool:
+    """
+    Registro de clientes de longa duração compartilhados entre requisições.
+
+    Cada cliente (modelo de chat, embeddings, AzureSearch) é criado uma única vez por processo
+    e identificado por uma chave composta, por exemplo (provedor, tipo, deployment ou índice).
+    Reaproveitar a mesma instância mantém abertas as conexões HTTP (keep-alive) dos SDKs,
+    evitando novos handshakes TLS a cada consulta.
+
+    A criação é protegida por um lock por chave, de modo que threads concorrentes nunca
+    constroem o mesmo cliente duas vezes.
+    """
+
+    def __init__(self) -> None:
+        self._clients: Dict[Hashable, Any] = {}
+        self._locks: Dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """
+        Retorna o cliente associado à chave, criando-o com a factory caso ainda não exista.
+
+        O valor retornado pela factory é guardado mesmo que seja None, de modo que ela é chamada uma única vez.
+
+        Args:
+            key (Hashable): A chave que identifica o cliente (ex.: ("AZURE", "chat", "gpt-35-turbo")).
+            factory (Callable[[], Any]): Função sem argumentos que constrói o cliente.
+
+        Returns:
+            Any: A instância compartilhada do cliente.
+        """
+
+        client = self._clients.get(key, _MISSING)
+        if client is not _MISSING:
+            return client
+
+        with self._lock:
+            key_lock = self._locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            client = self._clients.get(key, _MISSING)
+            if client is _MISSING:
+                logger.info(f"Creating pooled client {key}")
+                client = factory()
+                self._clients[key] = client
+
+        return client
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """
+        Remove um cliente do registro (ou todos, se nenhuma chave for informada).
+
+        Args:
+            key (Hashable, opcional): A chave do cliente a ser removido.
+        """
+
+        with self._lock:
+            if key is None:
+                self._clients.clear()
+            else:
+                self._clients.pop(key, None)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._clients
+
+
+client_pool = ClientPool()
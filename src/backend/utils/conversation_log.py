@@ -0,0 +1,197 @@
+import os
+import glob
+import json
+import time
+import queue
+import atexit
+import threading
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+from dotenv import load_dotenv
+from loguru import logger
+from src.backend.utils.utils import folders
+
+load_dotenv()
+
+
+CONVERSATION_LOG_ENABLED = os.getenv("CONVERSATION_LOG_ENABLED", "true").lower() == "true"
+CONVERSATION_LOG_DIR = os.getenv("CONVERSATION_LOG_DIR", os.path.join(folders.ROOT_DIR, "files", "conversation_log"))
+CONVERSATION_LOG_SEGMENT_BYTES = int(os.getenv("CONVERSATION_LOG_SEGMENT_BYTES", str(16 * 1024 * 1024)))
+CONVERSATION_LOG_FLUSH_INTERVAL = float(os.getenv("CONVERSATION_LOG_FLUSH_INTERVAL", "1"))
+CONVERSATION_LOG_BATCH_SIZE = int(os.getenv("CONVERSATION_LOG_BATCH_SIZE", "256"))
+CONVERSATION_LOG_QUEUE_SIZE = int(os.getenv("CONVERSATION_LOG_QUEUE_SIZE", "10000"))
+
+
+class ConversationLog:
+    """
+    Registro de auditoria das conversas, gravado em segundo plano.
+
+    `log` apenas coloca o registro em uma fila e retorna; uma thread grava os registros em lotes (até
+    CONVERSATION_LOG_BATCH_SIZE, a cada CONVERSATION_LOG_FLUSH_INTERVAL segundos) como linhas JSON, acrescentadas
+    ao segmento atual. O segmento é trocado quando passa de CONVERSATION_LOG_SEGMENT_BYTES ou quando o dia muda.
+    Cada processo grava os seus próprios segmentos, de modo que os workers não disputam o mesmo arquivo.
+
+    Se a fila estiver cheia (disco lento ou indisponível), o registro é descartado com um aviso em vez de
+    atrasar a resposta ao usuário.
+
+    Args:
+        path (str, opcional): O diretório dos segmentos. O padrão é CONVERSATION_LOG_DIR.
+        segment_bytes (int, opcional): O tamanho máximo de um segmento. O padrão é CONVERSATION_LOG_SEGMENT_BYTES.
+        flush_interval (float, opcional): O intervalo máximo entre gravações, em segundos.
+        batch_size (int, opcional): O número máximo de registros por gravação.
+        queue_size (int, opcional): O número máximo de registros aguardando gravação.
+    """
+
+    def __init__(self, path: str = CONVERSATION_LOG_DIR, segment_bytes: int = CONVERSATION_LOG_SEGMENT_BYTES,
+                 flush_interval: float = CONVERSATION_LOG_FLUSH_INTERVAL, batch_size: int = CONVERSATION_LOG_BATCH_SIZE,
+                 queue_size: int = CONVERSATION_LOG_QUEUE_SIZE) -> None:
+        self.path = path
+        self.segment_bytes = segment_bytes
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._queue: "queue.Queue[Optional[Dict]]" = queue.Queue(maxsize=queue_size)
+        self._writer: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._file = None
+        self._segment_day = None
+        self._segment_count = 0
+
+    def log(self, user_id: str, query: str, response: str, thought: Optional[str] = None, agent: str = "vitoria") -> None:
+        """
+        Registra uma troca da conversa sem bloquear a requisição.
+
+        Args:
+            user_id (str): O identificador do usuário.
+            query (str): A pergunta do usuário.
+            response (str): A resposta do agente.
+            thought (str, opcional): O pensamento do agente.
+            agent (str, opcional): O agente que respondeu. O padrão é "vitoria".
+        """
+
+        if not CONVERSATION_LOG_ENABLED:
+            return
+
+        record = {
+            "timestamp": time.time(),
+            "user_id": user_id,
+            "agent": agent,
+            "query": query,
+            "response": response,
+            "thought": thought,
+        }
+
+        self._start()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            logger.warning("ConversationLog: queue is full, dropping a record")
+
+    def close(self) -> None:
+        """
+        Grava os registros pendentes e encerra a thread de gravação.
+        """
+
+        if self._writer is None:
+            return
+        self._queue.put(None)
+        self._writer.join(timeout=10)
+        self._writer = None
+
+    def _start(self) -> None:
+        if self._writer is not None:
+            return
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run, name="conversation-log", daemon=True)
+                self._writer.start()
+                atexit.register(self.close)
+
+    def _run(self) -> None:
+        while True:
+            record = self._queue.get()
+            batch = [record]
+            deadline = time.monotonic() + self.flush_interval
+
+            while record is not None and len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    record = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(record)
+
+            records = [record for record in batch if record is not None]
+            if records:
+                try:
+                    self._write(records)
+                except Exception as e:
+                    logger.error(f"ConversationLog: could not write {len(records)} records: {e}")
+
+            if batch[-1] is None:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                return
+
+    def _write(self, records: List[Dict]) -> None:
+        data = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+
+        today = datetime.now().strftime("%Y%m%d")
+        if self._file is None or self._segment_day != today or self._file.tell() >= self.segment_bytes:
+            self._rotate(today)
+
+        self._file.write(data)
+        self._file.flush()
+
+    def _rotate(self, today: str) -> None:
+        if self._file is not None:
+            self._file.close()
+
+        os.makedirs(self.path, exist_ok=True)
+        self._segment_day = today
+        self._segment_count += 1
+        # Sorting the names orders the segments by day, then by process start and sequence
+        name = f"conversations-{today}-{os.getpid()}-{int(time.time())}-{self._segment_count:04d}.jsonl"
+        self._file = open(os.path.join(self.path, name), 'a', encoding='utf8')
+
+
+def iter_conversation_log(path: str = CONVERSATION_LOG_DIR) -> Iterator[Dict]:
+    """
+    Percorre todos os registros do log de conversas, segmento por segmento.
+
+    Args:
+        path (str, opcional): O diretório dos segmentos. O padrão é CONVERSATION_LOG_DIR.
+
+    Yields:
+        Dict: Os registros gravados.
+    """
+
+    for segment in sorted(glob.glob(os.path.join(path, "conversations-*.jsonl"))):
+        with open(segment, 'r', encoding='utf8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # A line still being written
+                    continue
+
+
+def read_conversation(user_id: str, path: str = CONVERSATION_LOG_DIR) -> List[Dict]:
+    """
+    Reconstrói a conversa de um usuário a partir do log.
+
+    Args:
+        user_id (str): O identificador do usuário.
+        path (str, opcional): O diretório dos segmentos. O padrão é CONVERSATION_LOG_DIR.
+
+    Returns:
+        List[Dict]: As trocas da conversa (pergunta, resposta, pensamento), em ordem cronológica.
+    """
+
+    records = [record for record in iter_conversation_log(path) if record.get("user_id") == user_id]
+    return sorted(records, key=lambda record: record["timestamp"])
+
+
+conversation_log = ConversationLog()
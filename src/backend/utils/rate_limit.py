@@ -0,0 +1,324 @@
+import os
+import time
+import random
+import asyncio
+import threading
+from typing import Any, Callable, Optional
+from dotenv import load_dotenv
+from loguru import logger
+
+load_dotenv()
+
+
+EMBEDDING_RPM = float(os.getenv("EMBEDDING_RPM", "0"))
+EMBEDDING_TPM = float(os.getenv("EMBEDDING_TPM", "0"))
+SEARCH_UPLOAD_RPM = float(os.getenv("SEARCH_UPLOAD_RPM", "0"))
+MAX_RETRIES = int(os.getenv("RATE_LIMIT_MAX_RETRIES", "6"))
+BACKOFF_BASE_SECONDS = float(os.getenv("RATE_LIMIT_BACKOFF_BASE", "1"))
+BACKOFF_MAX_SECONDS = float(os.getenv("RATE_LIMIT_BACKOFF_MAX", "60"))
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Token bucket que limita a vazão de chamadas a uma cota por minuto.
+
+    Cada chamada reserva a quantidade de tokens de que precisa; se o saldo ficar negativo, quem reservou
+    espera o tempo necessário para que a cota seja reposta. Uma pausa global (`pause`) pode ser imposta
+    quando o serviço responde com Retry-After, fazendo todas as chamadas seguintes aguardarem.
+
+    Args:
+        per_minute (float): A cota por minuto. Zero ou negativo desativa o limite.
+        capacity (float, opcional): O tamanho máximo de uma rajada. O padrão é a cota de um minuto.
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None) -> None:
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def acquire(self, amount: float = 1) -> None:
+        """
+        Reserva tokens, bloqueando a thread até que estejam disponíveis.
+
+        Args:
+            amount (float, opcional): A quantidade de tokens. O padrão é 1.
+        """
+
+        wait = self._reserve(amount)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def aacquire(self, amount: float = 1) -> None:
+        """
+        Versão assíncrona de `acquire`.
+
+        Args:
+            amount (float, opcional): A quantidade de tokens. O padrão é 1.
+        """
+
+        wait = self._reserve(amount)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """
+        Suspende todas as reservas pelo tempo indicado (ex.: o Retry-After de uma resposta 429).
+
+        Args:
+            seconds (float): O tempo de pausa, em segundos.
+        """
+
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def _reserve(self, amount: float) -> float:
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self._blocked_until - now)
+
+            if not self.enabled:
+                return wait
+
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= min(amount, self.capacity)
+
+            if self._tokens < 0:
+                wait = max(wait, -self._tokens / self.rate)
+            return wait
+
+
+class RateLimiter:
+    """
+    Limitador de vazão com cotas de requisições (RPM) e de tokens (TPM), como as do Azure OpenAI.
+
+    Args:
+        rpm (float, opcional): Requisições por minuto. Zero desativa o limite.
+        tpm (float, opcional): Tokens por minuto. Zero desativa o limite.
+    """
+
+    def __init__(self, rpm: float = 0, tpm: float = 0) -> None:
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+
+    def acquire(self, tokens: float = 0) -> None:
+        """
+        Aguarda até que a próxima requisição, com o número de tokens informado, caiba nas cotas.
+
+        Args:
+            tokens (float, opcional): O número estimado de tokens da requisição.
+        """
+
+        self.requests.acquire(1)
+        if tokens:
+            self.tokens.acquire(tokens)
+
+    async def aacquire(self, tokens: float = 0) -> None:
+        """
+        Versão assíncrona de `acquire`.
+
+        Args:
+            tokens (float, opcional): O número estimado de tokens da requisição.
+        """
+
+        await self.requests.aacquire(1)
+        if tokens:
+            await self.tokens.aacquire(tokens)
+
+    def pause(self, seconds: float) -> None:
+        """
+        Suspende todas as requisições pelo tempo indicado.
+
+        Args:
+            seconds (float): O tempo de pausa, em segundos.
+        """
+
+        self.requests.pause(seconds)
+
+
+class AdaptiveBatchSize:
+    """
+    Tamanho de lote que cresce enquanto as chamadas têm sucesso e cai pela metade quando o serviço é limitado.
+
+    Args:
+        initial (int): O tamanho inicial do lote.
+        maximum (int): O tamanho máximo do lote.
+        minimum (int, opcional): O tamanho mínimo do lote. O padrão é 1.
+    """
+
+    def __init__(self, initial: int, maximum: int, minimum: int = 1) -> None:
+        self.minimum = minimum
+        self.maximum = max(maximum, minimum)
+        self.size = min(max(initial, minimum), self.maximum)
+
+    def success(self) -> None:
+        self.size = min(self.maximum, self.size * 2)
+
+    def failure(self) -> None:
+        self.size = max(self.minimum, self.size // 2)
+
+
+def get_status_code(error: Exception) -> Optional[int]:
+    """
+    Obtém o código HTTP de um erro do Azure SDK, do SDK da OpenAI ou de bibliotecas HTTP.
+
+    Args:
+        error (Exception): O erro capturado.
+
+    Returns:
+        Optional[int]: O código HTTP, se houver.
+    """
+
+    for candidate in (error, getattr(error, "response", None)):
+        for attribute in ("status_code", "code", "status"):
+            value = getattr(candidate, attribute, None)
+            if isinstance(value, int):
+                return value
+    return None
+
+
+def get_retry_after(error: Exception) -> Optional[float]:
+    """
+    Lê o tempo de espera sugerido pelo serviço (Retry-After) de um erro, em segundos.
+
+    Args:
+        error (Exception): O erro capturado.
+
+    Returns:
+        Optional[float]: O tempo de espera, se informado.
+    """
+
+    retry_after = getattr(error, "retryAfter", None)
+    if retry_after is not None:
+        return float(retry_after)
+
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    for header, scale in (("retry-after-ms", 1000), ("x-ms-retry-after-ms", 1000), ("retry-after", 1)):
+        value = headers.get(header)
+        if value is not None:
+            try:
+                return float(value) / scale
+            except ValueError:
+                continue
+    return None
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Indica se o erro é transitório (limite de taxa, indisponibilidade ou falha de conexão).
+
+    Args:
+        error (Exception): O erro capturado.
+
+    Returns:
+        bool: True se a chamada deve ser repetida.
+    """
+
+    status_code = get_status_code(error)
+    if status_code is not None:
+        return status_code in RETRYABLE_STATUS_CODES
+
+    return isinstance(error, (ConnectionError, TimeoutError)) or "Timeout" in type(error).__name__ \
+        or "Connection" in type(error).__name__
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None,
+                  base: float = BACKOFF_BASE_SECONDS, maximum: float = BACKOFF_MAX_SECONDS) -> float:
+    """
+    Calcula a espera antes de uma nova tentativa: backoff exponencial com jitter, respeitando o Retry-After.
+
+    Args:
+        attempt (int): O número da tentativa que falhou, começando em 0.
+        retry_after (float, opcional): O tempo de espera sugerido pelo serviço.
+
+    Returns:
+        float: O tempo de espera, em segundos.
+    """
+
+    delay = random.uniform(0, min(maximum, base * 2 ** attempt))
+    if retry_after is not None:
+        delay = retry_after + random.uniform(0, base)
+    return delay
+
+
+def call_with_retry(fn: Callable[..., Any], *args: Any, limiter: Optional[RateLimiter] = None, tokens: float = 0,
+                    max_retries: int = MAX_RETRIES, **kwargs: Any) -> Any:
+    """
+    Executa uma chamada respeitando o limitador de vazão e repetindo-a em caso de erro transitório.
+
+    Args:
+        fn (Callable): A função a ser chamada.
+        limiter (RateLimiter, opcional): O limitador compartilhado da cota consumida pela chamada.
+        tokens (float, opcional): O número estimado de tokens consumidos.
+        max_retries (int, opcional): O número máximo de novas tentativas.
+
+    Returns:
+        Any: O retorno da função.
+
+    Raises:
+        Exception: O último erro, se não for transitório ou se as tentativas se esgotarem.
+    """
+
+    for attempt in range(max_retries + 1):
+        if limiter is not None:
+            limiter.acquire(tokens)
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            if attempt == max_retries or not is_retryable(e):
+                raise
+            retry_after = get_retry_after(e)
+            delay = backoff_delay(attempt, retry_after)
+            if limiter is not None and retry_after is not None:
+                limiter.pause(retry_after)
+            logger.warning(f"{getattr(fn, '__name__', 'call')} failed ({e}). Retrying in {delay:.1f} seconds.")
+            time.sleep(delay)
+
+
+async def acall_with_retry(fn: Callable[..., Any], *args: Any, limiter: Optional[RateLimiter] = None, tokens: float = 0,
+                           max_retries: int = MAX_RETRIES, **kwargs: Any) -> Any:
+    """
+    Versão assíncrona de `call_with_retry`, para funções assíncronas.
+    """
+
+    for attempt in range(max_retries + 1):
+        if limiter is not None:
+            await limiter.aacquire(tokens)
+        try:
+            return await fn(*args, **kwargs)
+        except Exception as e:
+            if attempt == max_retries or not is_retryable(e):
+                raise
+            retry_after = get_retry_after(e)
+            delay = backoff_delay(attempt, retry_after)
+            if limiter is not None and retry_after is not None:
+                limiter.pause(retry_after)
+            logger.warning(f"{getattr(fn, '__name__', 'call')} failed ({e}). Retrying in {delay:.1f} seconds.")
+            await asyncio.sleep(delay)
+
+
+def estimate_tokens(texts) -> int:
+    """
+    Estima o número de tokens de um conjunto de textos (aproximadamente 4 caracteres por token).
+
+    Args:
+        texts (Iterable[str]): Os textos.
+
+    Returns:
+        int: O número estimado de tokens.
+    """
+
+    return sum(len(text) for text in texts) // 4 + 1
+
+
+embedding_rate_limiter = RateLimiter(rpm=EMBEDDING_RPM, tpm=EMBEDDING_TPM)
+upload_rate_limiter = RateLimiter(rpm=SEARCH_UPLOAD_RPM)
@@ -0,0 +1,196 @@
+import os
+import time
+import pickle
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Optional
+from flask import Flask, Request, Response
+from flask_session.sessions import ServerSideSession, SessionInterface
+from itsdangerous import BadSignature, want_bytes
+from dotenv import load_dotenv
+from loguru import logger
+from src.backend.utils.utils import folders
+
+load_dotenv()
+
+
+SESSION_SQLITE_PATH = os.getenv("SESSION_SQLITE_PATH", os.path.join(folders.CACHE, "sessions.sqlite3"))
+SESSION_SWEEP_INTERVAL = float(os.getenv("SESSION_SWEEP_INTERVAL", "60"))
+SESSION_SWEEP_BATCH_SIZE = 1000
+
+
+class SqliteSession(ServerSideSession):
+    """
+    Sessão gravada no `SqliteSessionInterface`, com o horário de expiração registrado no banco.
+    """
+
+    def __init__(self, initial=None, sid=None, permanent=None, expires_at: float = 0.0):
+        super().__init__(initial, sid=sid, permanent=permanent)
+        self.expires_at = expires_at
+
+
+class SqliteSessionInterface(SessionInterface):
+    """
+    Backend de sessões do Flask em um único banco SQLite (modo WAL), compartilhado pelos workers do host.
+
+    Cada sessão é uma linha (id, dados, expiração) com busca pela chave primária. Uma sessão só é regravada
+    quando foi alterada ou quando mais da metade do seu tempo de vida já passou; as demais requisições
+    apenas leem o banco. As sessões expiradas são removidas em lotes, no máximo a cada
+    SESSION_SWEEP_INTERVAL segundos por processo, em vez de uma a uma.
+
+    O cookie segue a mesma configuração dos backends do Flask-Session (nome, domínio, assinatura).
+
+    Args:
+        path (str, opcional): O caminho do arquivo SQLite. O padrão é SESSION_SQLITE_PATH.
+        use_signer (bool, opcional): Se o ID da sessão no cookie deve ser assinado. O padrão é False.
+        permanent (bool, opcional): Se as sessões são permanentes. O padrão é True.
+        sweep_interval (float, opcional): O intervalo mínimo entre remoções de sessões expiradas, em segundos.
+    """
+
+    session_class = SqliteSession
+    serializer = pickle
+
+    def __init__(self, path: str = SESSION_SQLITE_PATH, use_signer: bool = False, permanent: bool = True,
+                 sweep_interval: float = SESSION_SWEEP_INTERVAL) -> None:
+        self.path = path
+        self.use_signer = use_signer
+        self.permanent = permanent
+        self.sweep_interval = sweep_interval
+        self.has_same_site_capability = hasattr(self, "get_cookie_samesite")
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._swept_at = 0.0
+
+    @classmethod
+    def from_app(cls, app: Flask, path: str = SESSION_SQLITE_PATH) -> "SqliteSessionInterface":
+        """
+        Cria o backend com as opções SESSION_USE_SIGNER e SESSION_PERMANENT da aplicação.
+
+        Args:
+            app (Flask): A aplicação.
+            path (str, opcional): O caminho do arquivo SQLite. O padrão é SESSION_SQLITE_PATH.
+
+        Returns:
+            SqliteSessionInterface: O backend de sessões.
+        """
+
+        return cls(
+            path=path,
+            use_signer=app.config.get("SESSION_USE_SIGNER", False),
+            permanent=app.config.get("SESSION_PERMANENT", True),
+        )
+
+    def open_session(self, app: Flask, request: Request) -> Optional[SqliteSession]:
+        sid = request.cookies.get(app.config["SESSION_COOKIE_NAME"])
+        if not sid:
+            return self.session_class(sid=self._generate_sid(), permanent=self.permanent)
+
+        if self.use_signer:
+            signer = self._get_signer(app)
+            if signer is None:
+                return None
+            try:
+                sid = signer.unsign(sid).decode()
+            except BadSignature:
+                return self.session_class(sid=self._generate_sid(), permanent=self.permanent)
+
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT data, expiry FROM sessions WHERE id = ? AND expiry > ?", (sid, time.time())
+            ).fetchone()
+
+        if row is not None:
+            try:
+                return self.session_class(self.serializer.loads(row[0]), sid=sid, permanent=self.permanent,
+                                          expires_at=row[1])
+            except Exception as e:
+                logger.error(f"SqliteSessionInterface: unreadable session: {e}")
+
+        return self.session_class(sid=sid, permanent=self.permanent)
+
+    def save_session(self, app: Flask, session: SqliteSession, response: Response) -> None:
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        now = time.time()
+        self._maybe_sweep(now)
+
+        if not session:
+            if session.modified:
+                with self._lock, self._connect() as connection:
+                    connection.execute("DELETE FROM sessions WHERE id = ?", (session.sid,))
+                response.delete_cookie(app.config["SESSION_COOKIE_NAME"], domain=domain, path=path)
+            return
+
+        lifetime = app.permanent_session_lifetime.total_seconds()
+        # Unchanged sessions are only rewritten to push the expiry forward once half of it has elapsed
+        if session.modified or session.expires_at - now < lifetime / 2:
+            session.expires_at = now + lifetime
+            with self._lock, self._connect() as connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO sessions (id, data, expiry) VALUES (?, ?, ?)",
+                    (session.sid, self.serializer.dumps(dict(session)), session.expires_at),
+                )
+
+        conditional_cookie_kwargs = {}
+        if self.has_same_site_capability:
+            conditional_cookie_kwargs["samesite"] = self.get_cookie_samesite(app)
+        if self.use_signer:
+            session_id = self._get_signer(app).sign(want_bytes(session.sid))
+        else:
+            session_id = session.sid
+        # The cookie expires with the row, which is not pushed forward on every request
+        expires = datetime.fromtimestamp(session.expires_at, timezone.utc) if session.permanent else None
+        response.set_cookie(app.config["SESSION_COOKIE_NAME"], session_id,
+                            expires=expires,
+                            httponly=self.get_cookie_httponly(app),
+                            domain=domain, path=path, secure=self.get_cookie_secure(app),
+                            **conditional_cookie_kwargs)
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """
+        Remove as sessões expiradas, em lotes para não bloquear os outros workers por muito tempo.
+
+        Args:
+            now (float, opcional): O horário de referência. O padrão é o horário atual.
+
+        Returns:
+            int: O número de sessões removidas.
+        """
+
+        now = now or time.time()
+        removed = 0
+        while True:
+            with self._lock, self._connect() as connection:
+                count = connection.execute(
+                    "DELETE FROM sessions WHERE id IN (SELECT id FROM sessions WHERE expiry <= ? LIMIT ?)",
+                    (now, SESSION_SWEEP_BATCH_SIZE),
+                ).rowcount
+            removed += count
+            if count < SESSION_SWEEP_BATCH_SIZE:
+                return removed
+
+    def _maybe_sweep(self, now: float) -> None:
+        if now - self._swept_at < self.sweep_interval:
+            return
+        self._swept_at = now
+        try:
+            removed = self.sweep(now)
+            if removed:
+                logger.info(f"Removed {removed} expired sessions")
+        except sqlite3.Error as e:
+            logger.error(f"SqliteSessionInterface.sweep: {e}")
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "id TEXT PRIMARY KEY, data BLOB NOT NULL, expiry REAL NOT NULL) WITHOUT ROWID"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS sessions_expiry ON sessions (expiry)")
+            self._connection = connection
+        return self._connection
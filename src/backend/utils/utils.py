@@ -1,7 +1,5 @@
 import os
-import json
 import pandas as pd
-from typing import List 
 
 
 class folders:
@@ -10,6 +8,8 @@ class folders:
     FRONTEND = os.path.join(APP_DIR, 'frontend')
     STATIC = os.path.join(FRONTEND, 'static')
     TEMPLATES = os.path.join(FRONTEND, 'templates')
+    ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+    CACHE = os.getenv('CACHE_DIR', os.path.join(ROOT_DIR, 'cache'))
 
 
 def convert_to_dataframe(data):
@@ -48,52 +48,3 @@ def convert_to_dataframe(data):
     # Create a DataFrame from the rows
     df = pd.DataFrame(rows, columns=column_names)
     return df
-
-
-def save_last_queries_and_responses(id: str, last_queries: List[str], last_resp: List[str]) -> None:
-    """
-    Salva as últimas consultas e respostas em um arquivo JSON.
-
-    Args:
-        id (str): String aleatória de uma conversa.
-        last_queries (List[str]): Lista das últimas consultas feitas.
-        last_resp (List[str]): Lista das últimas respostas correspondentes.
-
-    Returns:
-        None
-    """
-
-    qa_dict = {q: r for q, r in zip(last_queries, last_resp)}
-
-    os.makedirs('files', exist_ok=True)
-
-    file_name = f"files/{id}_conversation.json"
-
-    with open(file_name, 'w', encoding='utf8') as f:
-        json.dump(qa_dict, f, ensure_ascii=False, indent=4)
-
-
-def save_messages_from_session(session) -> None:
-    """
-    Salva as últimas consultas e respostas em um arquivo JSON.
-
-    Args:
-        session (session): objeto Flask session contendo user_id,
-        mensagens do assistente e do usuário 
-
-    Returns:
-        None
-    """
-
-    user_token = session['user_id']
-    user_messages = session['messages']["user"]
-    assistant_messages = session['messages']["ai"]
-
-    qa_dict = {q: r for q, r in zip(user_messages, assistant_messages)}
-
-    os.makedirs('files', exist_ok=True)
-
-    file_name = f"files/{user_token}_conversation.json"
-
-    with open(file_name, 'w', encoding='utf8') as f:
-        json.dump(qa_dict, f, ensure_ascii=False, indent=4)
@@ -9,5 +9,25 @@ def add_documents_to_vector_store_with_retry_aws()->None:
     return None
 
 
+def delete_documents_from_vector_store_aws()->None:
+    return None
+
+
 def delete_index_from_vector_store_aws()->None:
-    return None
\ No newline at end of file
+    return None
+
+
+def resolve_index_name_aws(index_name: str)->str:
+    return index_name
+
+
+def swap_index_alias_aws()->None:
+    return None
+
+
+def list_index_versions_aws()->list:
+    return []
+
+
+def get_document_count_aws()->int:
+    return 0
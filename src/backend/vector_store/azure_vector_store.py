@@ -1,28 +1,49 @@
 from dotenv import load_dotenv
 import os
+import base64
 import time
-from typing import List
-from src.backend.llm import create_azure_embeddings_llm
+from typing import Dict, List, Optional, Tuple
+from src.backend.llm.llm import LLM
+from src.backend.utils.client_pool import client_pool
+from src.backend.utils.rate_limit import (
+  AdaptiveBatchSize,
+  MAX_RETRIES,
+  backoff_delay,
+  call_with_retry,
+  get_retry_after,
+  get_status_code,
+  is_retryable,
+  upload_rate_limiter,
+)
 from langchain.docstore.document import Document
 from langchain_community.vectorstores.azuresearch import AzureSearch
 from azure.search.documents.indexes import SearchIndexClient
 from azure.core.credentials import AzureKeyCredential
+from azure.core.exceptions import ResourceNotFoundError
 from azure.search.documents.indexes.models import (
+  SearchAlias,
   SearchableField,
   SearchField,
   SearchFieldDataType,
   SimpleField,
 )
 from collections.abc import MutableMapping
+from .filters import SearchFilters, to_odata
 from loguru import logger 
 
 load_dotenv()
 
 vector_store_address: str = os.getenv("AZURE_SEARCH_ENDPOINT")
 vector_store_password: str = os.getenv("AZURE_SEARCH_ADMIN_KEY")
+max_upload_batch_size: int = int(os.getenv("SEARCH_UPLOAD_MAX_BATCH_SIZE", "1000"))
+index_alias_ttl: float = float(os.getenv("INDEX_ALIAS_TTL", "30"))
+
+# Logical name -> (physical index, resolved at)
+_resolved_aliases: Dict[str, Tuple[str, float]] = {}
 
 
-def get_relevant_documents_azure(query:str, index_name:str, search_type: str)->List[Document]:
+def get_relevant_documents_azure(query:str, index_name:str, search_type: str, k: int = 5,
+                                 filters: Optional[SearchFilters] = None)->List[Document]:
     """
     Recupera documentos relevantes do Azure Search com base em uma consulta.
 
@@ -33,13 +54,15 @@ def get_relevant_documents_azure(query:str, index_name:str, search_type: str)->L
         query (str): A consulta de busca para encontrar documentos relevantes.
         index_name (str): O nome do índice no Azure Search onde a busca será realizada.
         search_type (str): O tipo de pesquisa a ser realizada ("similarity", "hybrid" ou "semantic_hybrid").
+        k (int, opcional): O número de documentos. O padrão é 5.
+        filters (SearchFilters, opcional): Os filtros, enviados ao Azure Search como `$filter` OData.
 
     Returns:
         List[Document]: Uma lista de documentos relevantes que correspondem à consulta.
     """
 
     vector_store = get_vector_store_azure(index_name)
-    docs = vector_store.similarity_search(query=query, k=5, search_type=search_type)
+    docs = vector_store.similarity_search(query=query, k=k, search_type=search_type, filters=to_odata(filters))
 
     return docs
 
@@ -48,68 +71,237 @@ def get_vector_store_azure(index_name: str)->AzureSearch:
     """
     Cria e retorna uma instância do cliente AzureSearch para interagir com o serviço Azure Search.
 
+    O cliente é mantido no pool de clientes do processo, um por índice, para que as consultas
+    reutilizem a mesma conexão e o mesmo modelo de embeddings.
+
+    Se `index_name` for um alias, o cliente aponta para o índice físico ao qual o alias está associado
+    (ver `resolve_index_name_azure`); após a troca do alias, as consultas passam para o novo índice.
+
     Args:
-        index_name (str): O nome do índice a ser usado no Azure Search.
+        index_name (str): O nome do índice ou do alias a ser usado no Azure Search.
 
     Returns:
         AzureSearch: Uma instância da classe AzureSearch configurada com o índice fornecido.
     """
 
-    embedding_function = create_azure_embeddings_llm()
-    fields = get_fields()
-    vector_store = AzureSearch(
-       azure_search_endpoint=vector_store_address,
-       azure_search_key=vector_store_password,
-       index_name=index_name,
-       embedding_function=embedding_function,
-       fields=fields,
+    index_name = resolve_index_name_azure(index_name)
+
+    def factory():
+        embedding_function = LLM(provider="AZURE").create_embeddings_llm()
+        fields = get_fields()
+        return AzureSearch(
+           azure_search_endpoint=vector_store_address,
+           azure_search_key=vector_store_password,
+           index_name=index_name,
+           embedding_function=embedding_function,
+           fields=fields,
+        )
+
+    return client_pool.get_or_create(("AZURE", "search", index_name), factory)
+
+
+def get_index_client_azure()->SearchIndexClient:
+    """
+    Retorna o cliente compartilhado de administração de índices do Azure Search.
+
+    Returns:
+        SearchIndexClient: O cliente usado para listar, remover e obter estatísticas dos índices.
+    """
+
+    return client_pool.get_or_create(
+        ("AZURE", "index_client"),
+        lambda: SearchIndexClient(vector_store_address, AzureKeyCredential(vector_store_password)),
     )
-    return vector_store
 
 
-def add_documents_to_vector_store_with_retry_azure(vector_store: AzureSearch, documents: List[Document]) -> List[str]:
+def resolve_index_name_azure(index_name: str)->str:
+    """
+    Resolve um alias do Azure Search para o nome do índice físico.
+
+    O resultado fica em cache por INDEX_ALIAS_TTL segundos, de modo que uma troca de alias feita por outro
+    processo (ex.: a ingestão) chega às consultas sem uma chamada ao serviço por requisição. Se o nome não
+    for um alias, ele é devolvido sem alteração.
+
+    Args:
+        index_name (str): O nome do alias ou do índice.
+
+    Returns:
+        str: O nome do índice físico.
+    """
+
+    now = time.monotonic()
+    cached = _resolved_aliases.get(index_name)
+    if cached is not None and now - cached[1] < index_alias_ttl:
+        return cached[0]
+
+    try:
+        resolved = get_index_client_azure().get_alias(index_name).indexes[0]
+    except ResourceNotFoundError:
+        resolved = index_name
+    except Exception as e:
+        # Keep serving from the last known index if the service cannot be reached
+        logger.error(f"resolve_index_name_azure - An error occurred: {e}")
+        resolved = cached[0] if cached is not None else index_name
+
+    _resolved_aliases[index_name] = (resolved, now)
+    return resolved
+
+
+def swap_index_alias_azure(alias_name: str, index_name: str)->None:
+    """
+    Aponta o alias para o índice informado, em uma única operação no serviço.
+
+    Um alias não pode ter o nome de um índice existente. Na primeira troca, se ainda houver um índice
+    com o nome do alias (a implantação anterior, sem alias), ele é removido imediatamente antes de o alias
+    ser criado.
+
+    Args:
+        alias_name (str): O nome do alias, usado pelas consultas.
+        index_name (str): O nome do índice físico que passa a responder pelo alias.
+    """
+
+    client = get_index_client_azure()
+    if alias_name in client.list_index_names():
+        logger.warning(f"Replacing index {alias_name} with an alias to {index_name}")
+        client.delete_index(alias_name)
+        client_pool.invalidate(("AZURE", "search", alias_name))
+
+    client.create_or_update_alias(SearchAlias(name=alias_name, indexes=[index_name]))
+    _resolved_aliases[alias_name] = (index_name, time.monotonic())
+
+
+def list_index_versions_azure(alias_name: str)->List[str]:
+    """
+    Lista as versões de um índice (`<alias>-v<timestamp>`), da mais antiga para a mais recente.
+
+    Args:
+        alias_name (str): O nome do alias.
+
+    Returns:
+        List[str]: Os nomes dos índices físicos.
+    """
+
+    prefix = f"{alias_name}-v"
+    return sorted(name for name in get_index_client_azure().list_index_names() if name.startswith(prefix))
+
+
+def document_key_azure(chunk_id: str)->str:
+    """
+    Retorna a chave com que o AzureSearch grava um documento de `chunk_id` informado (em base64 URL-safe, pois
+    o Azure Search não aceita qualquer caractere na chave). É a chave devolvida pelo upload e usada na cópia local.
+
+    Args:
+        chunk_id (str): O identificador do chunk.
+
+    Returns:
+        str: A chave do documento no índice.
+    """
+
+    return base64.urlsafe_b64encode(chunk_id.encode("utf-8")).decode("ascii")
+
+
+def get_missing_fields_azure(index_name: str)->List[str]:
+    """
+    Lista os campos de `get_fields` que não existem em um índice já criado.
+
+    O AzureSearch envia como campos do índice as chaves de `metadata` de mesmo nome (ex.: `area`); um índice
+    criado antes da inclusão de um campo rejeita esses documentos.
+
+    Args:
+        index_name (str): O nome do índice.
+
+    Returns:
+        List[str]: Os nomes dos campos ausentes (vazio se o índice não existir).
+    """
+
+    try:
+        existing = {field.name for field in get_index_client_azure().get_index(index_name).fields}
+    except ResourceNotFoundError:
+        return []
+    return [field.name for field in get_fields() if field.name not in existing]
+
+
+def add_documents_to_vector_store_with_retry_azure(vector_store: AzureSearch, documents: List[Document], batch_size: int = 10) -> List[str]:
     """
     Adiciona documentos ao vector store com tentativa de reenvio em caso de erro.
 
-    Adiciona documentos ao índice do Azure Search em lotes, lidando com limites de taxa e outros erros. 
-    Se ocorrer um erro de limite de taxa (código 429), a função espera um tempo e tenta novamente. 
-    Em caso de outros erros, eles são registrados e a função tenta adicionar os documentos restantes.
+    Documentos com `chunk_id` em `metadata` usam esse valor como chave, de modo que reenviá-los
+    sobrescreve a versão anterior no índice.
+
+    Adiciona documentos ao índice do Azure Search em lotes, respeitando o limitador de vazão compartilhado
+    (SEARCH_UPLOAD_RPM). Em erros transitórios (429, 5xx, falhas de conexão) o mesmo lote é reenviado após
+    o Retry-After informado pelo serviço ou um backoff exponencial com jitter, e o tamanho do lote cai pela
+    metade. Enquanto os envios têm sucesso, o lote dobra de tamanho até SEARCH_UPLOAD_MAX_BATCH_SIZE.
 
     Args:
         vector_store (AzureSearch): A instância do cliente AzureSearch usada para adicionar documentos.
         documents (List[Document]): A lista de documentos a serem adicionados.
+        batch_size (int, opcional): O tamanho inicial do lote. O padrão é 10.
 
     Returns:
         List[str]: Uma lista de IDs dos documentos que foram adicionados com sucesso.
+
+    Raises:
+        Exception: Se o erro não for transitório ou se as tentativas de um lote se esgotarem.
     """
 
     added_document_ids = []
-    batch_size = 10  # Adjust the batch size according to your rate limit
-    retry_after = 30  # Default retry after 30 seconds
- 
-    for i in range(0, len(documents), batch_size):
-        batch = documents[i:i + batch_size]
+    batch = AdaptiveBatchSize(initial=batch_size, maximum=max_upload_batch_size)
+    attempt = 0
+    i = 0
+
+    while i < len(documents):
+        size = batch.size
         try:
-            resp = vector_store.add_documents(documents=batch)
-            added_document_ids.extend(resp)
-            logger.info(f"Added documents {i} to {i + batch_size}")
+            upload_rate_limiter.acquire()
+            batch_documents = documents[i:i + size]
+            keys = [doc.metadata.get("chunk_id") for doc in batch_documents]
+            resp = vector_store.add_documents(documents=batch_documents, keys=keys if all(keys) else None)
         except Exception as e:
-            # Check if the error is a rate limit error (429)
-            if e.code == 429:
-                retry_after = e.retryAfter if hasattr(e, 'retryAfter') else retry_after
-                logger.info(f"Rate limit hit. Retrying after {retry_after} seconds.")
-            else:
+            # Payload too large: retry right away with a smaller batch
+            if get_status_code(e) == 413 and size > 1:
+                batch.failure()
+                continue
+
+            if attempt >= MAX_RETRIES or not is_retryable(e):
                 logger.error(f"add_documents_to_vector_store_with_retry_azure - An error occurred: {e}")
-            time.sleep(retry_after)
-            # Retry the same batch after waiting
+                raise
+
+            retry_after = get_retry_after(e)
+            if retry_after is not None:
+                upload_rate_limiter.pause(retry_after)
+            delay = backoff_delay(attempt, retry_after)
+            batch.failure()
+            attempt += 1
+            logger.info(f"Rate limit hit. Retrying after {delay:.1f} seconds.")
+            time.sleep(delay)
+            # Retry the same documents after waiting
             continue
- 
-        # Delay between successful batches to avoid hitting the rate limit
-        time.sleep(1)
+
+        added_document_ids.extend(resp)
+        logger.info(f"Added documents {i} to {i + len(resp)}")
+        i += len(resp)
+        attempt = 0
+        batch.success()
  
     return added_document_ids
 
 
+def delete_documents_from_vector_store_azure(vector_store: AzureSearch, ids: List[str]) -> None:
+    """
+    Remove documentos do índice pelos seus IDs, em lotes e com reenvio em caso de erro transitório.
+
+    Args:
+        vector_store (AzureSearch): A instância do cliente AzureSearch do índice.
+        ids (List[str]): Os IDs dos documentos, como retornados na adição.
+    """
+
+    for i in range(0, len(ids), max_upload_batch_size):
+        batch = ids[i:i + max_upload_batch_size]
+        call_with_retry(vector_store.delete, batch, limiter=upload_rate_limiter)
+        logger.info(f"Deleted {len(batch)} documents")
+
+
 def delete_index_from_vector_store_azure(index_name: str)->None:
     """
     Remove um índice da vector store.
@@ -124,13 +316,34 @@ def delete_index_from_vector_store_azure(index_name: str)->None:
         None
     """
 
-    client = SearchIndexClient(vector_store_address, AzureKeyCredential(vector_store_password))
+    client = get_index_client_azure()
     indices = client.list_indexes()
     index_exists = any(index.name == index_name for index in indices)
     if index_exists:
       client.delete_index(index_name)
 
+    # The pooled client points to the deleted index and must be rebuilt on next use
+    client_pool.invalidate(("AZURE", "search", index_name))
+
   
+def get_document_count_azure(index_name: str)->int:
+    """
+    Retorna o número de documentos de um índice, segundo as estatísticas do Azure Search.
+
+    As estatísticas são atualizadas pelo serviço com alguns segundos de atraso em relação ao upload.
+
+    Args:
+        index_name (str): O nome do índice.
+
+    Returns:
+        int: O número de documentos.
+    """
+
+    client = get_index_client_azure()
+    index_statistics = client.get_index_statistics(index_name)
+    return index_statistics["document_count"]
+
+
 def is_indexing_completed(index_name: str)->MutableMapping[str, any]:
     """
     Verifica se a indexação de documentos foi concluída no Azure Search.
@@ -147,9 +360,7 @@ def is_indexing_completed(index_name: str)->MutableMapping[str, any]:
         que a indexação foi concluída; caso contrário, retorna False.
     """
 
-    client = SearchIndexClient(vector_store_address, AzureKeyCredential(vector_store_password))
-    index_statistics = client.get_index_statistics(index_name)
-    return index_statistics["document_count"] > 0
+    return get_document_count_azure(index_name) > 0
 
 
 def get_fields():
@@ -162,6 +373,13 @@ def get_fields():
     - `content_vector`: Campo pesquisável com vetores, usado para busca vetorial com dimensões especificadas e um perfil de busca.
     - `metadata`: Campo pesquisável do tipo String.
     - `source`: Campo filtrável do tipo String, usado para filtrar pela origem do documento.
+    - `area`: Campo filtrável do tipo String, a área (tema) do documento.
+    - `doc_type`: Campo filtrável do tipo String, o tipo do arquivo de origem (ex.: "pdf").
+    - `date`: Campo filtrável do tipo DateTimeOffset, a data do documento.
+
+    Os campos filtráveis são preenchidos com os valores de mesmo nome em `metadata` (ver `ingestion.load_and_chunk`);
+    índices criados antes da inclusão de `area`, `doc_type` e `date` são reconstruídos pelo `main_rag` (ver
+    `get_missing_fields_azure`).
 
     Returns:
         List[SearchField]: Lista de objetos `SearchField` configurados para o índice.
@@ -197,6 +415,24 @@ def get_fields():
           type=SearchFieldDataType.String,
           filterable=True,
       ),
+      SimpleField(
+          name="area",
+          type=SearchFieldDataType.String,
+          filterable=True,
+          facetable=True,
+      ),
+      SimpleField(
+          name="doc_type",
+          type=SearchFieldDataType.String,
+          filterable=True,
+          facetable=True,
+      ),
+      SimpleField(
+          name="date",
+          type=SearchFieldDataType.DateTimeOffset,
+          filterable=True,
+          sortable=True,
+      ),
     ]
 
     return fields
\ No newline at end of file
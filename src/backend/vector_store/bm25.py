@@ -0,0 +1,190 @@
+import re
+import math
+import unicodedata
+from collections import Counter
+from typing import Container, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Accent-folded, as the tokens they are compared with
+PORTUGUESE_STOPWORDS = frozenset("""
+a ao aos aquela aquelas aquele aqueles aquilo as ate com como da das de dela delas dele deles depois do dos
+e ela elas ele eles em entre era eram essa essas esse esses esta estas este estes eu foi for foram ha isso
+isto ja la lhe lhes mais mas me mesmo meu meus minha minhas muito na nao nas nem no nos nossa nossas nosso
+nossos num numa o os ou para pela pelas pelo pelos por qual quando que quem se sem ser seu seus so sua suas
+tambem te tem tu tua tuas um uma umas uns voce voces vos
+""".split())
+
+# Plural endings (after accent folding) whose singular has another ending, longest first
+PLURAL_SUFFIXES = (
+    ("oes", "ao"),
+    ("aes", "ao"),
+    ("ais", "al"),
+    ("eis", "el"),
+    ("ois", "ol"),
+    ("ns", "m"),
+)
+MIN_STEM_CHARS = 2
+
+
+def fold_accents(text: str) -> str:
+    """
+    Remove acentos e cedilhas (ex.: "férias" -> "ferias", "ação" -> "acao").
+
+    Args:
+        text (str): O texto.
+
+    Returns:
+        str: O texto sem acentos.
+    """
+
+    return unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+
+
+def _singular(token: str) -> str:
+    for suffix, replacement in PLURAL_SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= MIN_STEM_CHARS:
+            return token[:-len(suffix)] + replacement
+    # Without accents a singular may also end in "s" or "es" ("mês", "país"), so the final "s" and "e" letters
+    # are dropped alike: "mês"/"meses", "país"/"países" and "parte"/"partes" give the same term
+    stem = token.rstrip("es")
+    return stem if len(stem) >= MIN_STEM_CHARS else token[:MIN_STEM_CHARS]
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Divide um texto em português em termos para a busca lexical.
+
+    O texto é convertido para minúsculas, os acentos são removidos, as stopwords descartadas e o singular e o
+    plural reduzidos a um mesmo radical, de modo que "Férias", "ferias" e "féria" (ou "mês" e "meses") resultam
+    no mesmo termo.
+
+    Args:
+        text (str): O texto.
+
+    Returns:
+        List[str]: Os termos, na ordem em que aparecem.
+    """
+
+    return [
+        _singular(token) for token in TOKEN_PATTERN.findall(fold_accents(text.lower()))
+        if token not in PORTUGUESE_STOPWORDS
+    ]
+
+
+class BM25Index:
+    """
+    Índice invertido com pontuação BM25.
+
+    Args:
+        k1 (float, opcional): A saturação da frequência dos termos. O padrão é 1.5.
+        b (float, opcional): A normalização pelo tamanho do documento. O padrão é 0.75.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[Hashable, int]] = {}
+        self._lengths: Dict[Hashable, int] = {}
+        self._terms: Dict[Hashable, Tuple[str, ...]] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def add(self, key: Hashable, text: str) -> None:
+        """
+        Indexa um documento. Um documento com a mesma chave é substituído.
+
+        Args:
+            key (Hashable): A chave do documento.
+            text (str): O texto do documento.
+        """
+
+        if key in self._lengths:
+            self.remove(key)
+
+        terms = Counter(tokenize(text))
+        for term, frequency in terms.items():
+            self._postings.setdefault(term, {})[key] = frequency
+
+        length = sum(terms.values())
+        self._terms[key] = tuple(terms)
+        self._lengths[key] = length
+        self._total_length += length
+
+    def remove(self, key: Hashable) -> None:
+        """
+        Remove um documento do índice.
+
+        Args:
+            key (Hashable): A chave do documento.
+        """
+
+        length = self._lengths.pop(key, None)
+        if length is None:
+            return
+
+        self._total_length -= length
+        for term in self._terms.pop(key):
+            del self._postings[term][key]
+            if not self._postings[term]:
+                del self._postings[term]
+
+    def search(self, query: str, k: int = 10, keys: Optional[Container[Hashable]] = None) -> List[Tuple[Hashable, float]]:
+        """
+        Busca os documentos com maior pontuação BM25 para a consulta.
+
+        Args:
+            query (str): A consulta.
+            k (int, opcional): O número de documentos. O padrão é 10.
+            keys (Container[Hashable], opcional): Restringe a busca a estes documentos. As estatísticas do corpus
+                (IDF e tamanho médio) continuam sendo as do índice inteiro.
+
+        Returns:
+            List[Tuple[Hashable, float]]: As chaves dos documentos e as suas pontuações, da maior para a menor.
+        """
+
+        if not self._lengths:
+            return []
+
+        n_documents = len(self._lengths)
+        average_length = self._total_length / n_documents
+        scores: Dict[Hashable, float] = {}
+
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_documents - len(postings) + 0.5) / (len(postings) + 0.5))
+            for key, frequency in postings.items():
+                if keys is not None and key not in keys:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[key] / average_length)
+                scores[key] = scores.get(key, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Iterable[Hashable]], k: int = 60) -> List[Tuple[Hashable, float]]:
+    """
+    Combina rankings de buscas diferentes (ex.: lexical e vetorial) por Reciprocal Rank Fusion.
+
+    Cada documento recebe a soma de 1 / (k + posição) nos rankings em que aparece; por usar apenas as posições,
+    a fusão não depende da escala das pontuações de cada busca.
+
+    Args:
+        rankings (Sequence[Iterable[Hashable]]): As chaves dos documentos de cada busca, da melhor para a pior.
+        k (int, opcional): A constante de suavização. O padrão é 60.
+
+    Returns:
+        List[Tuple[Hashable, float]]: As chaves e as pontuações combinadas, da maior para a menor.
+    """
+
+    scores: Dict[Hashable, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, start=1):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,157 @@
+from datetime import date, timedelta
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+
+# Request keys -> metadata / index fields
+FILTER_FIELDS = {"source": "source", "area": "area", "doc_type": "doc_type"}
+DATE_FIELD = "date"
+
+
+class SearchFilters(NamedTuple):
+    """
+    Filtros estruturados da busca. Os valores de um mesmo campo são combinados com OU, e os campos entre si com E.
+    As datas (ISO, "AAAA-MM-DD") incluem os dois extremos.
+    """
+
+    source: Tuple[str, ...] = ()
+    area: Tuple[str, ...] = ()
+    doc_type: Tuple[str, ...] = ()
+    date_from: Optional[str] = None
+    date_to: Optional[str] = None
+
+    @property
+    def empty(self) -> bool:
+        return not any(self)
+
+    def cache_key(self) -> str:
+        """
+        Retorna uma representação canônica dos filtros, usada para separar as respostas em cache por escopo.
+
+        Returns:
+            str: A chave dos filtros (vazia se não houver filtros).
+        """
+
+        if self.empty:
+            return ""
+        parts = [f"{field}={','.join(sorted(getattr(self, field)))}" for field in FILTER_FIELDS if getattr(self, field)]
+        parts += [f"{name}={getattr(self, name)}" for name in ("date_from", "date_to") if getattr(self, name)]
+        return ";".join(parts)
+
+
+def _values(name: str, value: Any) -> Tuple[str, ...]:
+    values = [value] if isinstance(value, str) else value
+    if not isinstance(values, list) or not all(isinstance(item, str) for item in values):
+        raise ValueError(f"Filter '{name}' must be a string or a list of strings")
+    return tuple(dict.fromkeys(item.strip() for item in values if item.strip()))
+
+
+def _date(name: str, value: Any) -> Optional[str]:
+    if value in (None, ""):
+        return None
+    try:
+        return date.fromisoformat(value).isoformat()
+    except (TypeError, ValueError):
+        raise ValueError(f"Filter '{name}' must be a date in the format YYYY-MM-DD")
+
+
+def parse_filters(data: Optional[Mapping[str, Any]]) -> Optional[SearchFilters]:
+    """
+    Converte os filtros recebidos na requisição, ex.:
+    {"area": "parentalidade", "doc_type": ["pdf", "txt"], "date_from": "2024-01-01"}.
+
+    Args:
+        data (Mapping[str, Any], opcional): Os filtros: `source`, `area` e `doc_type` (texto ou lista de textos),
+            `date_from` e `date_to` (datas ISO).
+
+    Returns:
+        Optional[SearchFilters]: Os filtros, ou None se nenhum for informado.
+
+    Raises:
+        ValueError: Se houver campos desconhecidos ou valores inválidos.
+    """
+
+    if not data:
+        return None
+    if not isinstance(data, Mapping):
+        raise ValueError("Filters must be an object")
+
+    unknown = set(data) - set(FILTER_FIELDS) - {"date_from", "date_to"}
+    if unknown:
+        raise ValueError(f"Unknown filters: {sorted(unknown)}")
+
+    filters = SearchFilters(
+        **{field: _values(field, data[field]) for field in FILTER_FIELDS if field in data},
+        date_from=_date("date_from", data.get("date_from")),
+        date_to=_date("date_to", data.get("date_to")),
+    )
+    if filters.date_from and filters.date_to and filters.date_from > filters.date_to:
+        raise ValueError("Filter 'date_from' must not be after 'date_to'")
+
+    return None if filters.empty else filters
+
+
+def _quote(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def to_odata(filters: Optional[SearchFilters]) -> Optional[str]:
+    """
+    Converte os filtros em uma expressão OData `$filter` do Azure AI Search.
+
+    Args:
+        filters (SearchFilters, opcional): Os filtros.
+
+    Returns:
+        Optional[str]: A expressão, ou None se não houver filtros.
+    """
+
+    if filters is None or filters.empty:
+        return None
+
+    clauses: List[str] = []
+    for name, field in FILTER_FIELDS.items():
+        values = getattr(filters, name)
+        if values:
+            clauses.append("(" + " or ".join(f"{field} eq {_quote(value)}" for value in values) + ")")
+    if filters.date_from:
+        clauses.append(f"{DATE_FIELD} ge {filters.date_from}T00:00:00Z")
+    if filters.date_to:
+        # The end date is inclusive: everything before the start of the next day
+        end = date.fromisoformat(filters.date_to) + timedelta(days=1)
+        clauses.append(f"{DATE_FIELD} lt {end.isoformat()}T00:00:00Z")
+
+    return " and ".join(clauses)
+
+
+def matches(filters: Optional[SearchFilters], metadata: Dict[str, Any]) -> bool:
+    """
+    Verifica se os metadados de um documento atendem aos filtros, com a mesma semântica de `to_odata`.
+    Usada como pré-filtro pela vector store local.
+
+    Args:
+        filters (SearchFilters, opcional): Os filtros.
+        metadata (Dict[str, Any]): Os metadados do documento.
+
+    Returns:
+        bool: True se o documento atende aos filtros (ou se não houver filtros).
+    """
+
+    if filters is None:
+        return True
+
+    for name, field in FILTER_FIELDS.items():
+        values = getattr(filters, name)
+        if values and metadata.get(field) not in values:
+            return False
+
+    if filters.date_from or filters.date_to:
+        # Dates are stored in UTC ISO format, so the day is the first 10 characters
+        day = str(metadata.get(DATE_FIELD) or "")[:10]
+        if not day:
+            return False
+        if filters.date_from and day < filters.date_from:
+            return False
+        if filters.date_to and day > filters.date_to:
+            return False
+
+    return True
@@ -0,0 +1,588 @@
+import os
+import json
+import uuid
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from dotenv import load_dotenv
+from loguru import logger
+from langchain.docstore.document import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from src.backend.llm.llm import LLM
+from src.backend.utils.client_pool import client_pool
+from src.backend.utils.utils import folders
+from .bm25 import BM25Index, reciprocal_rank_fusion
+from .filters import SearchFilters, matches
+
+load_dotenv()
+
+
+LOCAL_VECTOR_STORE_DIR = os.getenv("LOCAL_VECTOR_STORE_DIR", os.path.join(folders.ROOT_DIR, "vector_store"))
+# Below this many vectors an exact search is faster than the IVF index
+LOCAL_IVF_MIN_VECTORS = int(os.getenv("LOCAL_IVF_MIN_VECTORS", "20000"))
+LOCAL_IVF_NPROBE = int(os.getenv("LOCAL_IVF_NPROBE", "8"))
+LOCAL_HYBRID_CANDIDATES = int(os.getenv("LOCAL_HYBRID_CANDIDATES", "50"))
+
+# Keeps a local copy of the remote indexes, used by "local_hybrid" and when the remote service is throttled
+LOCAL_SEARCH_MIRROR = os.getenv("LOCAL_SEARCH_MIRROR", "true").lower() == "true"
+LOCAL_MIRROR_DIR = os.path.join(LOCAL_VECTOR_STORE_DIR, "mirror")
+
+HYBRID_SEARCH_TYPES = ("hybrid", "semantic_hybrid", "local_hybrid")
+
+VECTORS_FILE = "vectors.npy"
+DOCUMENTS_FILE = "documents.json"
+IVF_FILE = "ivf.npz"
+ALIASES_FILE = "aliases.json"
+
+
+class LocalVectorStore(VectorStore):
+    """
+    Vector store local, em processo, persistida em um diretório por índice.
+
+    Os vetores (normalizados, float32) ficam em uma matriz `.npy` mapeada em memória; os textos e metadados
+    em um arquivo JSON. A busca é exata (produto interno com NumPy) para corpora pequenos e, a partir de
+    LOCAL_IVF_MIN_VECTORS vetores, aproximada com um índice IVF (k-means), consultando as LOCAL_IVF_NPROBE
+    listas mais próximas da consulta.
+
+    A busca híbrida combina essa busca vetorial com um índice BM25 em memória, construído no primeiro uso.
+
+    Com filtros (ver `SearchFilters`), os documentos que os atendem são selecionados antes da busca, que passa a
+    ser exata sobre esse subconjunto; a seleção fica em cache até a próxima alteração do índice.
+
+    Outros processos que gravam no mesmo diretório (ex.: a ingestão) são percebidos pela data de modificação
+    dos arquivos, e a store é recarregada na consulta seguinte.
+
+    Args:
+        index_name (str): O nome do índice.
+        embedding_function (Embeddings): O modelo de embeddings.
+        path (str, opcional): O diretório do índice. O padrão é LOCAL_VECTOR_STORE_DIR/<index_name>.
+    """
+
+    def __init__(self, index_name: str, embedding_function: Embeddings, path: Optional[str] = None) -> None:
+        self.index_name = index_name
+        self.embedding_function = embedding_function
+        self.embed_query = embedding_function.embed_query
+        self.path = path or os.path.join(LOCAL_VECTOR_STORE_DIR, index_name)
+
+        self._lock = threading.RLock()
+        self._ids: List[Optional[str]] = []
+        self._documents: List[Optional[Tuple[str, Dict]]] = []
+        self._positions: Dict[str, int] = {}
+        self._vectors: Optional[np.ndarray] = None
+        self._ivf: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._alive: Optional[np.ndarray] = None
+        self._bm25: Optional[BM25Index] = None
+        self._filtered: Dict[str, np.ndarray] = {}
+        self._loaded_mtime = None
+
+        os.makedirs(self.path, exist_ok=True)
+        self._load()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding_function
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._maybe_reload()
+            return len(self._positions)
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[Dict]] = None,
+                  keys: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        """
+        Adiciona textos ao índice. Textos com uma chave já existente substituem a versão anterior.
+
+        Args:
+            texts (Iterable[str]): Os textos.
+            metadatas (List[Dict], opcional): Os metadados de cada texto.
+            keys (List[str], opcional): As chaves dos documentos. Se omitidas, são geradas.
+
+        Returns:
+            List[str]: As chaves dos documentos adicionados.
+        """
+
+        texts = list(texts)
+        if not texts:
+            return []
+
+        metadatas = metadatas or [{} for _ in texts]
+        keys = keys or [str(uuid.uuid4()) for _ in texts]
+        vectors = _normalize(np.asarray(self.embedding_function.embed_documents(texts), dtype=np.float32))
+
+        with self._lock:
+            self._maybe_reload()
+            rows = []
+            for key, text, metadata in zip(keys, texts, metadatas):
+                position = self._positions.get(key)
+                if position is None:
+                    position = len(self._ids)
+                    self._ids.append(key)
+                    self._documents.append(None)
+                    self._positions[key] = position
+                self._documents[position] = (text, metadata)
+                rows.append(position)
+                if self._bm25 is not None:
+                    self._bm25.add(key, text)
+
+            self._write_vectors(rows, vectors)
+            self._save_documents()
+
+        return keys
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> bool:
+        """
+        Remove documentos do índice pelas suas chaves.
+
+        As linhas removidas permanecem na matriz e são descartadas quando passam de um quarto do total.
+
+        Args:
+            ids (List[str]): As chaves dos documentos.
+
+        Returns:
+            bool: True se algum documento foi removido.
+        """
+
+        with self._lock:
+            self._maybe_reload()
+            positions = [self._positions.pop(key) for key in ids or [] if key in self._positions]
+            for position in positions:
+                if self._bm25 is not None:
+                    self._bm25.remove(self._ids[position])
+                self._ids[position] = None
+                self._documents[position] = None
+
+            if not positions:
+                return False
+
+            if len(self._ids) - len(self._positions) > len(self._ids) // 4:
+                self._compact()
+            else:
+                self._save_documents()
+
+        return True
+
+    def get_vectors(self, keys: List[str]) -> Optional[np.ndarray]:
+        """
+        Retorna os vetores gravados (normalizados) dos documentos.
+
+        Args:
+            keys (List[str]): As chaves dos documentos.
+
+        Returns:
+            Optional[np.ndarray]: Os vetores, na ordem das chaves, ou None se alguma chave não existir.
+        """
+
+        with self._lock:
+            self._maybe_reload()
+            positions = [self._positions.get(key) for key in keys]
+            if self._vectors is None or any(position is None for position in positions):
+                return None
+            return np.array(self._vectors[positions], dtype=np.float32)
+
+    def similarity_search(self, query: str, k: int = 4, search_type: str = "similarity",
+                          filters: Optional[SearchFilters] = None, **kwargs: Any) -> List[Document]:
+        """
+        Busca os documentos mais próximos da consulta.
+
+        Com `search_type` "hybrid", "semantic_hybrid" ou "local_hybrid" a busca combina BM25 e similaridade
+        vetorial (ver `hybrid_search`); nos demais casos é apenas vetorial.
+
+        Args:
+            query (str): A consulta.
+            k (int, opcional): O número de documentos. O padrão é 4.
+            search_type (str, opcional): O tipo de busca. O padrão é "similarity".
+            filters (SearchFilters, opcional): Restringe a busca aos documentos que atendem aos filtros.
+
+        Returns:
+            List[Document]: Os documentos, do mais para o menos relevante.
+        """
+
+        if search_type in HYBRID_SEARCH_TYPES:
+            return self.hybrid_search(query, k=k, filters=filters)
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, filters=filters)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, filters: Optional[SearchFilters] = None,
+                                     **kwargs: Any) -> List[Tuple[Document, float]]:
+        """
+        Busca os documentos mais próximos da consulta, com a similaridade de cosseno de cada um.
+
+        Args:
+            query (str): A consulta.
+            k (int, opcional): O número de documentos. O padrão é 4.
+            filters (SearchFilters, opcional): Restringe a busca aos documentos que atendem aos filtros.
+
+        Returns:
+            List[Tuple[Document, float]]: Os documentos e as suas similaridades.
+        """
+
+        return self.similarity_search_by_vector_with_score(self.embed_query(query), k=k, filters=filters)
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, filters: Optional[SearchFilters] = None,
+                                    **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k=k, filters=filters)]
+
+    def similarity_search_by_vector_with_score(self, embedding: List[float], k: int = 4,
+                                               filters: Optional[SearchFilters] = None) -> List[Tuple[Document, float]]:
+        """
+        Busca os documentos mais próximos de um vetor.
+
+        Args:
+            embedding (List[float]): O vetor da consulta.
+            k (int, opcional): O número de documentos. O padrão é 4.
+            filters (SearchFilters, opcional): Restringe a busca aos documentos que atendem aos filtros.
+
+        Returns:
+            List[Tuple[Document, float]]: Os documentos e as suas similaridades.
+        """
+
+        with self._lock:
+            self._maybe_reload()
+            allowed = self._filtered_positions(filters)
+            return [(self._document(position), score) for position, score in self._vector_ranking(embedding, k, allowed)]
+
+    def hybrid_search(self, query: str, k: int = 4, filters: Optional[SearchFilters] = None) -> List[Document]:
+        """
+        Busca híbrida: combina o ranking lexical (BM25) e o vetorial por Reciprocal Rank Fusion.
+
+        Cada busca contribui com até LOCAL_HYBRID_CANDIDATES documentos para a fusão.
+
+        Args:
+            query (str): A consulta.
+            k (int, opcional): O número de documentos. O padrão é 4.
+            filters (SearchFilters, opcional): Restringe a busca aos documentos que atendem aos filtros.
+
+        Returns:
+            List[Document]: Os documentos, do mais para o menos relevante.
+        """
+
+        embedding = self.embed_query(query)
+        candidates = max(k, LOCAL_HYBRID_CANDIDATES)
+
+        with self._lock:
+            self._maybe_reload()
+            allowed = self._filtered_positions(filters)
+            keys = None if allowed is None else {self._ids[position] for position in allowed.tolist()}
+            vector_ranking = [self._ids[position] for position, _ in self._vector_ranking(embedding, candidates, allowed)]
+            lexical_ranking = [key for key, _ in self._lexical_index().search(query, candidates, keys=keys)]
+            fused = reciprocal_rank_fusion([lexical_ranking, vector_ranking])[:k]
+            return [self._document(self._positions[key]) for key, _ in fused]
+
+    def _filtered_positions(self, filters: Optional[SearchFilters]) -> Optional[np.ndarray]:
+        # Positions of the live documents that match the filters, None when there is nothing to filter
+        if filters is None or filters.empty:
+            return None
+        key = filters.cache_key()
+        if key not in self._filtered:
+            self._filtered[key] = np.array([
+                position for position, document in enumerate(self._documents)
+                if document is not None and matches(filters, document[1])
+            ], dtype=np.int64)
+        return self._filtered[key]
+
+    def _vector_ranking(self, embedding: List[float], k: int, allowed: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        if not self._positions:
+            return []
+
+        query_vector = _normalize(np.asarray(embedding, dtype=np.float32)[None, :])[0]
+        count = len(self._ids)
+        if allowed is not None:
+            # Pre-filtered: an exact search over the matching rows
+            candidates = allowed
+        else:
+            candidates = self._ivf_candidates(query_vector) if count >= LOCAL_IVF_MIN_VECTORS else None
+        vectors = self._vectors[:count] if candidates is None else self._vectors[candidates]
+        scores = vectors @ query_vector
+
+        if candidates is None:
+            candidates = np.arange(count)
+        # Deleted rows stay in the matrix until the next compaction
+        if self._alive is None:
+            self._alive = np.array([key is not None for key in self._ids], dtype=bool)
+        alive = self._alive[candidates]
+        candidates, scores = candidates[alive], scores[alive]
+        if not len(candidates):
+            return []
+
+        top = min(k, len(candidates))
+        best = np.argpartition(-scores, top - 1)[:top] if top < len(candidates) else np.arange(len(candidates))
+        best = best[np.argsort(-scores[best])]
+
+        return [(int(candidates[i]), float(scores[i])) for i in best]
+
+    def _lexical_index(self) -> BM25Index:
+        # Built on first use: only hybrid searches need it
+        if self._bm25 is None:
+            self._bm25 = BM25Index()
+            for key, document in zip(self._ids, self._documents):
+                if key is not None:
+                    self._bm25.add(key, document[0])
+        return self._bm25
+
+    def _document(self, position: int) -> Document:
+        text, metadata = self._documents[position]
+        return Document(page_content=text, metadata=dict(metadata))
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[Dict]] = None,
+                   index_name: str = "langchain", **kwargs: Any) -> "LocalVectorStore":
+        store = cls(index_name, embedding, path=kwargs.pop("path", None))
+        store.add_texts(texts, metadatas, **kwargs)
+        return store
+
+    def _write_vectors(self, rows: List[int], vectors: np.ndarray) -> None:
+        count = len(self._ids)
+        dimensions = vectors.shape[1]
+        capacity = 0 if self._vectors is None else self._vectors.shape[0]
+
+        if self._vectors is None or count > capacity:
+            # Grow geometrically so that appends copy the matrix only O(log n) times
+            new_capacity = max(count, capacity * 2, 1024)
+            tmp_path = os.path.join(self.path, f"{VECTORS_FILE}.tmp")
+            grown = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float32, shape=(new_capacity, dimensions))
+            if self._vectors is not None:
+                grown[:capacity] = self._vectors
+            grown.flush()
+            del grown
+            os.replace(tmp_path, os.path.join(self.path, VECTORS_FILE))
+            self._vectors = np.load(os.path.join(self.path, VECTORS_FILE), mmap_mode='r+')
+
+        self._vectors[rows] = vectors
+        self._vectors.flush()
+        self._ivf = None
+
+    def _compact(self) -> None:
+        alive = [i for i, key in enumerate(self._ids) if key is not None]
+        vectors = np.array(self._vectors[alive], dtype=np.float32)
+
+        self._ids = [self._ids[i] for i in alive]
+        self._documents = [self._documents[i] for i in alive]
+        self._positions = {key: i for i, key in enumerate(self._ids)}
+        self._vectors = None
+        if alive:
+            self._write_vectors(list(range(len(alive))), vectors)
+        self._save_documents()
+
+    def _save_documents(self) -> None:
+        tmp_path = os.path.join(self.path, f"{DOCUMENTS_FILE}.tmp")
+        with open(tmp_path, 'w', encoding='utf8') as f:
+            json.dump({"ids": self._ids, "documents": self._documents}, f, ensure_ascii=False)
+        os.replace(tmp_path, os.path.join(self.path, DOCUMENTS_FILE))
+        self._alive = None
+        self._filtered = {}
+        self._loaded_mtime = os.path.getmtime(os.path.join(self.path, DOCUMENTS_FILE))
+
+    def _load(self) -> None:
+        documents_path = os.path.join(self.path, DOCUMENTS_FILE)
+        vectors_path = os.path.join(self.path, VECTORS_FILE)
+        if not os.path.exists(documents_path) or not os.path.exists(vectors_path):
+            return
+
+        with open(documents_path, 'r', encoding='utf8') as f:
+            data = json.load(f)
+
+        self._ids = data["ids"]
+        self._documents = [tuple(document) if document is not None else None for document in data["documents"]]
+        self._positions = {key: i for i, key in enumerate(self._ids) if key is not None}
+        self._vectors = np.load(vectors_path, mmap_mode='r+')
+        self._ivf = None
+        self._alive = None
+        self._filtered = {}
+        self._bm25 = None
+        self._loaded_mtime = os.path.getmtime(documents_path)
+
+    def _maybe_reload(self) -> None:
+        documents_path = os.path.join(self.path, DOCUMENTS_FILE)
+        if os.path.exists(documents_path) and os.path.getmtime(documents_path) != self._loaded_mtime:
+            logger.info(f"Reloading local vector store {self.index_name}")
+            self._load()
+
+    def _ivf_candidates(self, query_vector: np.ndarray) -> np.ndarray:
+        if self._ivf is None:
+            self._ivf = self._load_or_build_ivf()
+        centroids, assignments = self._ivf
+
+        nprobe = min(LOCAL_IVF_NPROBE, len(centroids))
+        lists = np.argpartition(-(centroids @ query_vector), nprobe - 1)[:nprobe]
+        return np.flatnonzero(np.isin(assignments, lists))
+
+    def _load_or_build_ivf(self) -> Tuple[np.ndarray, np.ndarray]:
+        ivf_path = os.path.join(self.path, IVF_FILE)
+        count = len(self._ids)
+
+        if os.path.exists(ivf_path) and os.path.getmtime(ivf_path) >= self._loaded_mtime:
+            ivf = np.load(ivf_path)
+            if len(ivf["assignments"]) == count:
+                return ivf["centroids"], ivf["assignments"]
+
+        logger.info(f"Building IVF index for {self.index_name} ({count} vectors)")
+        centroids, assignments = build_ivf(np.asarray(self._vectors[:count]))
+        with open(ivf_path, 'wb') as f:
+            np.savez(f, centroids=centroids, assignments=assignments)
+        return centroids, assignments
+
+
+def build_ivf(vectors: np.ndarray, n_lists: Optional[int] = None, iterations: int = 10,
+              sample_size: int = 50000, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Agrupa os vetores com k-means esférico para o índice IVF.
+
+    Os centróides são treinados em uma amostra dos vetores; todos os vetores são então atribuídos à lista
+    do centróide mais próximo.
+
+    Args:
+        vectors (np.ndarray): Os vetores normalizados.
+        n_lists (int, opcional): O número de listas. O padrão é a raiz quadrada do número de vetores.
+        iterations (int, opcional): O número de iterações do k-means. O padrão é 10.
+        sample_size (int, opcional): O número máximo de vetores usados no treino. O padrão é 50000.
+        seed (int, opcional): A semente aleatória. O padrão é 0.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Os centróides e a lista de cada vetor.
+    """
+
+    rng = np.random.default_rng(seed)
+    n_lists = n_lists or max(1, int(np.sqrt(len(vectors))))
+
+    sample = vectors[rng.choice(len(vectors), size=min(sample_size, len(vectors)), replace=False)]
+    centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+
+    for _ in range(iterations):
+        labels = np.argmax(sample @ centroids.T, axis=1)
+        for i in range(n_lists):
+            members = sample[labels == i]
+            if len(members):
+                centroids[i] = members.sum(axis=0)
+        centroids = _normalize(centroids)
+
+    assignments = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), 8192):
+        assignments[start:start + 8192] = np.argmax(vectors[start:start + 8192] @ centroids.T, axis=1)
+
+    return centroids, assignments
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def get_vector_store_local(index_name: str) -> LocalVectorStore:
+    """
+    Retorna a vector store local do índice, mantida no pool de clientes do processo.
+
+    Os embeddings vêm do provedor de LLM configurado (LLM_PROVIDER); com 'FAKE', a store funciona sem
+    nenhum serviço externo.
+
+    Args:
+        index_name (str): O nome do índice ou do alias.
+
+    Returns:
+        LocalVectorStore: A vector store do índice.
+    """
+
+    index_name = resolve_index_name_local(index_name)
+    return client_pool.get_or_create(
+        ("LOCAL", "search", index_name),
+        lambda: LocalVectorStore(index_name, LLM().create_embeddings_llm()),
+    )
+
+
+def add_documents_to_vector_store_with_retry_local(vector_store: LocalVectorStore, documents: List[Document]) -> List[str]:
+    keys = [doc.metadata.get("chunk_id") for doc in documents]
+    return vector_store.add_documents(documents=documents, keys=keys if all(keys) else None)
+
+
+def delete_documents_from_vector_store_local(vector_store: LocalVectorStore, ids: List[str]) -> None:
+    vector_store.delete(ids)
+
+
+def delete_index_from_vector_store_local(index_name: str) -> None:
+    """
+    Remove o diretório de um índice local.
+
+    Args:
+        index_name (str): O nome do índice a ser removido.
+    """
+
+    _remove_directory(os.path.join(LOCAL_VECTOR_STORE_DIR, index_name))
+    client_pool.invalidate(("LOCAL", "search", index_name))
+
+
+def get_local_mirror(index_name: str, embedding_function: Embeddings) -> LocalVectorStore:
+    """
+    Retorna a cópia local de um índice remoto, mantida no pool de clientes do processo.
+
+    A cópia é gravada pela ingestão junto com o índice remoto, com as mesmas chaves, e atende a busca
+    "local_hybrid" e as consultas feitas enquanto o serviço remoto está limitando as requisições.
+
+    Args:
+        index_name (str): O nome do índice físico.
+        embedding_function (Embeddings): O modelo de embeddings do índice remoto.
+
+    Returns:
+        LocalVectorStore: A cópia local do índice.
+    """
+
+    return client_pool.get_or_create(
+        ("LOCAL", "mirror", index_name),
+        lambda: LocalVectorStore(index_name, embedding_function, path=os.path.join(LOCAL_MIRROR_DIR, index_name)),
+    )
+
+
+def local_mirror_exists(index_name: str) -> bool:
+    return os.path.exists(os.path.join(LOCAL_MIRROR_DIR, index_name, DOCUMENTS_FILE))
+
+
+def delete_local_mirror(index_name: str) -> None:
+    _remove_directory(os.path.join(LOCAL_MIRROR_DIR, index_name))
+    client_pool.invalidate(("LOCAL", "mirror", index_name))
+
+
+def _remove_directory(path: str) -> None:
+    if os.path.isdir(path):
+        for file_name in os.listdir(path):
+            os.remove(os.path.join(path, file_name))
+        os.rmdir(path)
+
+
+def _read_aliases() -> Dict[str, str]:
+    path = os.path.join(LOCAL_VECTOR_STORE_DIR, ALIASES_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf8') as f:
+        return json.load(f)
+
+
+def resolve_index_name_local(index_name: str) -> str:
+    return _read_aliases().get(index_name, index_name)
+
+
+def swap_index_alias_local(alias_name: str, index_name: str) -> None:
+    """
+    Aponta o alias para o índice informado, gravando o arquivo de aliases de forma atômica.
+
+    Args:
+        alias_name (str): O nome do alias.
+        index_name (str): O nome do índice físico.
+    """
+
+    aliases = _read_aliases()
+    aliases[alias_name] = index_name
+
+    os.makedirs(LOCAL_VECTOR_STORE_DIR, exist_ok=True)
+    path = os.path.join(LOCAL_VECTOR_STORE_DIR, ALIASES_FILE)
+    with open(f"{path}.tmp", 'w', encoding='utf8') as f:
+        json.dump(aliases, f)
+    os.replace(f"{path}.tmp", path)
+
+
+def list_index_versions_local(alias_name: str) -> List[str]:
+    if not os.path.isdir(LOCAL_VECTOR_STORE_DIR):
+        return []
+    prefix = f"{alias_name}-v"
+    return sorted(name for name in os.listdir(LOCAL_VECTOR_STORE_DIR) if name.startswith(prefix))
+
+
+def get_document_count_local(index_name: str) -> int:
+    return len(get_vector_store_local(index_name))
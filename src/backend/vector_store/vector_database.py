@@ -1,20 +1,32 @@
-from typing import List
-from .azure_vector_store import get_vector_store_azure, delete_index_from_vector_store_azure, add_documents_to_vector_store_with_retry_azure
-from .aws_vector_store import get_vector_store_aws, delete_index_from_vector_store_aws, add_documents_to_vector_store_with_retry_aws
+from typing import List, Optional
+from .azure_vector_store import get_vector_store_azure, delete_index_from_vector_store_azure, add_documents_to_vector_store_with_retry_azure, delete_documents_from_vector_store_azure
+from .azure_vector_store import resolve_index_name_azure, swap_index_alias_azure, list_index_versions_azure, get_document_count_azure, get_missing_fields_azure, document_key_azure
+from .aws_vector_store import get_vector_store_aws, delete_index_from_vector_store_aws, add_documents_to_vector_store_with_retry_aws, delete_documents_from_vector_store_aws
+from .aws_vector_store import resolve_index_name_aws, swap_index_alias_aws, list_index_versions_aws, get_document_count_aws
+from .local_vector_store import get_vector_store_local, delete_index_from_vector_store_local, add_documents_to_vector_store_with_retry_local, delete_documents_from_vector_store_local
+from .local_vector_store import resolve_index_name_local, swap_index_alias_local, list_index_versions_local, get_document_count_local
+from .local_vector_store import LOCAL_SEARCH_MIRROR, get_local_mirror, local_mirror_exists, delete_local_mirror
+from .filters import SearchFilters, to_odata
+from src.backend.utils.rate_limit import is_retryable
 from langchain.docstore.document import Document
+import numpy as np
+import asyncio
 import logging 
+import os
 
 
 class VectorDatabase:
 
-    def __init__(self, provider='AZURE') -> None:
+    def __init__(self, provider=None) -> None:
         """
         Inicializa a instância da classe VectorDatabase.
 
         Args:
-            provider (str): O provedor de serviços de vetor. Pode ser 'AZURE' ou 'AWS'. O padrão é 'AZURE'.
+            provider (str, opcional): O provedor de serviços de vetor. Pode ser 'AZURE', 'AWS' ou 'LOCAL' (índice
+                NumPy em processo, persistido em disco). O padrão é o valor da variável de ambiente
+                VECTOR_STORE_PROVIDER ou 'AZURE'.
         """
-        self.provider = provider
+        self.provider = provider or os.getenv('VECTOR_STORE_PROVIDER', 'AZURE')
 
     def get_vector_store(self, index_name: str):
         """
@@ -29,29 +41,145 @@ class VectorDatabase:
 
         if self.provider == "AZURE":
             vector_store = get_vector_store_azure(index_name)
+        elif self.provider == "LOCAL":
+            vector_store = get_vector_store_local(index_name)
         else:
             vector_store = get_vector_store_aws()
 
         return vector_store
 
-    def get_relevant_documents(self, query:str, index_name:str, search_type: str)->List[Document]:
+    def get_relevant_documents(self, query:str, index_name:str, search_type: str, k: int = 3,
+                               filters: Optional[SearchFilters] = None)->List[Document]:
         """
         Obtém documentos relevantes com base na consulta fornecida.
 
+        Com o provedor AZURE, o tipo de pesquisa "local_hybrid" consulta a cópia local do índice (BM25 e
+        similaridade vetorial combinados por Reciprocal Rank Fusion), sem chamadas ao Azure Search. A mesma
+        cópia atende a consulta quando o Azure Search falha por limite de requisições ou indisponibilidade.
+
+        Os filtros são aplicados pelo próprio serviço de busca (um `$filter` OData no Azure Search) ou, nas
+        stores locais, como pré-filtro antes da busca.
+
         Args:
             query (str): A consulta para a pesquisa de similaridade.
             index_name (str): O nome do índice para o qual a pesquisa deve ser realizada.
             search_type (str): O tipo de pesquisa a ser utilizada.
+            k (int, opcional): O número de documentos. O padrão é 3.
+            filters (SearchFilters, opcional): Restringe a busca por fonte, área, tipo de documento e data.
 
         Returns:
             List[Document]: Uma lista de documentos relevantes.
         """
 
+        if search_type == "local_hybrid" and self.provider == "AZURE":
+            return self._get_local_mirror(index_name).similarity_search(query=query, k=k, search_type=search_type,
+                                                                        filters=filters)
+
         vector_store = self.get_vector_store(index_name)
-        docs = vector_store.similarity_search(query=query, k=3, search_type=search_type)
+        try:
+            docs = vector_store.similarity_search(query=query, k=k, search_type=search_type,
+                                                  filters=self._backend_filters(filters))
+        except Exception as e:
+            mirror = self._get_fallback_mirror(index_name, e)
+            if mirror is None:
+                raise
+            docs = mirror.similarity_search(query=query, k=k, search_type="local_hybrid", filters=filters)
+
+        return docs
+
+    async def aget_relevant_documents(self, query:str, index_name:str, search_type: str, k: int = 3,
+                                      filters: Optional[SearchFilters] = None)->List[Document]:
+        """
+        Versão assíncrona de `get_relevant_documents`.
+
+        Args:
+            query (str): A consulta para a pesquisa de similaridade.
+            index_name (str): O nome do índice para o qual a pesquisa deve ser realizada.
+            search_type (str): O tipo de pesquisa a ser utilizada.
+            k (int, opcional): O número de documentos. O padrão é 3.
+            filters (SearchFilters, opcional): Restringe a busca por fonte, área, tipo de documento e data.
+
+        Returns:
+            List[Document]: Uma lista de documentos relevantes.
+        """
+
+        # Resolving the alias and loading a local store may block, so they run outside the event loop
+        if search_type == "local_hybrid" and self.provider == "AZURE":
+            mirror = await asyncio.to_thread(self._get_local_mirror, index_name)
+            return await mirror.asimilarity_search(query=query, k=k, search_type=search_type, filters=filters)
+
+        vector_store = await asyncio.to_thread(self.get_vector_store, index_name)
+        try:
+            docs = await vector_store.asimilarity_search(query=query, k=k, search_type=search_type,
+                                                         filters=self._backend_filters(filters))
+        except Exception as e:
+            mirror = await asyncio.to_thread(self._get_fallback_mirror, index_name, e)
+            if mirror is None:
+                raise
+            docs = await mirror.asimilarity_search(query=query, k=k, search_type="local_hybrid", filters=filters)
 
         return docs
 
+    def embed_query(self, query: str, index_name: str) -> List[float]:
+        """
+        Gera o embedding da consulta com o mesmo modelo usado pelo índice.
+
+        Args:
+            query (str): A consulta a ser convertida em vetor.
+            index_name (str): O nome do índice cujo modelo de embeddings deve ser usado.
+
+        Returns:
+            List[float]: O vetor da consulta.
+        """
+
+        vector_store = self.get_vector_store(index_name)
+        return vector_store.embed_query(query)
+
+    async def aembed_query(self, query: str, index_name: str) -> List[float]:
+        """
+        Versão assíncrona de `embed_query`.
+
+        Args:
+            query (str): A consulta a ser convertida em vetor.
+            index_name (str): O nome do índice cujo modelo de embeddings deve ser usado.
+
+        Returns:
+            List[float]: O vetor da consulta.
+        """
+
+        vector_store = await asyncio.to_thread(self.get_vector_store, index_name)
+        return await vector_store.embedding_function.aembed_query(query)
+
+    def get_document_vectors(self, index_name: str, documents: List[Document]) -> Optional[np.ndarray]:
+        """
+        Lê os vetores já gravados para os documentos, sem novas chamadas ao modelo de embeddings.
+
+        Os vetores vêm da vector store local (provedor LOCAL) ou da cópia local do índice (provedor AZURE),
+        pelas chaves em `metadata["chunk_id"]` (codificadas como no upload, no caso da cópia local).
+
+        Args:
+            index_name (str): O nome do índice.
+            documents (List[Document]): Os documentos retornados pela busca.
+
+        Returns:
+            Optional[np.ndarray]: Os vetores, na ordem dos documentos, ou None se algum não estiver disponível.
+        """
+
+        keys = [doc.metadata.get("chunk_id") for doc in documents]
+        if not all(keys):
+            return None
+
+        if self.provider == "LOCAL":
+            store = self.get_vector_store(index_name)
+        elif self.provider == "AZURE" and local_mirror_exists(self.resolve_index_name(index_name)):
+            # The mirror is keyed like the remote index, by the encoded chunk_id
+            store = self._get_local_mirror(index_name)
+            keys = [document_key_azure(key) for key in keys]
+        else:
+            return None
+
+        return store.get_vectors(keys)
+
     def add_documents_to_vector_store(self, index_name: str, documents: List[Document])->List[str]:
         """
         Adiciona documentos à vector store.
@@ -68,13 +196,14 @@ class VectorDatabase:
         resp = vector_store.add_documents(documents=documents)
         return resp
 
-    def add_documents_to_vector_store_with_retry(self, index_name: str, documents: List[Document]) -> List[str]:
+    def add_documents_to_vector_store_with_retry(self, index_name: str, documents: List[Document], batch_size: int = 10) -> List[str]:
         """
         Adiciona documentos à vector store com tentativas de reenvio em caso de falha.
 
         Args:
             index_name (str): O nome do índice para o qual os documentos devem ser adicionados.
             documents (List[Document]): A lista de documentos a ser adicionada.
+            batch_size (int, opcional): O número de documentos enviados por requisição. O padrão é 10.
 
         Returns:
             List[str]: Uma lista de identificadores dos documentos adicionados.
@@ -83,21 +212,56 @@ class VectorDatabase:
         vector_store = self.get_vector_store(index_name)
     
         if self.provider == "AZURE":
-            add_documents_to_vector_store_with_retry_azure(vector_store, documents),
+            ids = add_documents_to_vector_store_with_retry_azure(vector_store, documents, batch_size=batch_size)
+            if LOCAL_SEARCH_MIRROR:
+                # Same keys as the remote index, so that deletions by ID apply to both
+                mirror = get_local_mirror(self.resolve_index_name(index_name), vector_store.embedding_function)
+                mirror.add_documents(documents=documents, keys=ids)
+            return ids
+
+        elif self.provider == "LOCAL":
+            return add_documents_to_vector_store_with_retry_local(vector_store, documents)
         
         else:
-            add_documents_to_vector_store_with_retry_aws()
+            return add_documents_to_vector_store_with_retry_aws()
     
-    def create_index_in_vector_store(self, index_name: str)->None:
+    def delete_documents_from_vector_store(self, index_name: str, ids: List[str]) -> None:
         """
-        Cria um índice na vector store. Se um índice já existir, ele será excluído antes de criar um novo.
+        Exclui documentos da vector store pelos seus IDs.
+
+        Args:
+            index_name (str): O nome do índice de onde os documentos devem ser removidos.
+            ids (List[str]): Os identificadores dos documentos, como retornados na adição.
+        """
+
+        if not ids:
+            return
+
+        if self.provider == "AZURE":
+            vector_store = self.get_vector_store(index_name)
+            delete_documents_from_vector_store_azure(vector_store, ids)
+            if local_mirror_exists(self.resolve_index_name(index_name)):
+                get_local_mirror(self.resolve_index_name(index_name), vector_store.embedding_function).delete(ids)
+
+        elif self.provider == "LOCAL":
+            delete_documents_from_vector_store_local(self.get_vector_store(index_name), ids)
+
+        else:
+            delete_documents_from_vector_store_aws()
+
+    def create_index_in_vector_store(self, index_name: str, recreate: bool = True)->None:
+        """
+        Cria um índice na vector store. Se um índice já existir, ele será excluído antes de criar um novo,
+        a menos que `recreate` seja False, caso em que o índice existente é mantido.
 
         Args:
             index_name (str): O nome do índice a ser criado.
+            recreate (bool, opcional): Se o índice existente deve ser excluído. O padrão é True.
         """
 
         try:
-            self.delete_index_from_vector_store(index_name)
+            if recreate:
+                self.delete_index_from_vector_store(index_name)
             self.get_vector_store(index_name)
             logging.info("Creating new Indexes")
         except Exception as e:
@@ -112,7 +276,141 @@ class VectorDatabase:
         """
 
         if self.provider == "AZURE":
-            delete_index_from_vector_store_azure(index_name),
+            delete_index_from_vector_store_azure(index_name)
+            delete_local_mirror(index_name)
+
+        elif self.provider == "LOCAL":
+            delete_index_from_vector_store_local(index_name)
         
         else:
             delete_index_from_vector_store_aws()
+
+    def resolve_index_name(self, index_name: str) -> str:
+        """
+        Resolve o nome lógico (alias) de um índice para o índice físico que responde por ele.
+
+        Args:
+            index_name (str): O nome do alias ou do índice.
+
+        Returns:
+            str: O nome do índice físico.
+        """
+
+        if self.provider == "AZURE":
+            return resolve_index_name_azure(index_name)
+
+        elif self.provider == "LOCAL":
+            return resolve_index_name_local(index_name)
+
+        else:
+            return resolve_index_name_aws(index_name)
+
+    def swap_index_alias(self, alias_name: str, index_name: str) -> None:
+        """
+        Aponta o alias para outro índice físico. As consultas feitas pelo alias passam para o novo índice
+        sem interrupção.
+
+        Args:
+            alias_name (str): O nome do alias.
+            index_name (str): O nome do índice físico.
+        """
+
+        if self.provider == "AZURE":
+            swap_index_alias_azure(alias_name, index_name)
+
+        elif self.provider == "LOCAL":
+            swap_index_alias_local(alias_name, index_name)
+
+        else:
+            swap_index_alias_aws()
+
+    def list_index_versions(self, alias_name: str) -> List[str]:
+        """
+        Lista as versões físicas de um índice, da mais antiga para a mais recente.
+
+        Args:
+            alias_name (str): O nome do alias.
+
+        Returns:
+            List[str]: Os nomes dos índices físicos.
+        """
+
+        if self.provider == "AZURE":
+            return list_index_versions_azure(alias_name)
+
+        elif self.provider == "LOCAL":
+            return list_index_versions_local(alias_name)
+
+        else:
+            return list_index_versions_aws()
+
+    def get_document_count(self, index_name: str) -> int:
+        """
+        Retorna o número de documentos de um índice.
+
+        Args:
+            index_name (str): O nome do índice.
+
+        Returns:
+            int: O número de documentos.
+        """
+
+        if self.provider == "AZURE":
+            return get_document_count_azure(index_name)
+
+        elif self.provider == "LOCAL":
+            return get_document_count_local(index_name)
+
+        else:
+            return get_document_count_aws()
+
+    def has_local_mirror(self, index_name: str) -> bool:
+        """
+        Verifica se a cópia local do índice remoto, gravada pela ingestão, existe neste host.
+
+        Args:
+            index_name (str): O nome do índice ou do alias.
+
+        Returns:
+            bool: True se a cópia existe. Com o provedor LOCAL o próprio índice é local.
+        """
+
+        if self.provider == "LOCAL":
+            return True
+
+        return self.provider == "AZURE" and local_mirror_exists(self.resolve_index_name(index_name))
+
+    def get_missing_fields(self, index_name: str) -> List[str]:
+        """
+        Lista os campos esperados (ex.: os campos de filtro) que não existem em um índice já criado.
+
+        Args:
+            index_name (str): O nome do índice.
+
+        Returns:
+            List[str]: Os nomes dos campos ausentes. As vector stores local e AWS não têm esquema fixo.
+        """
+
+        if self.provider == "AZURE":
+            return get_missing_fields_azure(index_name)
+
+        return []
+
+    def _backend_filters(self, filters: Optional[SearchFilters]):
+        # Azure Search takes an OData expression, the local store the filters themselves
+        if self.provider == "AZURE":
+            return to_odata(filters)
+        return filters
+
+    def _get_local_mirror(self, index_name: str):
+        vector_store = self.get_vector_store(index_name)
+        return get_local_mirror(self.resolve_index_name(index_name), vector_store.embedding_function)
+
+    def _get_fallback_mirror(self, index_name: str, error: Exception):
+        if self.provider != "AZURE" or not is_retryable(error):
+            return None
+        if not local_mirror_exists(self.resolve_index_name(index_name)):
+            return None
+
+        logging.warning(f"Azure Search unavailable ({error}), searching the local copy of {index_name}")
+        return self._get_local_mirror(index_name)